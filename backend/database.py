@@ -1,14 +1,20 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+
 from config import settings
+from services import db_pool, read_replicas, sqlite_backend
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False
-)
+# 连接池大小与存活检测策略见 config.DB_POOL_* / DB_PRE_PING 与 services/db_pool.py；
+# DB_BACKEND=sqlite 时使用嵌入式 SQLite（WAL 与 PRAGMA 见 services/sqlite_backend.py）
+_engine_options = db_pool.engine_options(settings.DATABASE_URL)
+if sqlite_backend.is_sqlite(settings.DATABASE_URL):
+    _engine_options.update(sqlite_backend.engine_options(settings.DATABASE_URL))
+engine = create_engine(settings.DATABASE_URL, echo=False, **_engine_options)
+db_pool.install(engine)
+if engine.dialect.name == "sqlite":
+    sqlite_backend.install(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -21,3 +27,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request):
+    """
+    只读接口的数据库会话：配置了只读副本（DB_REPLICA_URLS）时使用选中的健康副本；
+    客户端写后粘滞窗口内（见 main.py 的 read_your_writes 中间件）或没有健康副本时使用主库。
+    只能用于不写库的 GET 接口。
+    """
+    bind = None
+    if read_replicas.enabled():
+        if getattr(request.state, "read_primary", False):
+            read_replicas.count_sticky_read()
+        else:
+            bind = read_replicas.choose()
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -10,6 +10,9 @@ CREATE TABLE IF NOT EXISTS users (
     password_hash VARCHAR(128) NOT NULL COMMENT '密码哈希',
     nickname VARCHAR(64) COMMENT '昵称/显示名',
     avatar_url VARCHAR(512) COMMENT '头像URL',
+    avatar_variants JSON COMMENT '头像缩略图 URL',
+    disabled TINYINT(1) NOT NULL DEFAULT 0 COMMENT '是否已停用（删除中）',
+    password_changed_at DATETIME NULL COMMENT '密码修改时间（早于该时间签发的 token 失效）',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '注册时间',
     UNIQUE KEY uk_username (username)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户表';
@@ -17,6 +20,26 @@ CREATE TABLE IF NOT EXISTS users (
 -- 若表已存在且缺少新字段，可执行以下语句（按需执行一次）
 -- ALTER TABLE users ADD COLUMN nickname VARCHAR(64) COMMENT '昵称/显示名';
 -- ALTER TABLE users ADD COLUMN avatar_url VARCHAR(512) COMMENT '头像URL';
+-- ALTER TABLE users ADD COLUMN avatar_variants JSON COMMENT '头像缩略图 URL' AFTER avatar_url;  -- 之后运行 python scripts/backfill_avatar_variants.py
+-- ALTER TABLE users ADD COLUMN disabled TINYINT(1) NOT NULL DEFAULT 0 COMMENT '是否已停用（删除中）' AFTER avatar_variants;
+-- ALTER TABLE users ADD COLUMN password_changed_at DATETIME NULL COMMENT '密码修改时间（早于该时间签发的 token 失效）' AFTER disabled;
+
+-- 用户删除任务表：管理员删除用户后账号立即停用，后台分批清理收藏并解除记录关联，最后删除用户行
+CREATE TABLE IF NOT EXISTS user_deletions (
+    user_id VARCHAR(36) PRIMARY KEY COMMENT '被删除的用户ID',
+    username VARCHAR(64) COMMENT '用户名（用户行删除后仍可查看）',
+    status VARCHAR(16) NOT NULL DEFAULT 'pending' COMMENT 'pending / running / done',
+    favorites_done INT NOT NULL DEFAULT 0 COMMENT '已删除收藏数',
+    records_done INT NOT NULL DEFAULT 0 COMMENT '已解除关联的解题记录数',
+    archived_done INT NOT NULL DEFAULT 0 COMMENT '已解除关联的归档记录数',
+    error VARCHAR(500) COMMENT '最近一次失败原因（失败后自动重试）',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '发起时间',
+    started_at DATETIME COMMENT '开始处理时间',
+    finished_at DATETIME COMMENT '完成时间',
+    heartbeat_at DATETIME COMMENT '处理中任务最近一次提交批次的时间',
+    INDEX idx_status (status),
+    INDEX idx_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户删除任务表';
 
 -- 创建解题记录表
 CREATE TABLE IF NOT EXISTS solution_records (
@@ -24,8 +47,10 @@ CREATE TABLE IF NOT EXISTS solution_records (
     question TEXT NOT NULL COMMENT '题目原文',
     answer VARCHAR(500) COMMENT '简短答案',
     solution LONGTEXT COMMENT '完整解题过程(Markdown)',
+    solution_compressed MEDIUMBLOB COMMENT '压缩后的解题过程（开启 SOLUTION_COMPRESSION 时使用）',
     knowledge_points JSON COMMENT '知识点列表',
     semantic_contexts JSON COMMENT '语义情境列表',
+    tags JSON COMMENT '规范化标签列表',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     user_id VARCHAR(36) COMMENT '用户ID',
     INDEX idx_created_at (created_at),
@@ -33,6 +58,67 @@ CREATE TABLE IF NOT EXISTS solution_records (
     CONSTRAINT fk_solution_records_user_id FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='解题记录表';
 
+-- 若表已存在且缺少 tags 字段，可执行以下语句（按需执行一次），再运行 python scripts/migrate_record_tags.py 回填历史数据
+-- ALTER TABLE solution_records ADD COLUMN tags JSON COMMENT '规范化标签列表' AFTER semantic_contexts;
+-- 若表已存在且缺少 solution_compressed 字段，可执行以下语句，再运行 python scripts/compress_solutions.py 压缩历史数据
+-- ALTER TABLE solution_records ADD COLUMN solution_compressed MEDIUMBLOB COMMENT '压缩后的解题过程（开启 SOLUTION_COMPRESSION 时使用）' AFTER solution;
+
+-- 解题记录归档表（冷数据）：超过 ARCHIVE_AFTER_DAYS 且未被收藏的记录由 python scripts/archive_records.py 移入此表
+CREATE TABLE IF NOT EXISTS solution_records_archive (
+    id VARCHAR(36) PRIMARY KEY COMMENT '原解题记录ID',
+    user_id VARCHAR(36) COMMENT '用户ID',
+    created_at DATETIME COMMENT '原创建时间',
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '归档时间',
+    payload MEDIUMBLOB NOT NULL COMMENT '压缩后的记录内容(JSON)',
+    INDEX idx_user_id (user_id),
+    INDEX idx_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='解题记录归档表';
+
+-- 管理端统计汇总表：按小时/天累计各指标（解题、保存记录、知识点、语义情境、活跃用户）的次数；
+-- 建表后可运行 python scripts/rollup_analytics.py 从历史记录补算
+CREATE TABLE IF NOT EXISTS analytics_rollups (
+    granularity VARCHAR(8) NOT NULL COMMENT '粒度：hour / day',
+    metric VARCHAR(32) NOT NULL COMMENT '指标，如 solve / record / knowledge',
+    bucket DATETIME NOT NULL COMMENT '时间桶起点（整点或零点）',
+    dim VARCHAR(128) NOT NULL DEFAULT '' COMMENT '维度值，无维度时为空串',
+    count BIGINT NOT NULL DEFAULT 0 COMMENT '次数',
+    value_sum DOUBLE NOT NULL DEFAULT 0 COMMENT '数值累计，如解题耗时毫秒数之和',
+    PRIMARY KEY (granularity, metric, bucket, dim)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='管理端统计汇总表';
+
+-- 模型定期探测结果表：当选的探测 worker 每轮写入，保留最近一天，供管理端健康视图（/admin/models/health）使用
+CREATE TABLE IF NOT EXISTS model_probe_results (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '自增ID',
+    kind VARCHAR(16) NOT NULL COMMENT '模型类型：solve / knowledge / semantic',
+    model VARCHAR(128) NOT NULL COMMENT '模型ID',
+    probed_at DATETIME NOT NULL COMMENT '探测时间',
+    latency_ms DOUBLE NULL COMMENT '耗时毫秒',
+    success TINYINT(1) NOT NULL COMMENT '是否成功',
+    error VARCHAR(200) NULL COMMENT '失败原因',
+    INDEX idx_kind_model_probed_at (kind, model, probed_at),
+    INDEX idx_probed_at (probed_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='模型定期探测结果表';
+
+-- 模型基准测试任务表：管理员用固定题目集测试所选模型，report 保存各模型汇总指标与逐题结果
+CREATE TABLE IF NOT EXISTS model_benchmarks (
+    id VARCHAR(36) PRIMARY KEY COMMENT '任务ID',
+    name VARCHAR(128) COMMENT '任务名称',
+    status VARCHAR(16) NOT NULL DEFAULT 'pending' COMMENT 'pending / running / cancelling / done / failed / cancelled',
+    models JSON NOT NULL COMMENT '参与测试的模型 ID 列表',
+    questions JSON NOT NULL COMMENT '题目列表',
+    concurrency INT NOT NULL DEFAULT 4 COMMENT '并发请求数',
+    `repeat` INT NOT NULL DEFAULT 1 COMMENT '每题每模型重复次数',
+    total INT NOT NULL DEFAULT 0 COMMENT '请求总数',
+    completed INT NOT NULL DEFAULT 0 COMMENT '已完成请求数',
+    report JSON COMMENT '测试报告',
+    error VARCHAR(500) COMMENT '任务失败原因',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    started_at DATETIME COMMENT '开始时间',
+    finished_at DATETIME COMMENT '结束时间',
+    heartbeat_at DATETIME COMMENT '运行中任务最近一次写回进度的时间',
+    INDEX idx_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='模型基准测试任务表';
+
 -- 创建收藏表
 CREATE TABLE IF NOT EXISTS favorites (
     id VARCHAR(36) PRIMARY KEY COMMENT '收藏ID',
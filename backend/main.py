@@ -5,18 +5,36 @@ _backend_dir = Path(__file__).resolve().parent
 if str(_backend_dir) not in sys.path:
     sys.path.insert(0, str(_backend_dir))
 
+import asyncio
+import anyio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from config import settings
-from database import SessionLocal
+from database import SessionLocal, engine
 from routers import records, favorites, solve, auth, admin
+from services import analytics, avatar_images, benchmark, db_pool, model_prober, password_hasher, read_replicas, sqlite_backend, token_cache, user_deletion
+from services.avatar_storage import gc_loop, size_limit_message
+from services.static_files import UploadStaticFiles
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """应用启动时：若解题模型表为空，则从环境变量写入初始数据，使管理端与用户端共用同一数据源。"""
+    """
+    应用启动时：SQLite 模式下按模型建表；若解题模型表为空，则从环境变量写入初始数据，使管理端与用户端共用同一数据源；
+    并启动孤儿头像文件的定期清理、统计增量的定期写入、模型健康探测、用户删除任务的恢复、token 撤销名单的刷新与只读副本健康检查。关闭时停止后台任务（含运行中的模型基准测试与用户删除）与进程池，并写入剩余的统计增量。
+    """
+    if engine.dialect.name == "sqlite":
+        sqlite_backend.create_schema(engine)
+    threads = anyio.to_thread.current_default_thread_limiter().total_tokens
+    db_pool.set_thread_limit(threads)
+    if db_pool.capacity() < threads:
+        print(f"[startup] 数据库连接池容量 {db_pool.capacity()} 小于线程池大小 {threads}，高并发时同步接口可能排队等待连接（见 /api/admin/metrics 的 db_pool）")
+    replica_task = None
+    if read_replicas.enabled():
+        # 首次健康检查完成前副本视为不可用，读请求走主库
+        replica_task = asyncio.create_task(read_replicas.check_loop())
     db = SessionLocal()
     try:
         n = solve.seed_solve_models_from_env(db)
@@ -24,9 +42,32 @@ async def lifespan(app: FastAPI):
             print(f"[startup] Seeded {n} solve model(s) from env into solve_models table.")
     finally:
         db.close()
+    gc_task = asyncio.create_task(gc_loop()) if settings.AVATAR_GC_INTERVAL_SECONDS > 0 else None
+    analytics_task = asyncio.create_task(analytics.flush_loop())
+    probe_task = asyncio.create_task(model_prober.probe_loop()) if settings.MODEL_PROBE_INTERVAL_SECONDS > 0 else None
+    deletion_task = asyncio.create_task(user_deletion.resume_loop())
+    revocation_task = asyncio.create_task(token_cache.refresh_loop())
     yield
-    # shutdown if needed
-    pass
+    if replica_task is not None:
+        replica_task.cancel()
+        read_replicas.dispose()
+    deletion_task.cancel()
+    revocation_task.cancel()
+    await user_deletion.shutdown()
+    if gc_task is not None:
+        gc_task.cancel()
+    if probe_task is not None:
+        probe_task.cancel()
+        # 等待其交还探测租约
+        await asyncio.gather(probe_task, return_exceptions=True)
+    await benchmark.shutdown()
+    analytics_task.cancel()
+    try:
+        analytics.flush()
+    except Exception as e:
+        print(f"[analytics] 写入汇总失败: {e}")
+    password_hasher.shutdown()
+    avatar_images.shutdown()
 
 
 app = FastAPI(
@@ -36,6 +77,51 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 头像上传：按 Content-Length 在读取请求体之前拒绝明显超限的请求（余量留给 multipart 边界与表单头）
+_AVATAR_UPLOAD_PATHS = {
+    f"{settings.API_V1_PREFIX}/auth/avatar/upload",
+}
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_avatar_upload(request: Request, call_next):
+    if request.method == "POST" and (
+        request.url.path in _AVATAR_UPLOAD_PATHS
+        or (request.url.path.startswith(f"{settings.API_V1_PREFIX}/admin/users/") and request.url.path.endswith("/avatar"))
+    ):
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > settings.AVATAR_MAX_BYTES + _MULTIPART_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"errCode": 413, "errMsg": size_limit_message(), "data": {}},
+            )
+    return await call_next(request)
+
+
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """配置了只读副本时：客户端写入成功后的 DB_READ_STICKY_SECONDS 秒内，其读请求使用主库（见 database.get_read_db）。"""
+    if not read_replicas.enabled():
+        return await call_next(request)
+    key = read_replicas.client_key(request.headers, request.client.host if request.client else None)
+    if request.method in _READ_METHODS:
+        if read_replicas.is_sticky(key) or request.cookies.get(read_replicas.STICKY_COOKIE):
+            request.state.read_primary = True
+        return await call_next(request)
+    response = await call_next(request)
+    if response.status_code < 400:
+        read_replicas.mark_write(key)
+        response.set_cookie(
+            read_replicas.STICKY_COOKIE, "1",
+            max_age=max(1, int(settings.DB_READ_STICKY_SECONDS)), httponly=True, samesite="lax",
+        )
+    return response
+
+
 # 配置CORS（先添加的中间件后执行，所以 CORS 要最后 add 才能最先处理请求）
 app.add_middleware(
     CORSMiddleware,
@@ -54,10 +140,10 @@ app.include_router(favorites.router, prefix=settings.API_V1_PREFIX)
 app.include_router(solve.router, prefix=settings.API_V1_PREFIX)
 app.include_router(admin.router, prefix=settings.API_V1_PREFIX)
 
-# 静态文件：头像等上传文件（挂载在 /api/uploads，与 API 同源）
+# 静态文件：头像等上传文件（挂载在 /api/uploads，与 API 同源）；文件名唯一，按 immutable 长期缓存并支持 Range
 _upload_dir = _backend_dir / settings.UPLOAD_DIR
 _upload_dir.mkdir(parents=True, exist_ok=True)
-app.mount(f"/{settings.API_V1_PREFIX.strip('/')}/uploads", StaticFiles(directory=str(_upload_dir)), name="uploads")
+app.mount(f"/{settings.API_V1_PREFIX.strip('/')}/uploads", UploadStaticFiles(directory=str(_upload_dir)), name="uploads")
 
 @app.get("/")
 def root():
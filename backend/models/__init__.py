@@ -2,5 +2,10 @@ from .record import SolutionRecord
 from .favorite import Favorite
 from .user import User
 from .solve_model import SolveModel
+from .archived_record import ArchivedRecord
+from .analytics_rollup import AnalyticsRollup
+from .model_benchmark import ModelBenchmark
+from .model_probe_result import ModelProbeResult
+from .user_deletion import UserDeletion
 
-__all__ = ["SolutionRecord", "Favorite", "User", "SolveModel"]
+__all__ = ["SolutionRecord", "Favorite", "User", "SolveModel", "ArchivedRecord", "AnalyticsRollup", "ModelBenchmark", "ModelProbeResult", "UserDeletion"]
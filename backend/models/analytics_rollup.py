@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, String
+from database import Base
+
+
+class AnalyticsRollup(Base):
+    """
+    统计汇总表：按小时/天为每个指标（及维度，如模型 ID、知识点名称、用户 ID）累计次数，
+    管理端的时间序列与排行只读取本表，不扫描 solution_records。由 services/analytics.py 维护。
+    """
+
+    __tablename__ = "analytics_rollups"
+
+    granularity = Column(String(8), primary_key=True, comment="粒度：hour / day")
+    metric = Column(String(32), primary_key=True, comment="指标，如 solve / record / knowledge")
+    bucket = Column(DateTime, primary_key=True, comment="时间桶起点（整点或零点）")
+    dim = Column(String(128), primary_key=True, default="", comment="维度值，无维度时为空串")
+    count = Column(BigInteger, nullable=False, default=0, comment="次数")
+    value_sum = Column(Float, nullable=False, default=0, comment="数值累计，如解题耗时毫秒数之和")
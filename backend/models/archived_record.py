@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from database import Base
+
+
+class ArchivedRecord(Base):
+    """
+    冷数据归档表：超过 ARCHIVE_AFTER_DAYS 且未被收藏的解题记录从 solution_records 移入此表。
+    只保留主键、用户与时间三个索引列（供详情按 ID 查找与导出/统计），其余字段压缩打包在 payload 中。
+    """
+
+    __tablename__ = "solution_records_archive"
+
+    id = Column(String(36), primary_key=True, comment="原解题记录ID")
+    user_id = Column(String(36), nullable=True, index=True, comment="用户ID")
+    created_at = Column(DateTime, nullable=True, index=True, comment="原创建时间")
+    archived_at = Column(DateTime, server_default=func.now(), comment="归档时间")
+    payload = Column(LargeBinary(length=2**24 - 1), nullable=False, comment="压缩后的记录内容(JSON)")
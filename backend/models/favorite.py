@@ -1,19 +1,21 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from database import Base
 import uuid
 
 class Favorite(Base):
     __tablename__ = "favorites"
+    # 与 init_db.sql 一致（SQLite 模式按模型建表）：每个用户对同一记录只能收藏一次
+    __table_args__ = (UniqueConstraint("user_id", "record_id", name="uk_user_record"),)
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    record_id = Column(String(36), ForeignKey("solution_records.id"), nullable=False, comment="解题记录ID")
-    user_id = Column(String(36), nullable=True, comment="用户ID(预留)")
-    created_at = Column(DateTime, server_default=func.now(), comment="收藏时间")
+    record_id = Column(String(36), ForeignKey("solution_records.id", ondelete="CASCADE"), nullable=False, index=True, comment="解题记录ID")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True, comment="用户ID(预留)")
+    created_at = Column(DateTime, server_default=func.now(), index=True, comment="收藏时间")
     
-    # 关联关系
-    record = relationship("SolutionRecord", backref="favorites")
+    # 关联关系（删除记录时由外键级联删除收藏，ORM 不再逐条加载）
+    record = relationship("SolutionRecord", backref=backref("favorites", passive_deletes=True))
     
     def to_dict(self):
         """转换为字典"""
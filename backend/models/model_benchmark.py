@@ -0,0 +1,47 @@
+from sqlalchemy import Column, DateTime, Integer, JSON, String
+from sqlalchemy.sql import func
+from database import Base
+import uuid
+
+
+class ModelBenchmark(Base):
+    """管理端模型基准测试任务：用固定题目集测试所选模型，report 保存各模型的汇总指标与逐题结果，供横向对比。"""
+
+    __tablename__ = "model_benchmarks"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = Column(String(128), nullable=True, comment="任务名称")
+    status = Column(String(16), nullable=False, default="pending", comment="pending / running / cancelling / done / failed / cancelled")
+    models = Column(JSON, nullable=False, comment="参与测试的模型 ID 列表")
+    questions = Column(JSON, nullable=False, comment="题目列表")
+    concurrency = Column(Integer, nullable=False, default=4, comment="并发请求数")
+    repeat = Column(Integer, nullable=False, default=1, comment="每题每模型重复次数")
+    total = Column(Integer, nullable=False, default=0, comment="请求总数")
+    completed = Column(Integer, nullable=False, default=0, comment="已完成请求数")
+    report = Column(JSON(none_as_null=True), nullable=True, comment="测试报告")
+    error = Column(String(500), nullable=True, comment="任务失败原因")
+    created_at = Column(DateTime, server_default=func.now(), index=True, comment="创建时间")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+    heartbeat_at = Column(DateTime, nullable=True, comment="运行中任务最近一次写回进度的时间")
+
+    def to_dict(self, with_report: bool = True) -> dict:
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "models": self.models or [],
+            "question_count": len(self.questions or []),
+            "concurrency": self.concurrency,
+            "repeat": self.repeat,
+            "total": self.total,
+            "completed": self.completed,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if with_report:
+            data["questions"] = self.questions or []
+            data["report"] = self.report
+        return data
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Index, Integer, String
+from database import Base
+
+
+class ModelProbeResult(Base):
+    """
+    模型定期探测结果：由当选的探测 worker 每轮写入，保留最近一天，供各 worker 的管理端健康视图共用。
+    管理端手动测试（/admin/test/*）的结果不写入本表。由 services/model_prober.py 维护。
+    """
+
+    __tablename__ = "model_probe_results"
+    __table_args__ = (Index("idx_kind_model_probed_at", "kind", "model", "probed_at"),)
+
+    id = Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True, autoincrement=True)
+    kind = Column(String(16), nullable=False, comment="模型类型：solve / knowledge / semantic")
+    model = Column(String(128), nullable=False, comment="模型ID")
+    probed_at = Column(DateTime, nullable=False, index=True, comment="探测时间")
+    latency_ms = Column(Float, nullable=True, comment="耗时毫秒")
+    success = Column(Boolean, nullable=False, comment="是否成功")
+    error = Column(String(200), nullable=True, comment="失败原因")
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, String, Text, DateTime, JSON
+from sqlalchemy import Column, ForeignKey, String, Text, DateTime, JSON, LargeBinary
 from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred
 from database import Base
+from config import settings
+from services.solution_codec import unpack_solution
 import uuid
 
 class SolutionRecord(Base):
@@ -9,21 +12,86 @@ class SolutionRecord(Base):
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     question = Column(Text, nullable=False, comment="题目原文")
     answer = Column(String(500), nullable=True, comment="简短答案")
-    solution = Column(Text, nullable=True, comment="完整解题过程(Markdown)")
+    # 完整解题过程体积大（LONGTEXT），默认延迟加载，仅详情接口通过 undefer 读取
+    solution = deferred(Column(Text, nullable=True, comment="完整解题过程(Markdown)"))
+    # 开启 SOLUTION_COMPRESSION 后较长的解题过程压缩存于此列（此时 solution 为空），读取请用 get_solution()
+    solution_compressed = deferred(Column(LargeBinary(length=2**24 - 1), nullable=True, comment="压缩后的解题过程"))
     knowledge_points = Column(JSON, nullable=True, default=list, comment="知识点列表")
     semantic_contexts = Column(JSON, nullable=True, default=list, comment="语义情境列表")
-    created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
-    user_id = Column(String(36), nullable=True, comment="用户ID(预留)")
+    # 写入时由 build_tags 规范化的标签 [{"name", "type"}]，列表/详情直接读取，无需逐行解析上面两列
+    tags = Column(JSON, nullable=True, comment="规范化标签列表")
+    created_at = Column(DateTime, server_default=func.now(), index=True, comment="创建时间")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True, comment="用户ID(预留)")
+
+    @classmethod
+    def question_preview(cls):
+        """列表接口使用的题目预览列：按 LIST_QUESTION_PREVIEW_CHARS 截断，0 表示返回原文。"""
+        n = settings.LIST_QUESTION_PREVIEW_CHARS
+        if n and n > 0:
+            return func.substr(cls.question, 1, n).label("question")
+        return cls.question
     
+    def get_solution(self) -> str | None:
+        """完整解题过程：透明解压 solution_compressed，未压缩时返回 solution。"""
+        return unpack_solution(self.solution, self.solution_compressed)
+
+    def get_tags(self) -> list:
+        """规范化标签；未迁移的旧数据回退为按 knowledge_points / semantic_contexts 现场构建。"""
+        if self.tags is not None:
+            return self.tags
+        return build_tags(self.knowledge_points, self.semantic_contexts)
+
     def to_dict(self):
         """转换为字典"""
         return {
             "id": self.id,
             "question": self.question,
             "answer": self.answer,
-            "solution": self.solution,
+            "solution": self.get_solution(),
             "knowledge_points": self.knowledge_points or [],
             "semantic_contexts": self.semantic_contexts or [],
+            "tags": self.get_tags(),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "user_id": self.user_id
         }
+
+
+def _tag_names(items) -> list:
+    """取出标签名：兼容字符串与 {"name": ...} 两种历史格式，去掉空值。"""
+    names = []
+    for item in items or []:
+        if isinstance(item, dict):
+            item = item.get("name")
+        if isinstance(item, str) and item.strip():
+            names.append(item.strip())
+    return names
+
+
+def build_tags(knowledge_points, semantic_contexts) -> list:
+    """把知识点与语义情境合并为规范化标签 [{"name": str, "type": "knowledge"|"semantic"}]，保存记录时调用一次。"""
+    tags = [{"name": n, "type": "knowledge"} for n in _tag_names(knowledge_points)]
+    tags.extend({"name": n, "type": "semantic"} for n in _tag_names(semantic_contexts))
+    return tags
+
+
+def resolve_tags(db, pairs) -> dict:
+    """
+    批量取得列表行的标签，pairs 为 [(record_id, tags列值)]，返回 {record_id: tags}。
+    已迁移的行直接使用 tags 列；tags 为空（未迁移）的行用一次 IN 查询回读旧列并现场规范化。
+    """
+    result = {}
+    missing = []
+    for record_id, tags in pairs:
+        if tags is None:
+            missing.append(record_id)
+        else:
+            result[record_id] = tags
+    if missing:
+        rows = (
+            db.query(SolutionRecord.id, SolutionRecord.knowledge_points, SolutionRecord.semantic_contexts)
+            .filter(SolutionRecord.id.in_(missing))
+            .all()
+        )
+        for r in rows:
+            result[r.id] = build_tags(r.knowledge_points, r.semantic_contexts)
+    return result
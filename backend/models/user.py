@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Boolean, Column, String, DateTime, JSON
 from sqlalchemy.sql import func
 from database import Base
 import uuid
@@ -12,6 +12,12 @@ class User(Base):
     password_hash = Column(String(128), nullable=False, comment="密码哈希")
     nickname = Column(String(64), nullable=True, comment="昵称/显示名")
     avatar_url = Column(String(512), nullable=True, comment="头像 URL")
+    # 头像各尺寸 WebP 变体 {尺寸: URL}，由 services/avatar_images.py 在后台生成后写入
+    avatar_variants = Column(JSON(none_as_null=True), nullable=True, comment="头像缩略图 URL")
+    # 管理员删除用户后立即停用，后台清理完成后删除该行（见 services/user_deletion.py）
+    disabled = Column(Boolean, nullable=False, default=False, server_default="0", comment="是否已停用")
+    # 管理员重置密码的时间：签发（iat）早于该时间的 token 失效（见 services/token_cache.py）
+    password_changed_at = Column(DateTime, nullable=True, comment="密码修改时间")
     created_at = Column(DateTime, server_default=func.now(), comment="注册时间")
 
     def to_dict(self):
@@ -20,5 +26,7 @@ class User(Base):
             "username": self.username,
             "nickname": self.nickname,
             "avatar_url": self.avatar_url,
+            "avatar_variants": self.avatar_variants,
+            "disabled": bool(self.disabled),
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from database import Base
+
+
+class UserDeletion(Base):
+    """
+    用户删除任务：管理员删除用户时账号立即停用，由 services/user_deletion.py 在后台分批删除其收藏、
+    把解题记录与归档记录的 user_id 置空，最后删除用户行。各计数与本批变更在同一事务内提交，中断后可从断点继续。
+    """
+
+    __tablename__ = "user_deletions"
+
+    user_id = Column(String(36), primary_key=True, comment="被删除的用户ID")
+    username = Column(String(64), nullable=True, comment="用户名（用户行删除后仍可查看）")
+    status = Column(String(16), nullable=False, default="pending", index=True, comment="pending / running / done")
+    favorites_done = Column(Integer, nullable=False, default=0, comment="已删除收藏数")
+    records_done = Column(Integer, nullable=False, default=0, comment="已解除关联的解题记录数")
+    archived_done = Column(Integer, nullable=False, default=0, comment="已解除关联的归档记录数")
+    error = Column(String(500), nullable=True, comment="最近一次失败原因（失败后自动重试）")
+    created_at = Column(DateTime, server_default=func.now(), index=True, comment="发起时间")
+    started_at = Column(DateTime, nullable=True, comment="开始处理时间")
+    finished_at = Column(DateTime, nullable=True, comment="完成时间")
+    heartbeat_at = Column(DateTime, nullable=True, comment="处理中任务最近一次提交批次的时间")
+
+    def to_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "username": self.username,
+            "status": self.status,
+            "favorites_done": self.favorites_done,
+            "records_done": self.records_done,
+            "archived_done": self.archived_done,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -3,23 +3,28 @@
 认证方式：请求头 X-Admin-Token 或 Authorization: Bearer <ADMIN_SECRET>，与 config.ADMIN_SECRET 一致即通过。
 """
 import time
-from fastapi import APIRouter, Depends, HTTPException, Query, Header, UploadFile, File
-from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Header, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, undefer
 from sqlalchemy import or_, and_
-from typing import Optional
-from pathlib import Path
-import uuid
+from typing import Literal, Optional
 
 import httpx
 from routers import solve as solve_router
+from services.avatar_storage import AvatarError, gc_orphans, save_avatar
+from services.static_files import fast_path_stats
+from services import analytics, archive, avatar_images, benchmark, db_pool, model_prober, password_hasher, read_replicas, snapshot, solve_model_cache, throttle, token_cache, user_cache, user_deletion
 
 from config import settings
-from database import get_db
+from database import SessionLocal, engine, get_db, get_read_db
 from models.user import User
 from models.solve_model import SolveModel
 from models.record import SolutionRecord
 from models.favorite import Favorite
 from models.system_setting import SystemSetting
+from models.model_benchmark import ModelBenchmark
+from models.user_deletion import UserDeletion
 from schemas.admin import (
     AdminUserItem,
     AdminUserListResponse,
@@ -42,8 +47,8 @@ from schemas.admin import (
     AdminFavoriteItem,
     AdminFavoriteListResponse,
     AdminCommonResponse,
+    AdminBenchmarkCreateRequest,
 )
-from .auth import hash_password
 
 router = APIRouter(prefix="/admin", tags=["管理员"])
 
@@ -66,7 +71,7 @@ def admin_list_users(
     page: int = Query(1, ge=1),
     pageSize: int = Query(10, ge=1, le=100),
     keyword: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_admin_token),
 ):
     """用户列表（分页）。"""
@@ -83,6 +88,8 @@ def admin_list_users(
             username=u.username,
             nickname=u.nickname,
             avatar_url=u.avatar_url,
+            avatar_variants=u.avatar_variants,
+            disabled=bool(u.disabled),
             created_at=u.created_at.isoformat() if u.created_at else None,
         )
         for u in users
@@ -93,7 +100,7 @@ def admin_list_users(
 @router.get("/users/{user_id}", response_model=AdminUserDetailResponse)
 def admin_get_user(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_admin_token),
 ):
     """用户详情。"""
@@ -108,6 +115,8 @@ def admin_get_user(
             username=user.username,
             nickname=user.nickname,
             avatar_url=user.avatar_url,
+            avatar_variants=user.avatar_variants,
+            disabled=bool(user.disabled),
             created_at=user.created_at.isoformat() if user.created_at else None,
         ),
     )
@@ -128,9 +137,13 @@ def admin_update_user(
         user.nickname = req.nickname.strip() or None
     if req.avatar_url is not None:
         user.avatar_url = req.avatar_url.strip() or None
+        avatar_images.apply(user)
     try:
         db.commit()
         db.refresh(user)
+        user_cache.put(user)
+        if req.avatar_url is not None:
+            avatar_images.schedule(user.avatar_url)
         return AdminCommonResponse(errCode=0, errMsg="success", data={"id": user.id})
     except Exception as e:
         db.rollback()
@@ -138,24 +151,75 @@ def admin_update_user(
 
 
 @router.delete("/users/{user_id}", response_model=AdminCommonResponse)
-def admin_delete_user(
+async def admin_delete_user(
     user_id: str,
-    db: Session = Depends(get_db),
     _: str = Depends(get_admin_token),
 ):
-    """删除用户（会删除其解题记录中的关联、收藏等；记录保留但 user_id 置空）。"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return AdminCommonResponse(errCode=404, errMsg="用户不存在", data={})
+    """
+    删除用户：账号立即停用（无法登录，已签发的 token 失效），其收藏的删除与解题记录、归档记录的解除关联
+    （记录保留但 user_id 置空）由后台分批完成，最后删除用户行；进度见 GET /admin/users/{user_id}/deletion。
+    数据库操作在线程池中执行，只有启动后台任务在事件循环中进行。
+    """
     try:
-        db.query(SolutionRecord).filter(SolutionRecord.user_id == user_id).update({SolutionRecord.user_id: None})
-        db.query(Favorite).filter(Favorite.user_id == user_id).delete(synchronize_session=False)
-        db.delete(user)
-        db.commit()
-        return AdminCommonResponse(errCode=0, errMsg="success", data={})
+        data = await run_in_threadpool(user_deletion.request_by_id, user_id)
     except Exception as e:
-        db.rollback()
         return AdminCommonResponse(errCode=500, errMsg=f"删除失败: {str(e)}", data={})
+    if data is None:
+        return AdminCommonResponse(errCode=404, errMsg="用户不存在", data={})
+    user_deletion.start(user_id)
+    return AdminCommonResponse(errCode=0, errMsg="success", data=data)
+
+
+@router.get("/users/{user_id}/deletion", response_model=AdminCommonResponse)
+def admin_get_user_deletion(
+    user_id: str,
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """用户删除进度：已处理的收藏/记录/归档记录数与剩余行数。"""
+    row = db.query(UserDeletion).filter(UserDeletion.user_id == user_id).first()
+    if not row:
+        return AdminCommonResponse(errCode=404, errMsg="删除任务不存在", data={})
+    data = row.to_dict()
+    data["remaining"] = user_deletion.remaining(db, user_id) if row.status != "done" else {"favorites": 0, "records": 0, "archived": 0}
+    return AdminCommonResponse(errCode=0, errMsg="success", data=data)
+
+
+@router.get("/user-deletions", response_model=AdminCommonResponse)
+def admin_list_user_deletions(
+    status: Optional[Literal["pending", "running", "done"]] = Query(None),
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    _: str = Depends(get_admin_token),
+):
+    """用户删除任务列表，按发起时间倒序。"""
+    query = db.query(UserDeletion)
+    if status:
+        query = query.filter(UserDeletion.status == status)
+    total = query.count()
+    rows = query.order_by(UserDeletion.created_at.desc()).offset((page - 1) * pageSize).limit(pageSize).all()
+    return AdminCommonResponse(errCode=0, errMsg="success", data={"list": [r.to_dict() for r in rows], "total": total})
+
+
+@router.get("/metrics", response_model=AdminCommonResponse)
+def admin_metrics(_: str = Depends(get_admin_token)):
+    """本进程的运行指标：token 验签缓存命中率与节省的认证耗时、密码哈希进程池占用、数据库连接池占用与等待等。"""
+    return AdminCommonResponse(
+        errCode=0,
+        errMsg="success",
+        data={
+            "token_cache": token_cache.stats(),
+            "password_hasher": password_hasher.stats(),
+            "user_cache": user_cache.stats(),
+            "login_throttle": throttle.stats(),
+            "uploads_fast_path": fast_path_stats(),
+            "analytics": analytics.stats(),
+            "user_deletion": user_deletion.stats(),
+            "db_pool": db_pool.stats(engine.pool),
+            "read_replicas": read_replicas.stats(),
+        },
+    )
 
 
 @router.get("/uniapi-config", response_model=AdminUniapiConfigResponse)
@@ -299,7 +363,7 @@ def admin_create_user(
     """管理员创建用户（用户名 + 密码，与注册接口字段一致）。"""
     if db.query(User).filter(User.username == req.username).first():
         return AdminCommonResponse(errCode=400, errMsg="用户名已被使用", data={})
-    user = User(username=req.username.strip(), password_hash=hash_password(req.password))
+    user = User(username=req.username.strip(), password_hash=password_hasher.hash_password(req.password))
     try:
         db.add(user)
         db.commit()
@@ -317,27 +381,23 @@ def admin_update_user_password(
     db: Session = Depends(get_db),
     _: str = Depends(get_admin_token),
 ):
-    """管理员重置用户密码。"""
+    """管理员重置用户密码：此前签发的该用户 token 全部失效。"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         return AdminCommonResponse(errCode=404, errMsg="用户不存在", data={})
-    user.password_hash = hash_password(req.password)
+    user.password_hash = password_hasher.hash_password(req.password)
+    # 截止时间取整到秒，与 token 的 iat 精度一致（同一秒内重新登录签发的 token 仍然有效）
+    changed_at = datetime.now().replace(microsecond=0)
+    user.password_changed_at = changed_at
     try:
         db.commit()
+        token_cache.revoke_user(user_id, before=changed_at.timestamp())
         return AdminCommonResponse(errCode=0, errMsg="success", data={"id": user.id})
     except Exception as e:
         db.rollback()
         return AdminCommonResponse(errCode=500, errMsg=f"重置密码失败: {str(e)}", data={})
 
 
-def _get_avatar_upload_dir() -> Path:
-    """头像保存目录（backend/uploads/avatars），与用户端保持一致。"""
-    base = Path(__file__).resolve().parent.parent
-    d = base / settings.UPLOAD_DIR / "avatars"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
-
 @router.post("/users/{user_id}/avatar", response_model=AdminCommonResponse)
 def admin_upload_user_avatar(
     user_id: str,
@@ -355,33 +415,16 @@ def admin_upload_user_avatar(
         return AdminCommonResponse(errCode=404, errMsg="用户不存在", data={})
     if not file.filename:
         return AdminCommonResponse(errCode=400, errMsg="请选择文件", data={})
-    ext = Path(file.filename).suffix.lower()
-    if ext not in settings.AVATAR_ALLOWED_EXTENSIONS:
-        return AdminCommonResponse(
-            errCode=400,
-            errMsg=f"仅支持图片格式：{', '.join(settings.AVATAR_ALLOWED_EXTENSIONS)}",
-            data={},
-        )
-    content = file.file.read()
-    if len(content) > settings.AVATAR_MAX_BYTES:
-        return AdminCommonResponse(
-            errCode=400,
-            errMsg=f"图片大小不能超过 {settings.AVATAR_MAX_BYTES // (1024*1024)}MB",
-            data={},
-        )
-    file.file.seek(0)
-    upload_dir = _get_avatar_upload_dir()
-    name = f"{user_id}_{uuid.uuid4().hex[:12]}{ext}"
-    path = upload_dir / name
     try:
-        with open(path, "wb") as f:
-            f.write(content)
-    except Exception as e:
-        return AdminCommonResponse(errCode=500, errMsg=f"保存失败: {e}", data={})
-    url_path = f"/api/{settings.UPLOAD_DIR}/avatars/{name}"
+        url_path = save_avatar(file.file)
+    except AvatarError as e:
+        return AdminCommonResponse(errCode=e.code, errMsg=e.message, data={})
     user.avatar_url = url_path
+    avatar_images.apply(user)
     try:
         db.commit()
+        user_cache.put(user)
+        avatar_images.schedule(url_path)
         return AdminCommonResponse(errCode=0, errMsg="success", data={"id": user.id, "url": url_path})
     except Exception as e:
         db.rollback()
@@ -390,7 +433,7 @@ def admin_upload_user_avatar(
 
 @router.get("/solve-models", response_model=AdminSolveModelListResponse)
 def admin_list_solve_models(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_admin_token),
 ):
     """解题模型列表（含禁用）。"""
@@ -428,6 +471,7 @@ def admin_create_solve_model(
         db.add(row)
         db.commit()
         db.refresh(row)
+        solve_model_cache.invalidate(db)
         return AdminSolveModelUpsertResponse(
             errCode=0,
             errMsg="success",
@@ -465,6 +509,7 @@ def admin_update_solve_model(
     try:
         db.commit()
         db.refresh(row)
+        solve_model_cache.invalidate(db)
         return AdminSolveModelUpsertResponse(
             errCode=0,
             errMsg="success",
@@ -495,6 +540,7 @@ def admin_delete_solve_model(
     try:
         db.delete(row)
         db.commit()
+        solve_model_cache.invalidate(db)
         return AdminCommonResponse(errCode=0, errMsg="success", data={})
     except Exception as e:
         db.rollback()
@@ -507,15 +553,15 @@ def admin_list_records(
     pageSize: int = Query(10, ge=1, le=100),
     keyword: Optional[str] = Query(None, description="按题目或用户名关键字搜索"),
     user_id: Optional[str] = Query(None, description="按用户ID过滤"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_admin_token),
 ):
     """解题记录列表（可按题目/用户名关键字与用户过滤）。"""
-    # 外连接 users 表，确保能返回 username/nickname（与收藏列表保持一致）
-    query = db.query(SolutionRecord).join(User, SolutionRecord.user_id == User.id, isouter=True)
+    # 用户名/昵称通过资料缓存批量解析；仅按关键字搜索用户名时才外连接 users 表
+    query = db.query(SolutionRecord)
     if keyword and keyword.strip():
         kw = f"%{keyword.strip()}%"
-        query = query.filter(
+        query = query.join(User, SolutionRecord.user_id == User.id, isouter=True).filter(
             or_(
                 SolutionRecord.question.like(kw),
                 User.username.like(kw),
@@ -526,16 +572,25 @@ def admin_list_records(
         query = query.filter(SolutionRecord.user_id == user_id.strip())
     total = query.count()
     offset = (page - 1) * pageSize
+    # 列表只投影展示所需的列（题目预览 + 用户名），不读取 solution 大字段
     rows = (
         query.order_by(SolutionRecord.created_at.desc())
         .offset(offset)
         .limit(pageSize)
-        .with_entities(SolutionRecord, User)
+        .with_entities(
+            SolutionRecord.id,
+            SolutionRecord.question_preview(),
+            SolutionRecord.answer,
+            SolutionRecord.created_at,
+            SolutionRecord.user_id,
+        )
         .all()
     )
+    profiles = user_cache.get_profiles(db, (r.user_id for r in rows))
 
     data: list[AdminRecordItem] = []
-    for r, u in rows:
+    for r in rows:
+        u = profiles.get(r.user_id) or {}
         data.append(
             AdminRecordItem(
                 id=r.id,
@@ -543,8 +598,8 @@ def admin_list_records(
                 answer=r.answer,
                 created_at=r.created_at.isoformat() if r.created_at else None,
                 user_id=r.user_id,
-                username=getattr(u, "username", None) if u else None,
-                nickname=getattr(u, "nickname", None) if u else None,
+                username=u.get("username"),
+                nickname=u.get("nickname"),
             )
         )
     return AdminRecordListResponse(data=data, total=total)
@@ -553,20 +608,40 @@ def admin_list_records(
 @router.get("/records/{record_id}", response_model=AdminRecordDetailResponse)
 def admin_get_record_detail(
     record_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_admin_token),
 ):
     """解题记录详情（管理员可查看所有记录）。"""
-    row = (
+    r = (
         db.query(SolutionRecord)
-        .join(User, SolutionRecord.user_id == User.id, isouter=True)
         .filter(SolutionRecord.id == record_id)
-        .with_entities(SolutionRecord, User)
+        .options(undefer(SolutionRecord.solution), undefer(SolutionRecord.solution_compressed))
         .first()
     )
-    if not row:
-        return AdminRecordDetailResponse(errCode=404, errMsg="记录不存在", data=None)
-    r, u = row
+    if not r:
+        # 热表未找到时按主键查冷表（已归档记录）
+        archived = archive.get_archived(db, record_id)
+        if not archived:
+            return AdminRecordDetailResponse(errCode=404, errMsg="记录不存在", data=None)
+        data = archive.unpack_archived(archived)
+        u = user_cache.get_profile(db, archived.user_id) if archived.user_id else None
+        return AdminRecordDetailResponse(
+            errCode=0,
+            errMsg="success",
+            data=AdminRecordDetailItem(
+                id=archived.id,
+                question=data.get("question") or "",
+                answer=data.get("answer"),
+                solution=data.get("solution"),
+                knowledge_points=list(data.get("knowledge_points") or []),
+                semantic_contexts=list(data.get("semantic_contexts") or []),
+                created_at=data["created_at"],
+                user_id=archived.user_id,
+                username=u["username"] if u else None,
+                nickname=u["nickname"] if u else None,
+            ),
+        )
+    u = user_cache.get_profile(db, r.user_id) if r.user_id else None
     return AdminRecordDetailResponse(
         errCode=0,
         errMsg="success",
@@ -574,13 +649,13 @@ def admin_get_record_detail(
             id=r.id,
             question=r.question,
             answer=r.answer,
-            solution=getattr(r, "solution", None),
+            solution=r.get_solution(),
             knowledge_points=list(getattr(r, "knowledge_points", None) or []),
             semantic_contexts=list(getattr(r, "semantic_contexts", None) or []),
             created_at=r.created_at.isoformat() if r.created_at else None,
             user_id=r.user_id,
-            username=getattr(u, "username", None) if u else None,
-            nickname=getattr(u, "nickname", None) if u else None,
+            username=u["username"] if u else None,
+            nickname=u["nickname"] if u else None,
         ),
     )
 
@@ -592,7 +667,7 @@ def admin_delete_record(
     _: str = Depends(get_admin_token),
 ):
     """删除解题记录（级联删除收藏通过外键约束处理）。"""
-    row = db.query(SolutionRecord).filter(SolutionRecord.id == record_id).first()
+    row = db.query(SolutionRecord).filter(SolutionRecord.id == record_id).first() or archive.get_archived(db, record_id)
     if not row:
         return AdminCommonResponse(errCode=404, errMsg="记录不存在", data={})
     try:
@@ -604,22 +679,244 @@ def admin_delete_record(
         return AdminCommonResponse(errCode=500, errMsg=f"删除失败: {str(e)}", data={})
 
 
+@router.get("/storage/tiers", response_model=AdminCommonResponse)
+def admin_storage_tiers(
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """解题记录冷热分层统计：各层行数、最早/最晚记录时间，MySQL 与 SQLite（dbstat 可用时）下附带数据与索引字节数。"""
+    try:
+        return AdminCommonResponse(errCode=0, errMsg="success", data=archive.tier_stats(db))
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"查询失败: {str(e)}", data={})
+
+
+@router.post("/storage/avatars/gc", response_model=AdminCommonResponse)
+def admin_gc_avatars(
+    graceSeconds: Optional[float] = Query(None, ge=0, description="宽限期秒数，默认 AVATAR_GC_GRACE_SECONDS"),
+    dryRun: bool = Query(False, description="只统计不删除"),
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """清理未被任何用户引用且超过宽限期的头像文件，返回删除的文件数与回收字节数。"""
+    try:
+        return AdminCommonResponse(errCode=0, errMsg="success", data=gc_orphans(db, graceSeconds, dryRun))
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"清理失败: {str(e)}", data={})
+
+
+def _run_archive(older_than_days: Optional[int], max_batches: Optional[int]) -> None:
+    db = SessionLocal()
+    try:
+        result = archive.archive_old_records(db, older_than_days=older_than_days, max_batches=max_batches)
+        print(f"[archive] 归档完成: {result}")
+    except Exception as e:
+        db.rollback()
+        print(f"[archive] 归档失败: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/storage/archive", response_model=AdminCommonResponse)
+def admin_archive_records(
+    background_tasks: BackgroundTasks,
+    olderThanDays: Optional[int] = Query(None, ge=0, description="归档早于多少天的记录，默认 ARCHIVE_AFTER_DAYS"),
+    maxBatches: Optional[int] = Query(None, ge=1, description="最多处理的批数，默认不限"),
+    _: str = Depends(get_admin_token),
+):
+    """在后台分批归档旧解题记录（每批一个短事务），立即返回；进度见服务日志与 /admin/storage/tiers。"""
+    background_tasks.add_task(_run_archive, olderThanDays, maxBatches)
+    return AdminCommonResponse(errCode=0, errMsg="success", data={"scheduled": True})
+
+
+def _run_snapshot(job: dict) -> None:
+    try:
+        manifest = snapshot.run(job)
+        print(f"[snapshot] 快照 {manifest['id']} 完成: " + ", ".join(f"{t}={v['rows']}" for t, v in manifest["tables"].items()))
+    except Exception as e:
+        print(f"[snapshot] 快照 {job['id']} 失败: {e}")
+
+
+@router.post("/snapshots", response_model=AdminCommonResponse)
+def admin_create_snapshot(
+    background_tasks: BackgroundTasks,
+    format: Optional[Literal["parquet", "arrow", "ndjson"]] = Query(None, description="文件格式，默认 SNAPSHOT_FORMAT"),
+    incremental: bool = Query(False, description="只导出上一个快照之后新增的记录"),
+    _: str = Depends(get_admin_token),
+):
+    """
+    在后台把解题记录（含归档）、展平的标签、收藏与用户导出为按日期分区的列式文件（见 services/snapshot.py），
+    立即返回快照 ID；完成后出现在 GET /admin/snapshots 中。
+    """
+    try:
+        job = snapshot.reserve(format, incremental)
+    except snapshot.SnapshotError as e:
+        return AdminCommonResponse(errCode=e.code, errMsg=e.message, data={})
+    background_tasks.add_task(_run_snapshot, job)
+    return AdminCommonResponse(errCode=0, errMsg="success", data=job)
+
+
+@router.get("/snapshots", response_model=AdminCommonResponse)
+def admin_list_snapshots(_: str = Depends(get_admin_token)):
+    """已完成的快照（各表行数与占用空间，不含文件列表）以及本进程正在运行的快照。"""
+    items = []
+    for manifest in snapshot.list_snapshots():
+        item = {k: v for k, v in manifest.items() if k not in ("tables", "schema")}
+        item["tables"] = {t: {"rows": v["rows"], "bytes": v["bytes"]} for t, v in manifest["tables"].items()}
+        items.append(item)
+    return AdminCommonResponse(
+        errCode=0,
+        errMsg="success",
+        data={
+            "list": items,
+            "running": snapshot.running(),
+            "directory": str(snapshot.snapshot_dir()),
+            "formats": snapshot.available_formats(),
+        },
+    )
+
+
+@router.get("/snapshots/{snapshot_id}", response_model=AdminCommonResponse)
+def admin_get_snapshot(snapshot_id: str, _: str = Depends(get_admin_token)):
+    """快照的 manifest：时间窗口、列定义、各表文件列表。"""
+    manifest = snapshot.get_snapshot(snapshot_id)
+    if manifest is None:
+        return AdminCommonResponse(errCode=404, errMsg="快照不存在", data={})
+    return AdminCommonResponse(errCode=0, errMsg="success", data=manifest)
+
+
+@router.delete("/snapshots/{snapshot_id}", response_model=AdminCommonResponse)
+def admin_delete_snapshot(snapshot_id: str, _: str = Depends(get_admin_token)):
+    """删除快照目录。删除最新快照后，下一次增量以更早的快照为基准。"""
+    if not snapshot.delete_snapshot(snapshot_id):
+        return AdminCommonResponse(errCode=404, errMsg="快照不存在", data={})
+    return AdminCommonResponse(errCode=0, errMsg="success", data={})
+
+
+AnalyticsMetric = Literal["solve", "solve_error", "record", "knowledge", "semantic", "active_user"]
+
+
+def _analytics_range(start: Optional[date], end: Optional[date], days: int) -> tuple[datetime, datetime]:
+    """日期参数 -> [起始零点, 结束日期次日零点)；未传 start 时取 end 往前 days 天。"""
+    end = end or date.today()
+    start = start or end - timedelta(days=days - 1)
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+
+@router.get("/analytics/summary", response_model=AdminCommonResponse)
+def admin_analytics_summary(
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """今日解题数、失败数、平均耗时、保存记录数，以及今日/近 7 天/近 30 天活跃用户数。"""
+    try:
+        analytics.flush()
+        return AdminCommonResponse(errCode=0, errMsg="success", data=analytics.summary(db))
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"查询失败: {str(e)}", data={})
+
+
+@router.get("/analytics/timeseries", response_model=AdminCommonResponse)
+def admin_analytics_timeseries(
+    metric: AnalyticsMetric = Query("solve", description="指标"),
+    granularity: Literal["hour", "day"] = Query("day", description="粒度：hour / day"),
+    start: Optional[date] = Query(None, description="起始日期（含），如 2026-01-01"),
+    end: Optional[date] = Query(None, description="结束日期（含），默认今天"),
+    days: int = Query(30, ge=1, description="未传 start 时向前取的天数"),
+    dim: Optional[str] = Query(None, description="只看某个维度，如模型 ID 或知识点名称"),
+    byDim: bool = Query(False, description="按维度分别返回序列，如每个模型每天的解题数"),
+    limit: int = Query(10, ge=1, le=50, description="byDim 时最多返回的维度数"),
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """按小时/天的时间序列，只读取汇总表；缺失的时间桶补 0。"""
+    if granularity == "hour" and metric not in analytics.HOURLY_METRICS:
+        return AdminCommonResponse(errCode=400, errMsg=f"{metric} 只按天汇总", data={})
+    range_start, range_end = _analytics_range(start, end, days)
+    points = (range_end - range_start) / (timedelta(hours=1) if granularity == "hour" else timedelta(days=1))
+    if range_end <= range_start or points > settings.ANALYTICS_MAX_POINTS:
+        return AdminCommonResponse(
+            errCode=400, errMsg=f"时间范围无效或超过 {settings.ANALYTICS_MAX_POINTS} 个时间点", data={}
+        )
+    try:
+        analytics.flush()
+        data = analytics.timeseries(db, metric, granularity, range_start, range_end, dim, byDim, limit)
+        return AdminCommonResponse(errCode=0, errMsg="success", data=data)
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"查询失败: {str(e)}", data={})
+
+
+@router.get("/analytics/top", response_model=AdminCommonResponse)
+def admin_analytics_top(
+    metric: AnalyticsMetric = Query("knowledge", description="指标，如 knowledge（热门知识点）、solve（按模型）、active_user（最活跃用户）"),
+    start: Optional[date] = Query(None, description="起始日期（含）"),
+    end: Optional[date] = Query(None, description="结束日期（含），默认今天"),
+    days: int = Query(7, ge=1, le=3660, description="未传 start 时向前取的天数"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """区间内按次数排序的前 N 个维度；active_user 附带用户名与昵称。"""
+    range_start, range_end = _analytics_range(start, end, days)
+    try:
+        analytics.flush()
+        items = analytics.top(db, metric, range_start, range_end, limit)
+        if metric == "active_user":
+            profiles = user_cache.get_profiles(db, [item["name"] for item in items])
+            for item in items:
+                profile = profiles.get(item["name"]) or {}
+                item["username"] = profile.get("username")
+                item["nickname"] = profile.get("nickname")
+        return AdminCommonResponse(
+            errCode=0,
+            errMsg="success",
+            data={"metric": metric, "start": range_start.isoformat(), "end": range_end.isoformat(), "items": items},
+        )
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"查询失败: {str(e)}", data={})
+
+
+def _run_analytics_catch_up(start: Optional[date], end: Optional[date]) -> None:
+    db = SessionLocal()
+    try:
+        result = analytics.catch_up(db, start, end)
+        print(f"[analytics] 补算完成: {result}")
+    except Exception as e:
+        db.rollback()
+        print(f"[analytics] 补算失败: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/analytics/catchup", response_model=AdminCommonResponse)
+def admin_analytics_catch_up(
+    background_tasks: BackgroundTasks,
+    start: Optional[date] = Query(None, description="起始日期（含），默认最早一条记录的日期"),
+    end: Optional[date] = Query(None, description="结束日期（不含），默认且最晚为今天"),
+    _: str = Depends(get_admin_token),
+):
+    """在后台按天从记录表重算记录类汇总（每天一个事务），立即返回；进度见服务日志。"""
+    background_tasks.add_task(_run_analytics_catch_up, start, end)
+    return AdminCommonResponse(
+        errCode=0, errMsg="success", data={"scheduled": True, "until": analytics.catch_up_until().isoformat()}
+    )
+
+
 @router.get("/favorites", response_model=AdminFavoriteListResponse)
 def admin_list_favorites(
     page: int = Query(1, ge=1),
     pageSize: int = Query(10, ge=1, le=100),
     keyword: Optional[str] = Query(None, description="按题目关键字或用户名搜索"),
     user_id: Optional[str] = Query(None, description="按用户ID过滤"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_admin_token),
 ):
     """收藏记录列表（包含所属题目与用户信息简要）。"""
-    query = db.query(Favorite).join(SolutionRecord, Favorite.record_id == SolutionRecord.id, isouter=True).join(
-        User, Favorite.user_id == User.id, isouter=True
-    )
+    # 用户名/昵称通过资料缓存批量解析；仅按关键字搜索用户名时才外连接 users 表
+    query = db.query(Favorite).join(SolutionRecord, Favorite.record_id == SolutionRecord.id, isouter=True)
     if keyword and keyword.strip():
         kw = f"%{keyword.strip()}%"
-        query = query.filter(
+        query = query.join(User, Favorite.user_id == User.id, isouter=True).filter(
             or_(
                 SolutionRecord.question.like(kw),
                 User.username.like(kw),
@@ -634,21 +931,29 @@ def admin_list_favorites(
         query.order_by(Favorite.created_at.desc())
         .offset(offset)
         .limit(pageSize)
-        .with_entities(Favorite, SolutionRecord, User)
+        .with_entities(
+            Favorite.id,
+            Favorite.record_id,
+            Favorite.created_at,
+            Favorite.user_id,
+            SolutionRecord.question_preview(),
+        )
         .all()
     )
+    profiles = user_cache.get_profiles(db, (row.user_id for row in rows))
 
     data: list[AdminFavoriteItem] = []
-    for fav, rec, user in rows:
+    for row in rows:
+        u = profiles.get(row.user_id) or {}
         data.append(
             AdminFavoriteItem(
-                id=fav.id,
-                record_id=fav.record_id,
-                question=getattr(rec, "question", "") if rec else "",
-                created_at=fav.created_at.isoformat() if fav.created_at else None,
-                user_id=fav.user_id,
-                username=getattr(user, "username", None) if user else None,
-                nickname=getattr(user, "nickname", None) if user else None,
+                id=row.id,
+                record_id=row.record_id,
+                question=row.question or "",
+                created_at=row.created_at.isoformat() if row.created_at else None,
+                user_id=row.user_id,
+                username=u.get("username"),
+                nickname=u.get("nickname"),
             )
         )
     return AdminFavoriteListResponse(data=data, total=total)
@@ -676,6 +981,170 @@ def admin_delete_favorite(
 # ---------- 模型 API 连接测试（管理员专用） ----------
 
 
+@router.get("/models/health", response_model=AdminCommonResponse)
+def admin_models_health(
+    db: Session = Depends(get_read_db),
+    _: str = Depends(get_admin_token),
+):
+    """后台定期探测的各模型健康状况：近 1 小时 / 近 1 天的可用率与 p50/p95 延迟、最近一次结果，以及本进程最近一次手动测试结果。"""
+    return AdminCommonResponse(errCode=0, errMsg="success", data=model_prober.health(db))
+
+
+@router.get("/models/health/history", response_model=AdminCommonResponse)
+def admin_models_health_history(
+    kind: Literal["solve", "knowledge", "semantic"] = Query(..., description="模型类型"),
+    model: str = Query(..., description="模型 ID"),
+    limit: int = Query(300, ge=1, le=2000),
+    db: Session = Depends(get_read_db),
+    _: str = Depends(get_admin_token),
+):
+    """单个模型最近的定期探测明细（时间、耗时、成功与否、错误信息），按时间升序。"""
+    return AdminCommonResponse(
+        errCode=0,
+        errMsg="success",
+        data={"kind": kind, "model": model, "items": model_prober.history(db, kind, model, limit)},
+    )
+
+
+@router.get("/benchmarks/questions", response_model=AdminCommonResponse)
+def admin_benchmark_default_questions(_: str = Depends(get_admin_token)):
+    """内置的基准测试题目集（创建任务时未传 questions 则使用）。"""
+    return AdminCommonResponse(errCode=0, errMsg="success", data={"questions": benchmark.DEFAULT_QUESTIONS})
+
+
+@router.post("/benchmarks", response_model=AdminCommonResponse)
+async def admin_create_benchmark(
+    body: AdminBenchmarkCreateRequest,
+    _: str = Depends(get_admin_token),
+):
+    """
+    创建并在后台运行模型基准测试：每个模型依次回答题目集中的每道题（repeat 次），总并发不超过 concurrency；
+    返回任务 ID，进度与报告通过 GET /admin/benchmarks/{id} 查看。
+    """
+    models = list(dict.fromkeys(m.strip() for m in body.models if m and m.strip()))
+    questions = [q.strip() for q in (body.questions or benchmark.DEFAULT_QUESTIONS) if q and q.strip()]
+    if not models or not questions:
+        return AdminCommonResponse(errCode=400, errMsg="模型与题目不能为空", data={})
+    if body.concurrency > settings.BENCHMARK_MAX_CONCURRENCY:
+        return AdminCommonResponse(errCode=400, errMsg=f"并发数最多 {settings.BENCHMARK_MAX_CONCURRENCY}", data={})
+    total = len(models) * len(questions) * body.repeat
+    if total > settings.BENCHMARK_MAX_REQUESTS:
+        return AdminCommonResponse(errCode=400, errMsg=f"单个任务最多 {settings.BENCHMARK_MAX_REQUESTS} 次请求（当前 {total}）", data={})
+    if benchmark.running_count() >= settings.BENCHMARK_MAX_RUNNING:
+        return AdminCommonResponse(errCode=429, errMsg="已有基准测试在运行，请稍后再试", data={})
+    row = ModelBenchmark(
+        name=(body.name or "").strip() or None,
+        models=models,
+        questions=questions,
+        concurrency=body.concurrency,
+        repeat=body.repeat,
+        total=total,
+    )
+    try:
+        row = await run_in_threadpool(benchmark.create, row)
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"创建失败: {str(e)}", data={})
+    benchmark.start(row)
+    return AdminCommonResponse(errCode=0, errMsg="success", data={"id": row.id, "total": total})
+
+
+@router.get("/benchmarks", response_model=AdminCommonResponse)
+def admin_list_benchmarks(
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """基准测试任务列表（不含逐题结果），按创建时间倒序。"""
+    try:
+        benchmark.expire_stale(db)
+        query = db.query(ModelBenchmark)
+        total = query.count()
+        rows = (
+            query.order_by(ModelBenchmark.created_at.desc())
+            .offset((page - 1) * pageSize)
+            .limit(pageSize)
+            .all()
+        )
+        items = []
+        for row in rows:
+            item = row.to_dict(with_report=False)
+            item["summary"] = (row.report or {}).get("models")
+            items.append(item)
+        return AdminCommonResponse(errCode=0, errMsg="success", data={"list": items, "total": total})
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"查询失败: {str(e)}", data={})
+
+
+@router.get("/benchmarks/compare", response_model=AdminCommonResponse)
+def admin_compare_benchmarks(
+    ids: str = Query(..., description="逗号分隔的任务 ID"),
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """多个任务的各模型汇总指标并排（每行一个 任务 × 模型），用于横向对比。"""
+    id_list = [i.strip() for i in ids.split(",") if i.strip()]
+    rows = db.query(ModelBenchmark).filter(ModelBenchmark.id.in_(id_list)).all()
+    order = {i: n for n, i in enumerate(id_list)}
+    rows.sort(key=lambda r: order[r.id])
+    return AdminCommonResponse(errCode=0, errMsg="success", data={"rows": benchmark.compare(rows)})
+
+
+@router.get("/benchmarks/{benchmark_id}", response_model=AdminCommonResponse)
+def admin_get_benchmark(
+    benchmark_id: str,
+    db: Session = Depends(get_db),
+    _: str = Depends(get_admin_token),
+):
+    """基准测试任务详情：状态、进度，完成后含各模型汇总与逐题结果。"""
+    benchmark.expire_stale(db)
+    row = db.query(ModelBenchmark).filter(ModelBenchmark.id == benchmark_id).first()
+    if not row:
+        return AdminCommonResponse(errCode=404, errMsg="任务不存在", data={})
+    return AdminCommonResponse(errCode=0, errMsg="success", data=row.to_dict())
+
+
+@router.post("/benchmarks/{benchmark_id}/cancel", response_model=AdminCommonResponse)
+async def admin_cancel_benchmark(
+    benchmark_id: str,
+    _: str = Depends(get_admin_token),
+):
+    """取消运行中的任务（任务在其他 worker 上时，由该 worker 在下次写回进度时停止）。"""
+    status = await run_in_threadpool(benchmark.get_status, benchmark_id)
+    if status is None:
+        return AdminCommonResponse(errCode=404, errMsg="任务不存在", data={})
+    if status not in benchmark.ACTIVE_STATUSES:
+        return AdminCommonResponse(errCode=400, errMsg="任务已结束", data={})
+    if not benchmark.cancel(benchmark_id):
+        await run_in_threadpool(benchmark.request_cancel, benchmark_id)
+    return AdminCommonResponse(errCode=0, errMsg="success", data={})
+
+
+@router.delete("/benchmarks/{benchmark_id}", response_model=AdminCommonResponse)
+async def admin_delete_benchmark(
+    benchmark_id: str,
+    _: str = Depends(get_admin_token),
+):
+    """删除任务及其报告；运行中的任务同时停止。"""
+    benchmark.cancel(benchmark_id)
+    try:
+        n = await run_in_threadpool(benchmark.delete, benchmark_id)
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"删除失败: {str(e)}", data={})
+    if not n:
+        return AdminCommonResponse(errCode=404, errMsg="任务不存在", data={})
+    return AdminCommonResponse(errCode=0, errMsg="success", data={})
+
+
+@router.post("/models/probe", response_model=AdminCommonResponse)
+async def admin_models_probe(_: str = Depends(get_admin_token)):
+    """立即并发探测全部模型一轮（结果作为手动测试记入本进程），返回本轮各模型结果。"""
+    try:
+        return AdminCommonResponse(errCode=0, errMsg="success", data={"results": await model_prober.probe_all()})
+    except Exception as e:
+        return AdminCommonResponse(errCode=500, errMsg=f"探测失败: {str(e)}", data={})
+
+
 def _minimal_solve_model_id(db: Session) -> str:
     """返回当前使用的解题模型 ID（用于连接测试）。"""
     row = db.query(SolveModel).filter(SolveModel.enabled == True).order_by(SolveModel.sort_order, SolveModel.id).first()
@@ -704,10 +1173,13 @@ async def admin_test_solve(
         async with httpx.AsyncClient(timeout=30.0) as client:
             await solve_router._call_uniapi(client, use_model_id, messages, base_url, token)
         duration_ms = int((time.perf_counter() - start) * 1000)
+        model_prober.record("solve", use_model_id, duration_ms, True)
         return AdminCommonResponse(errCode=0, errMsg="success", data={"success": True, "durationMs": duration_ms, "model": use_model_id})
     except httpx.TimeoutException:
+        model_prober.record("solve", use_model_id, None, False, "请求超时")
         return AdminCommonResponse(errCode=500, errMsg="请求超时", data={"success": False})
     except Exception as e:
+        model_prober.record("solve", use_model_id, None, False, str(e)[:200])
         return AdminCommonResponse(errCode=500, errMsg=str(e), data={"success": False})
 
 
@@ -730,10 +1202,13 @@ async def admin_test_knowledge(
         async with httpx.AsyncClient(timeout=30.0) as client:
             await solve_router._call_uniapi(client, model_k, messages, base_url, token)
         duration_ms = int((time.perf_counter() - start) * 1000)
+        model_prober.record("knowledge", model_k, duration_ms, True)
         return AdminCommonResponse(errCode=0, errMsg="success", data={"success": True, "durationMs": duration_ms, "model": model_k})
     except httpx.TimeoutException:
+        model_prober.record("knowledge", model_k, None, False, "请求超时")
         return AdminCommonResponse(errCode=500, errMsg="请求超时", data={"success": False})
     except Exception as e:
+        model_prober.record("knowledge", model_k, None, False, str(e)[:200])
         return AdminCommonResponse(errCode=500, errMsg=str(e), data={"success": False})
 
 
@@ -756,8 +1231,11 @@ async def admin_test_semantic(
         async with httpx.AsyncClient(timeout=30.0) as client:
             await solve_router._call_uniapi(client, model_s, messages, base_url, token)
         duration_ms = int((time.perf_counter() - start) * 1000)
+        model_prober.record("semantic", model_s, duration_ms, True)
         return AdminCommonResponse(errCode=0, errMsg="success", data={"success": True, "durationMs": duration_ms, "model": model_s})
     except httpx.TimeoutException:
+        model_prober.record("semantic", model_s, None, False, "请求超时")
         return AdminCommonResponse(errCode=500, errMsg="请求超时", data={"success": False})
     except Exception as e:
+        model_prober.record("semantic", model_s, None, False, str(e)[:200])
         return AdminCommonResponse(errCode=500, errMsg=str(e), data={"success": False})
@@ -1,18 +1,20 @@
-import hashlib
 import os
-import uuid
-from pathlib import Path
+import time
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 import jwt
-import bcrypt
 
 from database import get_db
 from models.user import User
 from schemas.auth import RegisterRequest, LoginRequest, UserInfo, ProfileUpdateRequest
 from config import settings
+from services import avatar_images, throttle, token_cache, user_cache, user_deletion
+from services.password_hasher import hash_password_async, verify_password_async
+from services.avatar_storage import AvatarError, save_avatar
+from services.static_files import upload_file_response
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 http_bearer = HTTPBearer(auto_error=False)
@@ -21,18 +23,24 @@ http_bearer = HTTPBearer(auto_error=False)
 def get_current_user_optional(
     credentials: HTTPAuthorizationCredentials | None = Depends(http_bearer),
 ) -> str | None:
-    """从 JWT 解析当前用户 ID，未携带或无效时返回 None。"""
+    """
+    从 JWT 解析当前用户 ID，未携带、无效、已撤销（签发早于密码重置）或用户已停用（删除中）时返回 None。
+    验签结果按 token 缓存（见 services/token_cache.py）。
+    """
     if not credentials:
         return None
-    try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-        )
-        return payload.get("sub")
-    except Exception:
+    user_id = token_cache.verify(credentials.credentials, _decode_token)
+    if user_id and user_deletion.is_disabled(user_id):
         return None
+    return user_id
+
+
+def _decode_token(token: str) -> dict:
+    return jwt.decode(
+        token,
+        settings.JWT_SECRET,
+        algorithms=[settings.JWT_ALGORITHM],
+    )
 
 
 def get_current_user(user_id: str | None = Depends(get_current_user_optional)) -> str:
@@ -42,27 +50,10 @@ def get_current_user(user_id: str | None = Depends(get_current_user_optional)) -
     return user_id
 
 
-def _to_bcrypt_input(password: str) -> bytes:
-    """保证传入 bcrypt 的字节长度不超过 72，避免 ValueError。"""
-    raw = password.encode("utf-8")
-    if len(raw) > 72:
-        return hashlib.sha256(raw).hexdigest().encode("ascii")  # 64 字节
-    return raw
-
-
-def hash_password(password: str) -> str:
-    data = _to_bcrypt_input(password)
-    return bcrypt.hashpw(data, bcrypt.gensalt()).decode("ascii")
-
-
-def verify_password(plain: str, hashed: str) -> bool:
-    data = _to_bcrypt_input(plain)
-    return bcrypt.checkpw(data, hashed.encode("ascii"))
-
-
 def create_access_token(user_id: str, username: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-    payload = {"sub": user_id, "username": username, "exp": expire}
+    # iat 用于重置密码后拒绝此前签发的 token（见 services/token_cache.py）
+    payload = {"sub": user_id, "username": username, "exp": expire, "iat": int(time.time())}
     return jwt.encode(
         payload,
         settings.JWT_SECRET,
@@ -70,22 +61,40 @@ def create_access_token(user_id: str, username: str) -> str:
     )
 
 
+def _get_user_by_username(db: Session, username: str) -> User | None:
+    """查询用户后立即关闭会话、归还连接，避免等待 bcrypt 期间占用连接池。"""
+    try:
+        return db.query(User).filter(User.username == username).first()
+    finally:
+        db.close()
+
+
+def _add_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+# 登录/注册为异步接口：数据库操作放到线程池，bcrypt 在独立进程池中计算（见 services/password_hasher.py），
+# 登录高峰时不会占满线程池而拖慢其他接口；进入 bcrypt 前先经过限流与并发上限（见 services/throttle.py）
 @router.post("/register")
-def register(req: RegisterRequest, db: Session = Depends(get_db)):
+async def register(req: RegisterRequest, request: Request, db: Session = Depends(get_db)):
     """用户注册"""
-    if db.query(User).filter(User.username == req.username).first():
+    throttle.check_login(request, req.username)
+    if await run_in_threadpool(_get_user_by_username, db, req.username):
         return {
             "errCode": 400,
             "errMsg": "用户名已被使用",
             "data": {},
         }
+    async with throttle.password_slot():
+        password_hash = await hash_password_async(req.password)
     user = User(
         username=req.username,
-        password_hash=hash_password(req.password),
+        password_hash=password_hash,
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    user = await run_in_threadpool(_add_user, db, user)
     token = create_access_token(user.id, user.username)
     return {
         "errCode": 0,
@@ -93,21 +102,37 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
         "data": {
             "access_token": token,
             "token_type": "bearer",
-            "user": {"id": user.id, "username": user.username, "nickname": user.nickname, "avatar_url": user.avatar_url},
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "nickname": user.nickname,
+                "avatar_url": user.avatar_url,
+                "avatar_variants": user.avatar_variants,
+            },
         },
     }
 
 
 @router.post("/login")
-def login(req: LoginRequest, db: Session = Depends(get_db)):
+async def login(req: LoginRequest, request: Request, db: Session = Depends(get_db)):
     """用户登录"""
-    user = db.query(User).filter(User.username == req.username).first()
-    if not user or not verify_password(req.password, user.password_hash):
+    throttle.check_login(request, req.username)
+    user = await run_in_threadpool(_get_user_by_username, db, req.username)
+    if user:
+        async with throttle.password_slot():
+            verified = await verify_password_async(req.password, user.password_hash)
+    if not user or not verified:
         return {
             "errCode": 401,
             "errMsg": "用户名或密码错误",
             "data": {},
         }
+    if user.disabled:
+        return {
+            "errCode": 403,
+            "errMsg": "账号已停用",
+            "data": {},
+        }
     token = create_access_token(user.id, user.username)
     return {
         "errCode": 0,
@@ -115,19 +140,17 @@ def login(req: LoginRequest, db: Session = Depends(get_db)):
         "data": {
             "access_token": token,
             "token_type": "bearer",
-            "user": {"id": user.id, "username": user.username, "nickname": user.nickname, "avatar_url": user.avatar_url},
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "nickname": user.nickname,
+                "avatar_url": user.avatar_url,
+                "avatar_variants": user.avatar_variants,
+            },
         },
     }
 
 
-def _get_avatar_upload_dir() -> Path:
-    """头像保存目录（backend/uploads/avatars）"""
-    base = Path(__file__).resolve().parent.parent
-    d = base / settings.UPLOAD_DIR / "avatars"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
-
 @router.post("/avatar/upload")
 def upload_avatar(
     file: UploadFile = File(...),
@@ -138,47 +161,48 @@ def upload_avatar(
     """
     if not file.filename:
         return {"errCode": 400, "errMsg": "请选择文件", "data": {}}
-    ext = Path(file.filename).suffix.lower()
-    if ext not in settings.AVATAR_ALLOWED_EXTENSIONS:
-        return {
-            "errCode": 400,
-            "errMsg": f"仅支持图片格式：{', '.join(settings.AVATAR_ALLOWED_EXTENSIONS)}",
-            "data": {},
-        }
-    content = file.file.read()
-    if len(content) > settings.AVATAR_MAX_BYTES:
-        return {
-            "errCode": 400,
-            "errMsg": f"图片大小不能超过 {settings.AVATAR_MAX_BYTES // (1024*1024)}MB",
-            "data": {},
-        }
-    file.file.seek(0)
-    upload_dir = _get_avatar_upload_dir()
-    name = f"{current_user_id}_{uuid.uuid4().hex[:12]}{ext}"
-    path = upload_dir / name
     try:
-        with open(path, "wb") as f:
-            f.write(content)
-    except Exception as e:
-        return {"errCode": 500, "errMsg": f"保存失败: {e}", "data": {}}
-    # 返回相对路径，前端用 BASE_URL + url 得到完整 URL
-    url_path = f"/api/{settings.UPLOAD_DIR}/avatars/{name}"
+        url_path = save_avatar(file.file)
+    except AvatarError as e:
+        return {"errCode": e.code, "errMsg": e.message, "data": {}}
+    # 上传后立即在后台生成缩略图，通常在前端提交资料（PATCH /profile）前即已完成
+    avatar_images.schedule(url_path)
     return {"errCode": 0, "errMsg": "success", "data": {"url": url_path}}
 
 
+@router.get("/avatar/{name}")
+def get_avatar(
+    name: str,
+    request: Request,
+    size: int = Query(0, ge=0, le=4096, description="期望的显示尺寸（像素），0 表示原图"),
+):
+    """
+    按尺寸获取头像：返回不小于 size 的最小 WebP 缩略图，缩略图未生成时回退原图。
+    选中的文件可能随缩略图生成而变化，因此只短期缓存（ETag 随文件变化）。
+    """
+    if "/" in name or "\\" in name or name.startswith("."):
+        raise HTTPException(status_code=404, detail="头像不存在")
+    path = avatar_images.resolve_variant(name, size)
+    if path is None:
+        raise HTTPException(status_code=404, detail="头像不存在")
+    return upload_file_response(
+        str(path), path.stat(), request.headers, request.method, cache_control="public, max-age=3600"
+    )
+
+
 @router.get("/profile")
 def get_profile(
     db: Session = Depends(get_db),
     current_user_id: str = Depends(get_current_user),
 ):
-    """获取当前用户资料（需登录）"""
-    user = db.query(User).filter(User.id == current_user_id).first()
-    if not user:
+    """获取当前用户资料（需登录），优先读取进程内资料缓存"""
+    profile = user_cache.get_profile(db, current_user_id)
+    if not profile:
         return {"errCode": 401, "errMsg": "用户不存在", "data": {}}
     return {
         "errCode": 0,
         "errMsg": "success",
-        "data": {"id": user.id, "username": user.username, "nickname": user.nickname, "avatar_url": user.avatar_url},
+        "data": profile,
     }
 
 
@@ -196,10 +220,13 @@ def update_profile(
         user.nickname = req.nickname.strip() or None
     if req.avatar_url is not None:
         user.avatar_url = req.avatar_url.strip() or None
+        avatar_images.apply(user)
     db.commit()
     db.refresh(user)
+    if req.avatar_url is not None:
+        avatar_images.schedule(user.avatar_url)
     return {
         "errCode": 0,
         "errMsg": "success",
-        "data": {"id": user.id, "username": user.username, "nickname": user.nickname, "avatar_url": user.avatar_url},
+        "data": user_cache.put(user),
     }
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import Optional
+from sqlalchemy import or_, and_, insert
+from typing import Literal, Optional
+import uuid
+from datetime import date, datetime
 
-from database import get_db
+from database import get_db, get_read_db
 from models.favorite import Favorite
-from models.record import SolutionRecord
+from models.record import SolutionRecord, build_tags, resolve_tags
 from routers.auth import get_current_user, get_current_user_optional
 from schemas.favorite import (
     FavoriteCreate,
@@ -13,10 +16,16 @@ from schemas.favorite import (
     FavoriteRemoveResponse,
     FavoriteListResponse,
     FavoriteCheckResponse,
-    FavoriteResponse
+    FavoriteResponse,
+    FavoriteBatchRequest,
+    FavoriteBatchCheckResponse,
 )
-from schemas.record import KnowledgePoint
+from schemas.record import BatchItemResult, BatchApiResponse
 from config import settings
+from services.etag import etag_json_response
+from services.solution_codec import unpack_solution
+from services.export import EXPORT_MEDIA_TYPES, apply_export_filters, decode_cursor, encode_cursor, stream_export
+from services.archive import restore_records
 
 router = APIRouter(prefix="/favorites", tags=["收藏"])
 
@@ -33,7 +42,8 @@ def add_favorite(
     try:
         # 检查记录是否存在
         record = db.query(SolutionRecord).filter(SolutionRecord.id == favorite.record_id).first()
-        if not record:
+        # 已归档的记录先恢复到热表（收藏外键指向热表），与收藏在同一事务中提交
+        if not record and not restore_records(db, [favorite.record_id]):
             return FavoriteAddResponse(
                 errCode=400,
                 errMsg="解题记录不存在",
@@ -120,20 +130,110 @@ def remove_favorite(
             data={}
         )
 
+@router.post("/batch/add", response_model=BatchApiResponse)
+def batch_add_favorites(
+    body: FavoriteBatchRequest,
+    db: Session = Depends(get_db),
+    current_user_id: str = Depends(get_current_user),
+):
+    """
+    批量添加收藏（需登录），单个事务内一次 executemany 写入；已收藏的记录返回 400 及已有收藏 ID。
+    """
+    if len(body.record_ids) > settings.BATCH_MAX_SIZE:
+        return BatchApiResponse(errCode=400, errMsg=f"单次最多 {settings.BATCH_MAX_SIZE} 条", data={})
+    try:
+        wanted = set(body.record_ids)
+        existing_records = {
+            r.id for r in db.query(SolutionRecord.id).filter(SolutionRecord.id.in_(wanted)).all()
+        }
+        if len(existing_records) < len(wanted):
+            # 已归档的记录先恢复到热表，与收藏在同一事务中提交
+            existing_records |= restore_records(db, wanted - existing_records)
+        existing_favorites = dict(
+            db.query(Favorite.record_id, Favorite.id)
+            .filter(Favorite.user_id == current_user_id, Favorite.record_id.in_(wanted))
+            .all()
+        )
+        results: list[BatchItemResult] = []
+        rows = []
+        for i, record_id in enumerate(body.record_ids):
+            if record_id not in existing_records:
+                results.append(BatchItemResult(index=i, errCode=400, errMsg="解题记录不存在"))
+            elif record_id in existing_favorites:
+                results.append(BatchItemResult(
+                    index=i, id=existing_favorites[record_id], errCode=400, errMsg="已收藏，无需重复收藏"
+                ))
+            else:
+                favorite_id = str(uuid.uuid4())
+                existing_favorites[record_id] = favorite_id
+                rows.append({"id": favorite_id, "record_id": record_id, "user_id": current_user_id})
+                results.append(BatchItemResult(index=i, id=favorite_id))
+        if rows:
+            db.execute(insert(Favorite), rows)
+            db.commit()
+        return BatchApiResponse.from_results(results)
+    except Exception as e:
+        db.rollback()
+        return BatchApiResponse(errCode=500, errMsg=f"添加收藏失败: {str(e)}", data={})
+
+
+@router.post("/batch/remove", response_model=BatchApiResponse)
+def batch_remove_favorites(
+    body: FavoriteBatchRequest,
+    db: Session = Depends(get_db),
+    current_user_id: str = Depends(get_current_user),
+):
+    """
+    批量取消收藏（仅可取消自己的收藏），单个事务内完成。
+    """
+    if len(body.record_ids) > settings.BATCH_MAX_SIZE:
+        return BatchApiResponse(errCode=400, errMsg=f"单次最多 {settings.BATCH_MAX_SIZE} 条", data={})
+    try:
+        existing = dict(
+            db.query(Favorite.record_id, Favorite.id)
+            .filter(Favorite.user_id == current_user_id, Favorite.record_id.in_(set(body.record_ids)))
+            .all()
+        )
+        results: list[BatchItemResult] = []
+        to_delete: set[str] = set()
+        for i, record_id in enumerate(body.record_ids):
+            favorite_id = existing.get(record_id)
+            if favorite_id is None or favorite_id in to_delete:
+                results.append(BatchItemResult(index=i, errCode=400, errMsg="收藏记录不存在或无权操作"))
+            else:
+                to_delete.add(favorite_id)
+                results.append(BatchItemResult(index=i, id=favorite_id))
+        if to_delete:
+            db.query(Favorite).filter(Favorite.id.in_(to_delete)).delete(synchronize_session=False)
+            db.commit()
+        return BatchApiResponse.from_results(results)
+    except Exception as e:
+        db.rollback()
+        return BatchApiResponse(errCode=500, errMsg=f"取消收藏失败: {str(e)}", data={})
+
+
 @router.get("/list", response_model=FavoriteListResponse)
 def get_favorite_list(
+    request: Request,
     page: int = Query(1, ge=1, description="页码"),
     pageSize: int = Query(10, ge=1, le=100, description="每页数量"),
     keyword: Optional[str] = Query(None, description="关键词搜索"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_id: str = Depends(get_current_user),
 ):
     """
-    获取收藏列表（分页，仅返回当前用户的收藏）
+    获取收藏列表（分页，仅返回当前用户的收藏）。响应带内容 ETag，If-None-Match 命中时返回 304。
     """
     try:
-        # 关联查询收藏和解题记录，仅当前用户的收藏
-        query = db.query(Favorite, SolutionRecord).join(
+        # 关联查询收藏和解题记录，仅当前用户的收藏；只投影列表展示所需的列，不读取 solution 大字段
+        query = db.query(
+            Favorite.id,
+            Favorite.created_at,
+            SolutionRecord.id.label("record_id"),
+            SolutionRecord.question_preview(),
+            SolutionRecord.answer,
+            SolutionRecord.tags,
+        ).join(
             SolutionRecord, Favorite.record_id == SolutionRecord.id
         ).filter(Favorite.user_id == current_user_id)
         
@@ -156,42 +256,25 @@ def get_favorite_list(
         offset = (page - 1) * pageSize
         results = query.offset(offset).limit(pageSize).all()
         
-        # 转换为响应格式
+        # 转换为响应格式（标签在保存记录时已规范化，直接使用）
+        tags_by_id = resolve_tags(db, [(row.record_id, row.tags) for row in results])
         favorite_list = []
-        for favorite, record in results:
-            tags = []
-            # 添加知识点标签
-            if record.knowledge_points:
-                for kp in record.knowledge_points:
-                    if isinstance(kp, str):
-                        tags.append(KnowledgePoint(name=kp, type="knowledge"))
-                    elif isinstance(kp, dict) and "name" in kp:
-                        tags.append(KnowledgePoint(name=kp["name"], type="knowledge"))
-            # 添加语义情境标签
-            if record.semantic_contexts:
-                for sc in record.semantic_contexts:
-                    if isinstance(sc, str):
-                        tags.append(KnowledgePoint(name=sc, type="semantic"))
-                    elif isinstance(sc, dict) and "name" in sc:
-                        tags.append(KnowledgePoint(name=sc["name"], type="semantic"))
-            
+        for row in results:
             # 格式化收藏时间
-            favorite_time = favorite.created_at.strftime("%Y-%m-%d %H:%M:%S") if favorite.created_at else ""
+            favorite_time = row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else ""
             
             favorite_list.append(FavoriteResponse(
-                id=favorite.id,
-                record_id=record.id,
-                question=record.question,
-                answer=record.answer,
+                id=row.id,
+                record_id=row.record_id,
+                question=row.question,
+                answer=row.answer,
                 favoriteTime=favorite_time,
-                tags=tags
+                tags=tags_by_id.get(row.record_id, [])
             ))
         
-        return FavoriteListResponse(
-            errCode=0,
-            errMsg="success",
-            data=favorite_list,
-            total=total
+        return etag_json_response(
+            request,
+            FavoriteListResponse(errCode=0, errMsg="success", data=favorite_list, total=total),
         )
     except Exception as e:
         return FavoriteListResponse(
@@ -201,10 +284,75 @@ def get_favorite_list(
             total=0
         )
 
+FAVORITE_EXPORT_CSV_FIELDS = [
+    "id", "record_id", "favorite_time", "question", "answer", "solution", "tags", "record_created_at", "cursor",
+]
+
+
+def _favorite_export_item(row) -> dict:
+    return {
+        "id": row.id,
+        "record_id": row.record_id,
+        "favorite_time": row.created_at.isoformat() if row.created_at else None,
+        "question": row.question,
+        "answer": row.answer,
+        "solution": unpack_solution(row.solution, row.solution_compressed),
+        "tags": row.tags if row.tags is not None else build_tags(row.knowledge_points, row.semantic_contexts),
+        "record_created_at": row.record_created_at.isoformat() if row.record_created_at else None,
+        "cursor": encode_cursor(row.created_at, row.id),
+    }
+
+
+@router.get("/export")
+def export_favorites(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="导出格式：ndjson 或 csv"),
+    start: Optional[date] = Query(None, description="收藏起始日期（含）"),
+    end: Optional[date] = Query(None, description="收藏结束日期（含）"),
+    since: Optional[str] = Query(None, description="续传游标：上次导出最后一行的 cursor"),
+    current_user_id: str = Depends(get_current_user),
+):
+    """
+    流式导出当前用户的全部收藏（含题目、完整解题过程与标签），按收藏时间升序。
+    每行带 cursor，中断后传 since=<cursor> 可从断点继续。
+    """
+    # 先校验游标，避免开始输出后才报错
+    if since:
+        try:
+            decode_cursor(since)
+        except ValueError as e:
+            return {"errCode": 400, "errMsg": str(e), "data": {}}
+
+    def build_items(db: Session):
+        query = db.query(
+            Favorite.id,
+            Favorite.created_at,
+            SolutionRecord.id.label("record_id"),
+            SolutionRecord.question,
+            SolutionRecord.answer,
+            SolutionRecord.solution,
+            SolutionRecord.solution_compressed,
+            SolutionRecord.knowledge_points,
+            SolutionRecord.semantic_contexts,
+            SolutionRecord.tags,
+            SolutionRecord.created_at.label("record_created_at"),
+        ).join(
+            SolutionRecord, Favorite.record_id == SolutionRecord.id
+        ).filter(Favorite.user_id == current_user_id)
+        query = apply_export_filters(query, Favorite.created_at, Favorite.id, start, end, since)
+        return map(_favorite_export_item, query.yield_per(settings.EXPORT_BATCH_SIZE))
+
+    filename = f"favorites-{datetime.now().strftime('%Y%m%d%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream_export(build_items, format, FAVORITE_EXPORT_CSV_FIELDS),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/check", response_model=FavoriteCheckResponse)
 def check_favorite(
     record_id: str = Query(..., description="解题记录ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_id: Optional[str] = Depends(get_current_user_optional),
 ):
     """
@@ -236,3 +384,39 @@ def check_favorite(
             errMsg=f"查询失败: {str(e)}",
             data={"is_favorited": False, "favorite_id": None}
         )
+
+
+@router.post("/batch/check", response_model=FavoriteBatchCheckResponse)
+def batch_check_favorites(
+    body: FavoriteBatchRequest,
+    db: Session = Depends(get_db),
+    current_user_id: Optional[str] = Depends(get_current_user_optional),
+):
+    """
+    批量检查当前用户是否已收藏多条记录：一次 IN 查询（走 uk_user_record 唯一索引），
+    返回 {record_id: {"is_favorited", "favorite_id"}}。
+    """
+    if len(body.record_ids) > settings.BATCH_MAX_SIZE:
+        return FavoriteBatchCheckResponse(errCode=400, errMsg=f"单次最多 {settings.BATCH_MAX_SIZE} 条", data={})
+    try:
+        found: dict = {}
+        if current_user_id is not None and body.record_ids:
+            found = dict(
+                db.query(Favorite.record_id, Favorite.id)
+                .filter(Favorite.user_id == current_user_id, Favorite.record_id.in_(set(body.record_ids)))
+                .all()
+            )
+        return FavoriteBatchCheckResponse(
+            errCode=0,
+            errMsg="success",
+            data={
+                record_id: {"is_favorited": record_id in found, "favorite_id": found.get(record_id)}
+                for record_id in body.record_ids
+            },
+        )
+    except Exception as e:
+        return FavoriteBatchCheckResponse(
+            errCode=500,
+            errMsg=f"查询失败: {str(e)}",
+            data={}
+        )
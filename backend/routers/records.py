@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from typing import Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy import and_, or_, func, insert
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+import heapq
+import uuid
+from datetime import date, datetime
 
-from database import get_db
+from database import SessionLocal, get_db, get_read_db
+from models.archived_record import ArchivedRecord
 from models.favorite import Favorite
-from models.record import SolutionRecord
+from models.record import SolutionRecord, build_tags, resolve_tags
 from routers.auth import get_current_user, get_current_user_optional
 from schemas.record import (
     RecordCreate,
@@ -17,9 +21,17 @@ from schemas.record import (
     RecordStatsResponse,
     RecordResponse,
     RecordDetailResponse,
-    KnowledgePoint
+    RecordBatchCreate,
+    RecordBatchRemoveRequest,
+    BatchItemResult,
+    BatchApiResponse,
 )
 from config import settings
+from services.etag import etag_json_response, etag_matches, make_etag, not_modified
+from services.solution_codec import pack_solution, unpack_solution
+from services.export import EXPORT_MEDIA_TYPES, apply_export_filters, decode_cursor, encode_cursor, stream_export
+from services.archive import get_archived, unpack_archived
+from services import analytics
 
 router = APIRouter(prefix="/records", tags=["解题记录"])
 
@@ -34,17 +46,21 @@ def save_record(
     保存解题记录（需登录，当前用户 ID 会写入记录）
     """
     try:
+        solution, solution_compressed = pack_solution(record.solution)
         db_record = SolutionRecord(
             question=record.question,
             answer=record.answer,
-            solution=record.solution,
+            solution=solution,
+            solution_compressed=solution_compressed,
             knowledge_points=record.knowledge_points or [],
             semantic_contexts=record.semantic_contexts or [],
+            tags=build_tags(record.knowledge_points, record.semantic_contexts),
             user_id=current_user_id,
         )
         db.add(db_record)
         db.commit()
         db.refresh(db_record)
+        analytics.record_saved(current_user_id, db_record.tags)
         
         return RecordSaveApiResponse(
             errCode=0,
@@ -67,27 +83,118 @@ def save_record(
             data={}
         )
 
+@router.post("/batch/save", response_model=BatchApiResponse)
+def batch_save_records(
+    body: RecordBatchCreate,
+    db: Session = Depends(get_db),
+    current_user_id: str = Depends(get_current_user),
+):
+    """
+    批量导入解题记录（需登录），单个事务内一次 executemany 写入；返回每条的结果与新记录 ID。
+    """
+    if len(body.records) > settings.BATCH_MAX_SIZE:
+        return BatchApiResponse(errCode=400, errMsg=f"单次最多 {settings.BATCH_MAX_SIZE} 条", data={})
+    results: list[BatchItemResult] = []
+    rows = []
+    for i, record in enumerate(body.records):
+        if not (record.question or "").strip():
+            results.append(BatchItemResult(index=i, errCode=400, errMsg="题目不能为空"))
+            continue
+        record_id = str(uuid.uuid4())
+        solution, solution_compressed = pack_solution(record.solution)
+        rows.append({
+            "id": record_id,
+            "question": record.question,
+            "answer": record.answer,
+            "solution": solution,
+            "solution_compressed": solution_compressed,
+            "knowledge_points": record.knowledge_points or [],
+            "semantic_contexts": record.semantic_contexts or [],
+            "tags": build_tags(record.knowledge_points, record.semantic_contexts),
+            "user_id": current_user_id,
+        })
+        results.append(BatchItemResult(index=i, id=record_id))
+    try:
+        if rows:
+            db.execute(insert(SolutionRecord), rows)
+            db.commit()
+            for row in rows:
+                analytics.record_saved(current_user_id, row["tags"])
+        return BatchApiResponse.from_results(results)
+    except Exception as e:
+        db.rollback()
+        return BatchApiResponse(errCode=500, errMsg=f"保存失败: {str(e)}", data={})
+
+
+@router.post("/batch/remove", response_model=BatchApiResponse)
+def batch_remove_records(
+    body: RecordBatchRemoveRequest,
+    db: Session = Depends(get_db),
+    current_user_id: Optional[str] = Depends(get_current_user_optional),
+):
+    """
+    批量删除解题记录（同时删除其收藏），权限规则与单条删除一致；单个事务内完成。
+    """
+    if len(body.ids) > settings.BATCH_MAX_SIZE:
+        return BatchApiResponse(errCode=400, errMsg=f"单次最多 {settings.BATCH_MAX_SIZE} 条", data={})
+    try:
+        owners = dict(
+            db.query(SolutionRecord.id, SolutionRecord.user_id)
+            .filter(SolutionRecord.id.in_(set(body.ids)))
+            .all()
+        )
+        missing = set(body.ids) - owners.keys()
+        if missing:
+            # 热表中找不到的再查冷表（已归档记录）
+            owners.update(
+                db.query(ArchivedRecord.id, ArchivedRecord.user_id)
+                .filter(ArchivedRecord.id.in_(missing))
+                .all()
+            )
+        results: list[BatchItemResult] = []
+        to_delete: set[str] = set()
+        for i, record_id in enumerate(body.ids):
+            if record_id not in owners or record_id in to_delete:
+                results.append(BatchItemResult(index=i, id=record_id, errCode=400, errMsg="记录不存在"))
+            elif owners[record_id] is not None and owners[record_id] != current_user_id:
+                results.append(BatchItemResult(index=i, id=record_id, errCode=403, errMsg="无权限删除该记录"))
+            else:
+                to_delete.add(record_id)
+                results.append(BatchItemResult(index=i, id=record_id))
+        if to_delete:
+            # 先删除收藏（favorites.record_id 外键指向 solution_records.id）
+            db.query(Favorite).filter(Favorite.record_id.in_(to_delete)).delete(synchronize_session=False)
+            db.query(SolutionRecord).filter(SolutionRecord.id.in_(to_delete)).delete(synchronize_session=False)
+            db.query(ArchivedRecord).filter(ArchivedRecord.id.in_(to_delete)).delete(synchronize_session=False)
+            db.commit()
+        return BatchApiResponse.from_results(results)
+    except Exception as e:
+        db.rollback()
+        return BatchApiResponse(errCode=500, errMsg=f"删除失败: {str(e)}", data={})
+
+
 @router.get("/stats", response_model=RecordStatsResponse)
 def get_record_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_id: Optional[str] = Depends(get_current_user_optional),
 ):
     """
-    获取当前用户的解题统计：总条数、有做题的不同天数（学习天数）。
+    获取当前用户的解题统计：总条数、有做题的不同天数（学习天数），包含已归档的记录。
     未登录时统计未关联用户的记录。
     """
     try:
-        query = db.query(SolutionRecord)
-        if current_user_id is not None:
-            query = query.filter(
-                (SolutionRecord.user_id == current_user_id) | (SolutionRecord.user_id.is_(None))
-            )
-        else:
-            query = query.filter(SolutionRecord.user_id.is_(None))
-        total = query.count()
-        # 有做题记录的不同天数：按 created_at 的日期去重计数
-        days_query = query.with_entities(func.date(SolutionRecord.created_at)).distinct()
-        days_of_learning = days_query.count()
+        total = 0
+        days: set = set()
+        for model in (SolutionRecord, ArchivedRecord):
+            query = db.query(model)
+            if current_user_id is not None:
+                query = query.filter((model.user_id == current_user_id) | (model.user_id.is_(None)))
+            else:
+                query = query.filter(model.user_id.is_(None))
+            total += query.count()
+            # 有做题记录的不同天数：按 created_at 的日期去重，热表与冷表取并集
+            days.update(d for (d,) in query.with_entities(func.date(model.created_at)).distinct())
+        days_of_learning = len(days)
         return RecordStatsResponse(
             errCode=0,
             errMsg="success",
@@ -103,18 +210,29 @@ def get_record_stats(
 
 @router.get("/list", response_model=RecordListResponse)
 def get_record_list(
+    request: Request,
     page: int = Query(1, ge=1, description="页码"),
     pageSize: int = Query(10, ge=1, le=100, description="每页数量"),
     keyword: Optional[str] = Query(None, description="关键词搜索"),
     category: Optional[str] = Query(None, description="分类筛选(knowledge/semantic)"),
-    db: Session = Depends(get_db),
+    withFavorite: bool = Query(False, description="是否同时返回当前用户的收藏状态"),
+    db: Session = Depends(get_read_db),
     current_user_id: Optional[str] = Depends(get_current_user_optional),
 ):
     """
     获取解题记录列表（分页）。已登录时仅返回当前用户的记录；未登录时仅返回未关联用户的记录。
+    withFavorite=true 时通过一次 LEFT JOIN favorites 同时返回 is_favorited / favorite_id。
+    响应带内容 ETag，If-None-Match 命中时返回 304。
     """
     try:
-        query = db.query(SolutionRecord)
+        # 列表只投影展示所需的列（题目预览、答案、时间、标签），不读取 solution 大字段
+        query = db.query(
+            SolutionRecord.id,
+            SolutionRecord.question_preview(),
+            SolutionRecord.answer,
+            SolutionRecord.tags,
+            SolutionRecord.created_at,
+        )
         if current_user_id is not None:
             query = query.filter(
                 (SolutionRecord.user_id == current_user_id) | (SolutionRecord.user_id.is_(None))
@@ -144,28 +262,20 @@ def get_record_list(
         total = query.count()
         
         # 分页
+        # 收藏状态：按 (user_id, record_id) 唯一键外连接，每条记录至多匹配一行，不影响总数与分页
+        if withFavorite and current_user_id is not None:
+            query = query.outerjoin(
+                Favorite,
+                and_(Favorite.record_id == SolutionRecord.id, Favorite.user_id == current_user_id),
+            ).add_columns(Favorite.id.label("favorite_id"))
+        
         offset = (page - 1) * pageSize
         records = query.offset(offset).limit(pageSize).all()
         
-        # 转换为响应格式
+        # 转换为响应格式（标签在保存时已规范化，直接使用）
+        tags_by_id = resolve_tags(db, [(r.id, r.tags) for r in records])
         record_list = []
         for record in records:
-            tags = []
-            # 添加知识点标签
-            if record.knowledge_points:
-                for kp in record.knowledge_points:
-                    if isinstance(kp, str):
-                        tags.append(KnowledgePoint(name=kp, type="knowledge"))
-                    elif isinstance(kp, dict) and "name" in kp:
-                        tags.append(KnowledgePoint(name=kp["name"], type="knowledge"))
-            # 添加语义情境标签
-            if record.semantic_contexts:
-                for sc in record.semantic_contexts:
-                    if isinstance(sc, str):
-                        tags.append(KnowledgePoint(name=sc, type="semantic"))
-                    elif isinstance(sc, dict) and "name" in sc:
-                        tags.append(KnowledgePoint(name=sc["name"], type="semantic"))
-            
             # 格式化时间
             time_str = record.created_at.strftime("%Y-%m-%d %H:%M:%S") if record.created_at else ""
             
@@ -174,14 +284,14 @@ def get_record_list(
                 question=record.question,
                 answer=record.answer,
                 time=time_str,
-                tags=tags
+                tags=tags_by_id.get(record.id, []),
+                is_favorited=(getattr(record, "favorite_id", None) is not None) if withFavorite else None,
+                favorite_id=getattr(record, "favorite_id", None) if withFavorite else None,
             ))
         
-        return RecordListResponse(
-            errCode=0,
-            errMsg="success",
-            data=record_list,
-            total=total
+        return etag_json_response(
+            request,
+            RecordListResponse(errCode=0, errMsg="success", data=record_list, total=total),
         )
     except Exception as e:
         return RecordListResponse(
@@ -191,18 +301,156 @@ def get_record_list(
             total=0
         )
 
+RECORD_EXPORT_CSV_FIELDS = [
+    "id", "created_at", "question", "answer", "solution", "knowledge_points", "semantic_contexts", "tags", "cursor",
+]
+
+
+def _record_export_item(row) -> dict:
+    return {
+        "id": row.id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "question": row.question,
+        "answer": row.answer,
+        "solution": unpack_solution(row.solution, row.solution_compressed),
+        "knowledge_points": row.knowledge_points or [],
+        "semantic_contexts": row.semantic_contexts or [],
+        "tags": row.tags if row.tags is not None else build_tags(row.knowledge_points, row.semantic_contexts),
+        "cursor": encode_cursor(row.created_at, row.id),
+    }
+
+
+def _archived_export_item(row: ArchivedRecord) -> dict:
+    data = unpack_archived(row)
+    return {
+        "id": row.id,
+        "created_at": data["created_at"],
+        "question": data.get("question"),
+        "answer": data.get("answer"),
+        "solution": data.get("solution"),
+        "knowledge_points": data.get("knowledge_points") or [],
+        "semantic_contexts": data.get("semantic_contexts") or [],
+        "tags": data.get("tags") or [],
+        "cursor": encode_cursor(row.created_at, row.id),
+    }
+
+
+def _iter_record_export(db: Session, user_id: str, start, end, since):
+    """热表与冷表各用一个服务端游标按 (created_at, id) 升序读取，归并为整体有序的输出。"""
+    batch_size = settings.EXPORT_BATCH_SIZE
+    # 同一连接上不能同时存在两个流式结果集，冷表使用单独的会话
+    archive_db = SessionLocal()
+    try:
+        hot = apply_export_filters(
+            db.query(
+                SolutionRecord.id,
+                SolutionRecord.question,
+                SolutionRecord.answer,
+                SolutionRecord.solution,
+                SolutionRecord.solution_compressed,
+                SolutionRecord.knowledge_points,
+                SolutionRecord.semantic_contexts,
+                SolutionRecord.tags,
+                SolutionRecord.created_at,
+            ).filter(SolutionRecord.user_id == user_id),
+            SolutionRecord.created_at, SolutionRecord.id, start, end, since,
+        ).yield_per(batch_size)
+        cold = apply_export_filters(
+            archive_db.query(ArchivedRecord).filter(ArchivedRecord.user_id == user_id),
+            ArchivedRecord.created_at, ArchivedRecord.id, start, end, since,
+        ).yield_per(batch_size)
+        merged = heapq.merge(
+            ((r.created_at or datetime.min, r.id, _record_export_item, r) for r in hot),
+            ((r.created_at or datetime.min, r.id, _archived_export_item, r) for r in cold),
+            key=lambda t: (t[0], t[1]),
+        )
+        for _, _, to_item, row in merged:
+            yield to_item(row)
+    finally:
+        archive_db.close()
+
+
+@router.get("/export")
+def export_records(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="导出格式：ndjson 或 csv"),
+    start: Optional[date] = Query(None, description="起始日期（含），如 2025-09-01"),
+    end: Optional[date] = Query(None, description="结束日期（含），如 2026-01-31"),
+    since: Optional[str] = Query(None, description="续传游标：上次导出最后一行的 cursor"),
+    current_user_id: str = Depends(get_current_user),
+):
+    """
+    流式导出当前用户的全部解题记录（含已归档记录、完整解题过程与标签），按创建时间升序。
+    每行带 cursor，中断后传 since=<cursor> 可从断点继续。
+    """
+    # 先校验游标，避免开始输出后才报错
+    if since:
+        try:
+            decode_cursor(since)
+        except ValueError as e:
+            return {"errCode": 400, "errMsg": str(e), "data": {}}
+
+    def build_items(db: Session):
+        return _iter_record_export(db, current_user_id, start, end, since)
+
+    filename = f"records-{datetime.now().strftime('%Y%m%d%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream_export(build_items, format, RECORD_EXPORT_CSV_FIELDS),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _record_etag(record_id: str, created_at: Optional[datetime]) -> str:
+    """解题记录保存后不可变，ETag 只依赖 ID 与创建时间。"""
+    return make_etag("record", record_id, created_at.isoformat() if created_at else "")
+
+
 @router.get("/detail", response_model=RecordDetailApiResponse)
 def get_record_detail(
+    request: Request,
     id: str = Query(..., description="记录ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_id: Optional[str] = Depends(get_current_user_optional),
 ):
     """
     获取解题记录详情。已登录时仅可查看自己的记录；未登录时仅可查看未关联用户的记录。
+    记录保存后不再修改，ETag 由记录 ID 与创建时间决定：携带 If-None-Match 时只查询
+    user_id / created_at 两列完成权限校验，命中即返回 304，不读取 solution 大字段。
     """
     try:
-        record = db.query(SolutionRecord).filter(SolutionRecord.id == id).first()
-        
+        if request.headers.get("if-none-match"):
+            head = (
+                db.query(SolutionRecord.user_id, SolutionRecord.created_at)
+                .filter(SolutionRecord.id == id)
+                .first()
+            ) or (
+                db.query(ArchivedRecord.user_id, ArchivedRecord.created_at)
+                .filter(ArchivedRecord.id == id)
+                .first()
+            )
+            if head and (head.user_id is None or head.user_id == current_user_id):
+                etag = _record_etag(id, head.created_at)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+
+        record = (
+            db.query(SolutionRecord)
+            .options(undefer(SolutionRecord.solution), undefer(SolutionRecord.solution_compressed))
+            .filter(SolutionRecord.id == id)
+            .first()
+        )
+        if record:
+            data = {
+                "question": record.question,
+                "answer": record.answer,
+                "solution": record.get_solution(),
+                "tags": record.get_tags(),
+            }
+        else:
+            # 热表未找到时按主键查冷表（已归档记录）
+            record = get_archived(db, id)
+            data = unpack_archived(record) if record else None
+
         if not record:
             return RecordDetailApiResponse(
                 errCode=400,
@@ -216,36 +464,21 @@ def get_record_detail(
                 data=None
             )
         
-        # 构建 tags
-        tags = []
-        if record.knowledge_points:
-            for kp in record.knowledge_points:
-                if isinstance(kp, str):
-                    tags.append(KnowledgePoint(name=kp, type="knowledge"))
-                elif isinstance(kp, dict) and "name" in kp:
-                    tags.append(KnowledgePoint(name=kp["name"], type="knowledge"))
-        if record.semantic_contexts:
-            for sc in record.semantic_contexts:
-                if isinstance(sc, str):
-                    tags.append(KnowledgePoint(name=sc, type="semantic"))
-                elif isinstance(sc, dict) and "name" in sc:
-                    tags.append(KnowledgePoint(name=sc["name"], type="semantic"))
-        
         time_str = record.created_at.strftime("%Y-%m-%d %H:%M:%S") if record.created_at else ""
         
         detail = RecordDetailResponse(
             id=record.id,
-            question=record.question,
-            answer=record.answer,
-            solution=record.solution,
+            question=data["question"],
+            answer=data["answer"],
+            solution=data["solution"],
             time=time_str,
-            tags=tags
+            tags=data.get("tags") or []
         )
         
-        return RecordDetailApiResponse(
-            errCode=0,
-            errMsg="success",
-            data=detail
+        return etag_json_response(
+            request,
+            RecordDetailApiResponse(errCode=0, errMsg="success", data=detail),
+            etag=_record_etag(record.id, record.created_at),
         )
     except Exception as e:
         return RecordDetailApiResponse(
@@ -265,7 +498,7 @@ def remove_record(
     删除解题记录（同时删除其收藏记录）。仅可删除自己的记录或未关联用户的记录。
     """
     try:
-        record = db.query(SolutionRecord).filter(SolutionRecord.id == id).first()
+        record = db.query(SolutionRecord).filter(SolutionRecord.id == id).first() or get_archived(db, id)
         if not record:
             return RecordRemoveResponse(
                 errCode=400,
@@ -6,18 +6,26 @@
 import asyncio
 import json
 import re
+import time
+from typing import Optional
+
 import httpx
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from config import settings
-from database import get_db
+from database import get_db, get_read_db
 from models.solve_model import SolveModel
 from models.system_setting import SystemSetting
 from schemas.solve import SolveRequest, SolveResponse, AnalyzeRequest, AnalyzeResponse
+from routers.auth import get_current_user_optional
+from services import analytics, solve_model_cache
+from services.etag import etag_bytes_response
 
 router = APIRouter(prefix="/solve", tags=["解题"])
 CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+# 模型列表对所有用户相同，可被共享缓存，但每次使用前需向服务端确认
+SOLVE_MODELS_CACHE_CONTROL = "public, no-cache"
 
 # 环境变量回退时的默认展示名
 SOLVE_MODEL_DISPLAY_NAMES = {
@@ -57,6 +65,8 @@ def seed_solve_models_from_env(db: Session) -> int:
         db.add(row)
         added += 1
     db.commit()
+    if added:
+        solve_model_cache.invalidate(db)
     return added
 
 # 知识点识别系统 prompt：要求只返回 JSON 数组，便于解析
@@ -273,14 +283,13 @@ def _build_enhanced_user_message(question: str, knowledge_points: list, semantic
 
 
 @router.get("/models")
-def list_solve_models(db: Session = Depends(get_db)):
-    """返回可选解题大模型列表（优先从 DB 读取，可管理员实时维护），供前端下拉选择。"""
-    rows = db.query(SolveModel).filter(SolveModel.enabled == True).order_by(SolveModel.sort_order, SolveModel.id).all()
-    if rows:
-        data = [{"id": r.model_id, "name": r.display_name} for r in rows]
-    else:
-        data = _get_solve_model_options_from_env()
-    return {"errCode": 0, "errMsg": "success", "data": data}
+def list_solve_models(request: Request, db: Session = Depends(get_read_db)):
+    """
+    返回可选解题大模型列表（优先从 DB 读取，可管理员实时维护），供前端下拉选择。
+    响应体在进程内预序列化缓存，管理员修改模型后失效；If-None-Match 命中时返回 304。
+    """
+    body, etag = solve_model_cache.get_solve_models(db)
+    return etag_bytes_response(request, body, etag, SOLVE_MODELS_CACHE_CONTROL)
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
@@ -324,10 +333,12 @@ async def analyze_question(
 async def solve_question(
     body: SolveRequest,
     db: Session = Depends(get_db),
+    current_user_id: Optional[str] = Depends(get_current_user_optional),
 ):
     """
     工作流：若未传 knowledge_points/semantic_contexts 则先识别；
     再将知识点与语义情境嵌入 prompt 调用解题模型，返回解题过程。
+    每次调用按模型累计次数、耗时与失败数（见 services/analytics.py）。
     """
     base_url, token = _get_uniapi_base_and_token(db)
     if not (token and token.strip()):
@@ -347,6 +358,12 @@ async def solve_question(
 
     knowledge_points: list = list(body.knowledge_points) if body.knowledge_points else []
     semantic_contexts: list = list(body.semantic_contexts) if body.semantic_contexts else []
+    # 优先使用请求中的 model
+    solve_model = (body.model or "").strip() or (settings.UNIAPI_MODEL or "gpt-5.2")
+    started = time.perf_counter()
+
+    def finished(ok: bool) -> None:
+        analytics.record_solve(solve_model, ok, (time.perf_counter() - started) * 1000, current_user_id)
 
     try:
         async with httpx.AsyncClient(timeout=90.0) as client:
@@ -358,9 +375,8 @@ async def solve_question(
                     _extract_knowledge_points(client, question, base_url_k, token_k, model_k),
                     _extract_semantic_contexts(client, question, base_url_s, token_s, model_s),
                 )
-            # 构建增强 prompt 并调用解题模型（优先使用请求中的 model）
+            # 构建增强 prompt 并调用解题模型
             user_message = _build_enhanced_user_message(question, knowledge_points, semantic_contexts)
-            solve_model = (body.model or "").strip() or (settings.UNIAPI_MODEL or "gpt-5.2")
             print(f"solve_model: {solve_model}")
             payload = {
                 "model": solve_model,
@@ -373,12 +389,14 @@ async def solve_question(
             resp.raise_for_status()
             data = resp.json()
     except httpx.TimeoutException:
+        finished(False)
         return SolveResponse(
             errCode=500,
             errMsg="大模型请求超时，请稍后重试",
             data={},
         )
     except httpx.HTTPStatusError as e:
+        finished(False)
         err_detail = ""
         try:
             err_body = e.response.json()
@@ -391,6 +409,7 @@ async def solve_question(
             data={},
         )
     except Exception as e:
+        finished(False)
         return SolveResponse(
             errCode=500,
             errMsg=f"解题服务异常: {str(e)}",
@@ -402,11 +421,13 @@ async def solve_question(
         msg = data["choices"][0].get("message") or {}
         content = msg.get("content") or ""
     if not content:
+        finished(False)
         return SolveResponse(
             errCode=500,
             errMsg="大模型返回内容为空",
             data={},
         )
+    finished(True)
 
     return SolveResponse(
         errCode=0,
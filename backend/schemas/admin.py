@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -7,6 +7,8 @@ class AdminUserItem(BaseModel):
     username: str
     nickname: Optional[str] = None
     avatar_url: Optional[str] = None
+    avatar_variants: Optional[Dict[str, str]] = None
+    disabled: bool = False
     created_at: Optional[str] = None
 
 
@@ -148,6 +150,16 @@ class AdminSolveModelUpdateRequest(BaseModel):
     enabled: Optional[bool] = None
 
 
+class AdminBenchmarkCreateRequest(BaseModel):
+    """创建模型基准测试任务：questions 为空时使用内置题目集。"""
+
+    name: Optional[str] = Field(None, max_length=128)
+    models: List[str] = Field(..., min_length=1)
+    questions: Optional[List[str]] = None
+    concurrency: int = Field(4, ge=1)
+    repeat: int = Field(1, ge=1, le=10)
+
+
 class AdminRecordItem(BaseModel):
     """管理员查看的解题记录条目（带用户信息简要）"""
 
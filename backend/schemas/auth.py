@@ -16,6 +16,7 @@ class UserInfo(BaseModel):
     username: str
     nickname: str | None = None
     avatar_url: str | None = None
+    avatar_variants: dict[str, str] | None = None  # 头像缩略图 {尺寸: URL}
 
 
 class ProfileUpdateRequest(BaseModel):
@@ -34,3 +34,12 @@ class FavoriteCheckResponse(BaseModel):
     errCode: int = 0
     errMsg: str = "success"
     data: dict  # {"is_favorited": true/false, "favorite_id": "xxx"}
+
+class FavoriteBatchCheckResponse(BaseModel):
+    errCode: int = 0
+    errMsg: str = "success"
+    data: dict = Field(default_factory=dict)  # {record_id: {"is_favorited": true/false, "favorite_id": "xxx"}}
+
+
+class FavoriteBatchRequest(BaseModel):
+    record_ids: List[str] = Field(..., description="解题记录ID列表")
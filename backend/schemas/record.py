@@ -19,6 +19,8 @@ class RecordResponse(BaseModel):
     answer: Optional[str]
     time: str  # created_at 格式化后的时间字符串
     tags: List[KnowledgePoint]  # 合并 knowledge_points 和 semantic_contexts
+    is_favorited: Optional[bool] = None  # 仅列表接口 withFavorite=true 时返回
+    favorite_id: Optional[str] = None
 
 class RecordDetailResponse(RecordResponse):
     solution: Optional[str]  # 详情页额外包含 solution
@@ -50,3 +52,37 @@ class RecordStatsResponse(BaseModel):
     errCode: int = 0
     errMsg: str = "success"
     data: dict = Field(default_factory=dict)  # {"total": int, "daysOfLearning": int}
+
+
+class RecordBatchCreate(BaseModel):
+    records: List[RecordCreate] = Field(..., description="批量导入的解题记录")
+
+
+class RecordBatchRemoveRequest(BaseModel):
+    ids: List[str] = Field(..., description="要删除的记录ID列表")
+
+
+class BatchItemResult(BaseModel):
+    """批量接口中单项的处理结果：errCode 0 为成功，其余含义与对应单条接口一致。"""
+
+    index: int
+    id: Optional[str] = None
+    errCode: int = 0
+    errMsg: str = "success"
+
+
+class BatchApiResponse(BaseModel):
+    errCode: int = 0
+    errMsg: str = "success"
+    data: dict = Field(default_factory=dict)  # {"results": [BatchItemResult], "succeeded": int, "failed": int}
+
+    @classmethod
+    def from_results(cls, results: List[BatchItemResult]) -> "BatchApiResponse":
+        failed = sum(1 for r in results if r.errCode != 0)
+        return cls(
+            data={
+                "results": [r.model_dump() for r in results],
+                "succeeded": len(results) - failed,
+                "failed": failed,
+            }
+        )
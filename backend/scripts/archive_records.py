@@ -0,0 +1,52 @@
+"""
+冷热分层：把超过 ARCHIVE_AFTER_DAYS 天且未被收藏的解题记录移入 solution_records_archive。
+
+用法（在 backend 目录下，先执行 init_db.sql 创建 solution_records_archive 表）：
+    python scripts/archive_records.py --stats                 # 只查看各层行数与占用空间
+    python scripts/archive_records.py --days 180 --batch-size 500 --sleep 0.1
+
+每批一个短事务并可在批间休眠，可中断后重复执行；也可通过 POST /api/admin/storage/archive 在服务内后台执行。
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from config import settings
+from database import SessionLocal
+from services.archive import archive_old_records, tier_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="归档旧解题记录")
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS, help="归档早于多少天的记录")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=0.0, help="批间休眠秒数")
+    parser.add_argument("--stats", action="store_true", help="只输出各层统计后退出")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.stats:
+            total = 0
+            while True:
+                result = archive_old_records(db, older_than_days=args.days, batch_size=args.batch_size, max_batches=1)
+                if not result["batches"]:
+                    break
+                total += result["archived"]
+                print(f"archived {total} (cutoff {result['cutoff']})")
+                if args.sleep:
+                    time.sleep(args.sleep)
+            print(f"done: {total} rows archived")
+        print(json.dumps(tier_stats(db), ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
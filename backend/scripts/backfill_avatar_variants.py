@@ -0,0 +1,39 @@
+"""
+为已有头像批量生成 WebP 缩略图（AVATAR_VARIANT_SIZES 各尺寸），并回填 users.avatar_variants。
+
+用法（在 backend 目录下，需安装 Pillow，旧库先执行 init_db.sql 中 avatar_variants 的 ALTER 语句）：
+    python scripts/backfill_avatar_variants.py --batch-size 100
+
+已生成的变体会跳过，可中断后重复执行。
+"""
+import argparse
+import sys
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from database import SessionLocal
+from services import avatar_images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填头像缩略图")
+    parser.add_argument("--batch-size", type=int, default=100, help="每批提交到进程池的原图数")
+    args = parser.parse_args()
+
+    if not avatar_images.enabled():
+        print("未安装 Pillow 或 AVATAR_VARIANT_SIZES 为空，退出")
+        return
+    db = SessionLocal()
+    try:
+        result = avatar_images.backfill(db, batch_size=args.batch_size)
+        print(f"done: generated {result['generated']}, failed {result['failed']}, users updated {result['users']}")
+    finally:
+        db.close()
+        avatar_images.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+登录吞吐基准：对运行中的服务并发调用 /api/auth/login，同时以固定间隔探测一个轻量接口，
+观察 bcrypt 计算是否拖慢其他请求。
+
+用法（先启动服务，如 uvicorn main:app --port 8000）：
+    python scripts/bench_login.py --base-url http://127.0.0.1:8000 --concurrency 50 --requests 500
+
+输出登录吞吐（次/秒）、成功/429/503 次数与延迟分位数，以及探测接口（默认 /health）的延迟分位数。
+测量进程池吞吐时需调大服务端的登录限流（LOGIN_BURST_PER_USERNAME、LOGIN_RATE_PER_USERNAME_PER_MINUTE 等）。
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def _ensure_user(client: httpx.AsyncClient, username: str, password: str) -> None:
+    await client.post("/api/auth/register", json={"username": username, "password": password})
+
+
+async def _login_worker(client, queue: asyncio.Queue, args, latencies: list[float], codes: dict) -> None:
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        r = await client.post("/api/auth/login", json={"username": args.username, "password": args.password})
+        latencies.append((time.perf_counter() - start) * 1000)
+        key = r.status_code if r.status_code != 200 else r.json().get("errCode")
+        codes[key] = codes.get(key, 0) + 1
+
+
+async def _probe(client, path: str, interval: float, stop: asyncio.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def main_async(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        await _ensure_user(client, args.username, args.password)
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(None)
+        login_latencies: list[float] = []
+        probe_latencies: list[float] = []
+        codes: dict = {}
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, args.probe_path, args.probe_interval, stop, probe_latencies))
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _login_worker(client, queue, args, login_latencies, codes) for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    print(f"login: {args.requests} requests in {elapsed:.2f}s -> {args.requests / elapsed:.1f}/s, codes={codes}")
+    print(
+        f"login latency  p50={_pct(login_latencies, 0.5):.1f}ms "
+        f"p95={_pct(login_latencies, 0.95):.1f}ms max={max(login_latencies or [0]):.1f}ms"
+    )
+    print(
+        f"probe {args.probe_path} n={len(probe_latencies)} p50={_pct(probe_latencies, 0.5):.1f}ms "
+        f"p95={_pct(probe_latencies, 0.95):.1f}ms max={max(probe_latencies or [0]):.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录吞吐与隔离性基准")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--username", default="bench_login_user")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--probe-path", default="/health", help="同时探测延迟的轻量接口")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+列表接口投影前后对比：统计每页从数据库取回的字节数与查询耗时。
+
+用法（在 backend 目录下）：
+    python scripts/bench_record_list.py --pages 20 --page-size 20
+
+- full：加载完整 SolutionRecord 实体（含 solution 大字段，即优化前的做法）
+- projection：列表接口当前使用的列投影（题目预览、答案、时间、标签）
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from sqlalchemy.orm import undefer
+
+from database import SessionLocal
+from models.record import SolutionRecord
+
+
+def _row_bytes(values) -> int:
+    """粗略估算一行数据的传输字节数（字符串按 UTF-8 计，JSON 按序列化后长度计）。"""
+    n = 0
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, str):
+            n += len(v.encode("utf-8"))
+        elif isinstance(v, bytes):
+            n += len(v)
+        elif isinstance(v, (list, dict)):
+            n += len(json.dumps(v, ensure_ascii=False).encode("utf-8"))
+        else:
+            n += len(str(v))
+    return n
+
+
+def _run(db, mode: str, pages: int, page_size: int) -> tuple[int, list[float]]:
+    total_bytes = 0
+    latencies: list[float] = []
+    for page in range(pages):
+        start = time.perf_counter()
+        if mode == "full":
+            rows = (
+                db.query(SolutionRecord)
+                .options(undefer(SolutionRecord.solution), undefer(SolutionRecord.solution_compressed))
+                .order_by(SolutionRecord.created_at.desc())
+                .offset(page * page_size)
+                .limit(page_size)
+                .all()
+            )
+            values = [
+                (r.id, r.question, r.answer, r.solution, r.solution_compressed, r.knowledge_points, r.semantic_contexts, r.created_at, r.user_id)
+                for r in rows
+            ]
+        else:
+            values = (
+                db.query(
+                    SolutionRecord.id,
+                    SolutionRecord.question_preview(),
+                    SolutionRecord.answer,
+                    SolutionRecord.tags,
+                    SolutionRecord.created_at,
+                )
+                .order_by(SolutionRecord.created_at.desc())
+                .offset(page * page_size)
+                .limit(page_size)
+                .all()
+            )
+        latencies.append((time.perf_counter() - start) * 1000)
+        total_bytes += sum(_row_bytes(v) for v in values)
+        db.expunge_all()
+        if not values:
+            break
+    return total_bytes, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表接口列投影前后对比")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for mode in ("full", "projection"):
+            total_bytes, latencies = _run(db, mode, args.pages, args.page_size)
+            latencies.sort()
+            n = len(latencies) or 1
+            print(
+                f"{mode:<11} pages={len(latencies):<4} bytes/page={total_bytes // n:<10} "
+                f"p50={latencies[n // 2] if latencies else 0:.2f}ms "
+                f"avg={sum(latencies) / n:.2f}ms"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+小文件静态服务基准：对运行中的服务并发请求同一个上传文件，输出每秒请求数与延迟分位数。
+
+用法（先启动服务，头像目录中需有文件）：
+    python scripts/bench_static.py --url http://127.0.0.1:8000/api/uploads/avatars/<文件名> --concurrency 32 --requests 5000
+
+分别以 UPLOADS_FAST_PATH=true / false 启动服务各测一次，对比内存快速路径与逐块读盘；
+--revalidate 携带 If-None-Match 测 304 路径（浏览器重新验证缓存时的开销）。
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def _worker(client, url: str, headers: dict, counter: list[int], latencies: list[float], statuses: dict) -> None:
+    while counter[0] > 0:
+        counter[0] -= 1
+        start = time.perf_counter()
+        r = await client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+
+async def main_async(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        first = await client.get(args.url)
+        first.raise_for_status()
+        print(
+            f"{args.url}: {len(first.content)} bytes, cache-control={first.headers.get('cache-control')!r}, "
+            f"etag={first.headers.get('etag')!r}"
+        )
+        headers = {"If-None-Match": first.headers["etag"]} if args.revalidate and "etag" in first.headers else {}
+        counter = [args.requests]
+        latencies: list[float] = []
+        statuses: dict = {}
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _worker(client, args.url, headers, counter, latencies, statuses) for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    print(f"{len(latencies)} requests in {elapsed:.2f}s -> {len(latencies) / elapsed:.0f} req/s, status={statuses}")
+    print(f"latency p50={_pct(latencies, 0.5):.2f}ms p95={_pct(latencies, 0.95):.2f}ms p99={_pct(latencies, 0.99):.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上传文件静态服务基准")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--revalidate", action="store_true", help="携带 If-None-Match，测 304 路径")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
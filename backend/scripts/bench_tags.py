@@ -0,0 +1,68 @@
+"""
+标签构建基准：对比「逐行解析 knowledge_points / semantic_contexts 并逐个构建 KnowledgePoint」
+与「读取保存时已规范化的 tags 列」两种读路径的耗时（纯 Python，无需数据库）。
+
+用法（在 backend 目录下）：
+    python scripts/bench_tags.py --rows 20 --rounds 2000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from models.record import build_tags
+from schemas.record import KnowledgePoint, RecordListResponse, RecordResponse
+
+
+def _legacy_tags(knowledge_points, semantic_contexts) -> list:
+    """优化前各列表/详情接口中复制粘贴的标签构建逻辑。"""
+    tags = []
+    if knowledge_points:
+        for kp in knowledge_points:
+            if isinstance(kp, str):
+                tags.append(KnowledgePoint(name=kp, type="knowledge"))
+            elif isinstance(kp, dict) and "name" in kp:
+                tags.append(KnowledgePoint(name=kp["name"], type="knowledge"))
+    if semantic_contexts:
+        for sc in semantic_contexts:
+            if isinstance(sc, str):
+                tags.append(KnowledgePoint(name=sc, type="semantic"))
+            elif isinstance(sc, dict) and "name" in sc:
+                tags.append(KnowledgePoint(name=sc["name"], type="semantic"))
+    return tags
+
+
+def main():
+    parser = argparse.ArgumentParser(description="标签构建基准")
+    parser.add_argument("--rows", type=int, default=20, help="每页行数")
+    parser.add_argument("--rounds", type=int, default=2000, help="重复页数")
+    args = parser.parse_args()
+
+    kps = ["一元二次方程", "根的判别式", {"name": "韦达定理"}]
+    scs = ["行程问题", {"name": "相遇问题"}]
+    legacy_rows = [(kps, scs)] * args.rows
+    stored_rows = [build_tags(kps, scs)] * args.rows
+
+    def legacy_page():
+        data = [
+            RecordResponse(id="x", question="q", answer="a", time="", tags=_legacy_tags(kp, sc))
+            for kp, sc in legacy_rows
+        ]
+        return RecordListResponse(data=data).model_dump_json()
+
+    def stored_page():
+        data = [RecordResponse(id="x", question="q", answer="a", time="", tags=tags) for tags in stored_rows]
+        return RecordListResponse(data=data).model_dump_json()
+
+    assert legacy_page() == stored_page()
+    for name, fn in (("legacy", legacy_page), ("precomputed", stored_page)):
+        seconds = timeit.timeit(fn, number=args.rounds)
+        print(f"{name:<12} {seconds / args.rounds * 1e6:8.1f} us/page ({args.rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
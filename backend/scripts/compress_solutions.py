@@ -0,0 +1,105 @@
+"""
+在线迁移：把历史记录的明文 solution 按当前 SOLUTION_COMPRESSION 配置压缩写入 solution_compressed，并报告节省的空间。
+
+用法（在 backend 目录下，先执行 init_db.sql 中的 ALTER TABLE 语句并在 .env 中设置 SOLUTION_COMPRESSION）：
+    python scripts/compress_solutions.py --train            # 可选：用历史数据训练 zstd 共享字典，输出字典 ID
+    python scripts/compress_solutions.py --batch-size 200 --sleep 0.05
+
+按主键分批处理，每批单独提交并可在批间休眠，避免长事务与持续占用 IO；可中断后重复执行。
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from sqlalchemy import func
+
+from config import settings
+from database import SessionLocal
+from models.record import SolutionRecord
+from services.solution_codec import compress_solution, train_dictionary
+
+
+def _train(db, sample_size: int) -> None:
+    rows = (
+        db.query(SolutionRecord.solution)
+        .filter(SolutionRecord.solution.isnot(None))
+        .order_by(SolutionRecord.created_at.desc())
+        .limit(sample_size)
+        .all()
+    )
+    samples = [r.solution for r in rows if r.solution]
+    if not samples:
+        print("没有可用于训练的明文 solution")
+        return
+    dict_id = train_dictionary(samples)
+    print(f"已用 {len(samples)} 条样本训练字典，ID={dict_id}；请在 .env 中设置 SOLUTION_ZSTD_DICT_ID={dict_id} 后再执行迁移")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩历史解题过程")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--sleep", type=float, default=0.0, help="批间休眠秒数")
+    parser.add_argument("--train", action="store_true", help="训练 zstd 共享字典后退出")
+    parser.add_argument("--sample-size", type=int, default=2000, help="训练字典使用的样本数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.train:
+            _train(db, args.sample_size)
+            return
+        if (settings.SOLUTION_COMPRESSION or "none").lower() == "none":
+            print("SOLUTION_COMPRESSION 为 none，未开启压缩，退出")
+            return
+
+        scanned = compressed = bytes_before = bytes_after = 0
+        last_id = ""
+        while True:
+            rows = (
+                db.query(SolutionRecord.id, SolutionRecord.solution)
+                .filter(
+                    SolutionRecord.solution.isnot(None),
+                    SolutionRecord.solution_compressed.is_(None),
+                    SolutionRecord.id > last_id,
+                )
+                .order_by(SolutionRecord.id)
+                .limit(args.batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            updates = []
+            for r in rows:
+                blob = compress_solution(r.solution)
+                if blob is None:
+                    continue
+                updates.append({"id": r.id, "solution": None, "solution_compressed": blob})
+                bytes_before += len(r.solution.encode("utf-8"))
+                bytes_after += len(blob)
+            if updates:
+                db.bulk_update_mappings(SolutionRecord, updates)
+            db.commit()
+            scanned += len(rows)
+            compressed += len(updates)
+            last_id = rows[-1].id
+            print(f"scanned {scanned}, compressed {compressed} (last id {last_id})")
+            if args.sleep:
+                time.sleep(args.sleep)
+
+        remaining = db.query(func.count(SolutionRecord.id)).filter(SolutionRecord.solution.isnot(None)).scalar()
+        saved = bytes_before - bytes_after
+        ratio = bytes_after / bytes_before if bytes_before else 1.0
+        print(f"done: {compressed}/{scanned} rows compressed, {remaining} rows kept as plain text")
+        print(f"solution bytes {bytes_before} -> {bytes_after}, saved {saved} ({(1 - ratio) * 100:.1f}%)")
+        print("注：InnoDB 需执行 OPTIMIZE TABLE solution_records 后表空间文件才会收缩")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
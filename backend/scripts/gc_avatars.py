@@ -0,0 +1,42 @@
+"""
+清理孤儿头像文件：删除未被任何 users.avatar_url 引用、且最后修改超过宽限期的头像（含缩略图与残留临时文件）。
+
+用法（在 backend 目录下）：
+    python scripts/gc_avatars.py --dry-run            # 只统计可回收的文件数与字节数
+    python scripts/gc_avatars.py --grace-hours 24
+
+服务运行期间也会每 AVATAR_GC_INTERVAL_SECONDS 秒自动执行一次。
+"""
+import argparse
+import sys
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from config import settings
+from database import SessionLocal
+from services.avatar_storage import gc_orphans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="清理孤儿头像文件")
+    parser.add_argument("--grace-hours", type=float, default=settings.AVATAR_GC_GRACE_SECONDS / 3600)
+    parser.add_argument("--dry-run", action="store_true", help="只统计不删除")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = gc_orphans(db, grace_seconds=args.grace_hours * 3600, dry_run=args.dry_run)
+        action = "would remove" if args.dry_run else "removed"
+        print(
+            f"scanned {result['scanned']} files, {action} {result['removed']}, "
+            f"reclaimed {result['reclaimed_bytes']} bytes ({result['referenced']} referenced avatars)"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
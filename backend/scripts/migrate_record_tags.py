@@ -0,0 +1,54 @@
+"""
+回填 solution_records.tags：把历史记录的 knowledge_points / semantic_contexts 规范化写入 tags 列。
+
+用法（在 backend 目录下，先执行 init_db.sql 中的 ALTER TABLE 语句）：
+    python scripts/migrate_record_tags.py --batch-size 500
+
+按主键分批处理，每批单独提交，可重复执行（只处理 tags 为空的行）。
+"""
+import argparse
+import sys
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from database import SessionLocal
+from models.record import SolutionRecord, build_tags
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填解题记录的规范化标签列")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    migrated = 0
+    last_id = ""
+    try:
+        while True:
+            rows = (
+                db.query(SolutionRecord.id, SolutionRecord.knowledge_points, SolutionRecord.semantic_contexts)
+                .filter(SolutionRecord.tags.is_(None), SolutionRecord.id > last_id)
+                .order_by(SolutionRecord.id)
+                .limit(args.batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            db.bulk_update_mappings(
+                SolutionRecord,
+                [{"id": r.id, "tags": build_tags(r.knowledge_points, r.semantic_contexts)} for r in rows],
+            )
+            db.commit()
+            migrated += len(rows)
+            last_id = rows[-1].id
+            print(f"migrated {migrated} rows (last id {last_id})")
+    finally:
+        db.close()
+    print(f"done, {migrated} rows migrated")
+
+
+if __name__ == "__main__":
+    main()
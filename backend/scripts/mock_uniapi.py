@@ -0,0 +1,95 @@
+"""
+本地模拟 UniAPI（OpenAI 兼容的 /v1/chat/completions），用于在没有真实大模型时测试解题流程、模型探测与基准测试。
+
+用法（在 backend 目录下）：
+    python scripts/mock_uniapi.py --port 9000 --ttft 0.3 --tokens-per-second 80 --tokens 120 --error-rate 0.05
+
+然后在管理端（或 .env）把 UNIAPI_BASE_URL 设为 http://127.0.0.1:9000，Token 任意非空值。
+- 支持 stream=true（SSE 逐 token 输出，stream_options.include_usage 时最后附带 usage）与普通 JSON 响应；
+- 模型 ID 以 "error" 开头时总是返回 500，以 "slow" 开头时首 token 延迟翻倍，便于对比；
+- 知识点/语义情境识别请求（系统 prompt 要求输出 JSON 数组）返回固定的 JSON 数组。
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock UniAPI")
+options = argparse.Namespace(ttft=0.3, tokens_per_second=80.0, tokens=120, error_rate=0.0)
+
+
+def _answer(messages: list) -> list[str]:
+    system = next((m.get("content") or "" for m in messages if m.get("role") in ("system", "developer")), "")
+    if "JSON 数组" in system:
+        return ['["一元一次方程", "行程问题"]']
+    return [f"第{i + 1}步 " for i in range(options.tokens - 1)] + ["答案：2"]
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = str(body.get("model") or "")
+    messages = body.get("messages") or []
+    if model.startswith("error") or random.random() < options.error_rate:
+        return JSONResponse(status_code=500, content={"error": {"message": f"mock upstream error ({model})"}})
+    tokens = _answer(messages)
+    ttft = options.ttft * (2 if model.startswith("slow") else 1)
+    delay = 1 / options.tokens_per_second if options.tokens_per_second > 0 else 0
+    prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 2
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)}
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    if not body.get("stream"):
+        await asyncio.sleep(ttft + delay * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+    async def events():
+        await asyncio.sleep(ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(delay)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        if include_usage:
+            yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'model': model, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 UniAPI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--ttft", type=float, default=0.3, help="首 token 延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="流式输出速度")
+    parser.add_argument("--tokens", type=int, default=120, help="解题回答的 token 数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 500 的比例")
+    args = parser.parse_args()
+    options.ttft, options.tokens_per_second = args.ttft, args.tokens_per_second
+    options.tokens, options.error_rate = max(1, args.tokens), args.error_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
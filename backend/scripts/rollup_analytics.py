@@ -0,0 +1,43 @@
+"""
+管理端统计补算：按天从 solution_records 与归档表重算记录类汇总（record / knowledge / semantic）并补齐活跃用户。
+
+用法（在 backend 目录下，先执行 init_db.sql 创建 analytics_rollups 表）：
+    python scripts/rollup_analytics.py                          # 从最早一条记录补算到昨天
+    python scripts/rollup_analytics.py --start 2026-01-01 --end 2026-02-01
+    python scripts/rollup_analytics.py --summary                # 只输出今日概况
+
+每天一个事务（先删后写），可重复执行；也可通过 POST /api/admin/analytics/catchup 在服务内后台执行。
+解题次数与耗时只能实时累计，无法从历史记录补算。
+"""
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from database import SessionLocal
+from services.analytics import catch_up, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="补算管理端统计汇总")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="起始日期（含），默认最早一条记录的日期")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="结束日期（不含），默认且最晚为今天")
+    parser.add_argument("--summary", action="store_true", help="只输出今日概况后退出")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.summary:
+            print(json.dumps(catch_up(db, args.start, args.end), ensure_ascii=False))
+        print(json.dumps(summary(db), ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
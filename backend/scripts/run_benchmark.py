@@ -0,0 +1,68 @@
+"""
+命令行运行模型基准测试（不经过服务，也不写入 model_benchmarks），输出各模型汇总，适合对照本地模拟上游做测试。
+
+用法（在 backend 目录下）：
+    python scripts/mock_uniapi.py --port 9000 &
+    python scripts/run_benchmark.py --base-url http://127.0.0.1:9000 --token test --models gpt-a,slow-b,error-c --concurrency 4
+    python scripts/run_benchmark.py --models gpt-5.2 --questions questions.txt --json report.json   # 使用数据库中的 UniAPI 配置
+
+questions.txt 每行一道题；不传则使用内置题目集。管理端可通过 POST /api/admin/benchmarks 在服务内运行并保存报告。
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+_backend_dir = Path(__file__).resolve().parent.parent
+if str(_backend_dir) not in sys.path:
+    sys.path.insert(0, str(_backend_dir))
+
+from database import SessionLocal
+from services.benchmark import DEFAULT_QUESTIONS, execute
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型基准测试")
+    parser.add_argument("--models", required=True, help="逗号分隔的模型 ID")
+    parser.add_argument("--questions", default=None, help="题目文件（每行一道题），默认内置题目集")
+    parser.add_argument("--base-url", default=None, help="上游地址，默认读取 system_settings / 环境变量")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", default=None, help="把完整报告（含逐题结果）写入该文件")
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    if args.questions:
+        questions = [q.strip() for q in Path(args.questions).read_text(encoding="utf-8").splitlines() if q.strip()]
+    else:
+        questions = DEFAULT_QUESTIONS
+    base_url, token = args.base_url, args.token
+    if not base_url or not token:
+        from routers.solve import _get_uniapi_base_and_token
+
+        db = SessionLocal()
+        try:
+            db_base_url, db_token = _get_uniapi_base_and_token(db)
+        finally:
+            db.close()
+        base_url, token = base_url or db_base_url, token or db_token
+
+    report = asyncio.run(execute(models, questions, base_url, token, args.concurrency, args.repeat))
+    print(f"{len(questions)} questions x {len(models)} models x {args.repeat}, elapsed {report['elapsed_seconds']}s")
+    print(f"{'model':<24}{'req':>5}{'err%':>7}{'ttft p50':>10}{'ttft p95':>10}{'lat p50':>10}{'lat p95':>10}{'out tok':>9}{'tok/s':>8}")
+    for m in report["models"]:
+        error_rate = f"{m['error_rate'] * 100:.1f}" if m["error_rate"] is not None else "-"
+        print(
+            f"{m['model']:<24}{m['requests']:>5}{error_rate:>7}"
+            f"{m['ttft_ms']['p50'] or '-':>10}{m['ttft_ms']['p95'] or '-':>10}"
+            f"{m['latency_ms']['p50'] or '-':>10}{m['latency_ms']['p95'] or '-':>10}"
+            f"{m['completion_tokens'] or '-':>9}{m['completion_tokens_per_second'] or '-':>8}"
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# 跨路由共用的服务模块（缓存、后台任务、导出等）
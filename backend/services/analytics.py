@@ -0,0 +1,456 @@
+"""
+管理端统计：按小时/天把解题、保存记录、知识点/语义情境与活跃用户累计到 analytics_rollups，
+时间序列与排行只读取汇总表（主键按 粒度 + 指标 + 时间桶 排列，查询行数只与时间范围有关，与记录表大小无关）。
+
+- 实时：解题与保存接口调用 record_solve() / record_saved()，增量先累加在进程内，
+  每 ANALYTICS_FLUSH_SECONDS 秒（及应用关闭时）合并写入汇总表（MySQL 下为 INSERT ... ON DUPLICATE KEY UPDATE）；
+- 补算：catch_up() 按天从 solution_records 与归档表重算记录类指标（record / knowledge / semantic），
+  并补齐当天有保存记录的活跃用户；当天（仍在实时累加）不参与补算。
+- 统计的是发生过的活动：删除记录不会回退已累计的次数，补算则以补算时仍存在的记录为准。
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.analytics_rollup import AnalyticsRollup
+from models.archived_record import ArchivedRecord
+from models.record import SolutionRecord, build_tags
+from services.archive import unpack_archived
+
+# 指标：solve / solve_error 的维度为模型 ID（value_sum 为耗时毫秒），knowledge / semantic 为标签名，active_user 为用户 ID
+METRICS = ("solve", "solve_error", "record", "knowledge", "semantic", "active_user")
+# 同时按小时汇总的指标，其余只按天汇总
+HOURLY_METRICS = {"solve", "solve_error", "record"}
+# 可由 catch_up() 从记录表重算的指标
+RECORD_METRICS = ("record", "knowledge", "semantic")
+DIM_MAX_CHARS = 128
+
+_lock = threading.Lock()
+# (粒度, 指标, 时间桶, 维度) -> [次数, 数值累计]
+_pending: dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+_flushed = 0
+_flush_failures = 0
+_last_flush_at: float | None = None
+
+
+def floor_bucket(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add(metric: str, dim: str | None, ts: datetime, count: int = 1, value: float = 0.0) -> None:
+    dim = (dim or "")[:DIM_MAX_CHARS]
+    granularities = ("hour", "day") if metric in HOURLY_METRICS else ("day",)
+    with _lock:
+        for granularity in granularities:
+            entry = _pending[(granularity, metric, floor_bucket(ts, granularity), dim)]
+            entry[0] += count
+            entry[1] += value
+
+
+def record_solve(model: str, ok: bool, elapsed_ms: float, user_id: str | None = None) -> None:
+    """解题请求结束时调用：按模型累计次数与耗时，失败另计 solve_error。"""
+    if not settings.ANALYTICS_ENABLED:
+        return
+    now = datetime.now()
+    _add("solve", model, now, value=elapsed_ms)
+    if not ok:
+        _add("solve_error", model, now)
+    if user_id:
+        _add("active_user", user_id, now)
+
+
+def record_saved(user_id: str | None, tags: list | None, when: datetime | None = None) -> None:
+    """保存解题记录提交后调用：累计记录数、各知识点/语义情境出现次数与活跃用户。"""
+    if not settings.ANALYTICS_ENABLED:
+        return
+    when = when or datetime.now()
+    _add("record", None, when)
+    for tag in tags or []:
+        _add("knowledge" if tag.get("type") == "knowledge" else "semantic", tag.get("name"), when)
+    if user_id:
+        _add("active_user", user_id, when)
+
+
+def _key_filter(row: dict):
+    return and_(
+        AnalyticsRollup.granularity == row["granularity"],
+        AnalyticsRollup.metric == row["metric"],
+        AnalyticsRollup.bucket == row["bucket"],
+        AnalyticsRollup.dim == row["dim"],
+    )
+
+
+def _upsert_add(db: Session, rows: list[dict]) -> None:
+    """把增量累加到汇总表（不提交）。"""
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(AnalyticsRollup).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            count=AnalyticsRollup.count + stmt.inserted["count"],
+            value_sum=AnalyticsRollup.value_sum + stmt.inserted["value_sum"],
+        )
+        db.execute(stmt)
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        stmt = sqlite_insert(AnalyticsRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "metric", "bucket", "dim"],
+            set_={
+                "count": AnalyticsRollup.count + stmt.excluded["count"],
+                "value_sum": AnalyticsRollup.value_sum + stmt.excluded["value_sum"],
+            },
+        )
+        db.execute(stmt)
+        return
+    # 其他数据库：逐行 UPDATE，不存在再 INSERT
+    for row in rows:
+        updated = (
+            db.query(AnalyticsRollup)
+            .filter(_key_filter(row))
+            .update(
+                {
+                    AnalyticsRollup.count: AnalyticsRollup.count + row["count"],
+                    AnalyticsRollup.value_sum: AnalyticsRollup.value_sum + row["value_sum"],
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.add(AnalyticsRollup(**row))
+            db.flush()
+
+
+def _insert_missing(db: Session, rows: list[dict]) -> None:
+    """只插入汇总表中尚不存在的行（不提交），已存在的行保持不变。"""
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "mysql":
+        db.execute(mysql_insert(AnalyticsRollup).prefix_with("IGNORE").values(rows))
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(sqlite_insert(AnalyticsRollup).values(rows).on_conflict_do_nothing())
+        return
+    for row in rows:
+        if db.query(AnalyticsRollup.count).filter(_key_filter(row)).first() is None:
+            db.add(AnalyticsRollup(**row))
+    db.flush()
+
+
+def flush(db: Session | None = None) -> int:
+    """把进程内的增量写入汇总表，返回写入的行数；写入失败时增量放回，下次重试。"""
+    global _pending, _flushed, _flush_failures, _last_flush_at
+    with _lock:
+        pending, _pending = _pending, defaultdict(lambda: [0, 0.0])
+    if not pending:
+        return 0
+    rows = [
+        {"granularity": g, "metric": m, "bucket": b, "dim": d, "count": c, "value_sum": v}
+        for (g, m, b, d), (c, v) in pending.items()
+    ]
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        # 按主键顺序写入，减少多 worker 并发合并时的锁冲突
+        rows.sort(key=lambda r: (r["granularity"], r["metric"], r["bucket"], r["dim"]))
+        _upsert_add(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _lock:
+            for key, (c, v) in pending.items():
+                entry = _pending[key]
+                entry[0] += c
+                entry[1] += v
+            _flush_failures += 1
+        raise
+    finally:
+        if own_session:
+            db.close()
+    _flushed += len(rows)
+    _last_flush_at = time.time()
+    return len(rows)
+
+
+async def flush_loop() -> None:
+    """应用运行期间定期把增量写入汇总表（在线程池中执行）。"""
+    while True:
+        await asyncio.sleep(settings.ANALYTICS_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(flush)
+        except Exception as e:
+            print(f"[analytics] 写入汇总失败: {e}")
+
+
+def bucket_range(start: datetime, end: datetime, granularity: str) -> list[datetime]:
+    """[start, end) 内的全部时间桶起点。"""
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    buckets = []
+    current = floor_bucket(start, granularity)
+    while current < end:
+        buckets.append(current)
+        current += step
+    return buckets
+
+
+def _range_query(db: Session, metric: str, granularity: str, start: datetime, end: datetime, *columns):
+    return db.query(*columns).filter(
+        AnalyticsRollup.granularity == granularity,
+        AnalyticsRollup.metric == metric,
+        AnalyticsRollup.bucket >= start,
+        AnalyticsRollup.bucket < end,
+    )
+
+
+def _point(bucket: datetime, count: int, value_sum: float, metric: str) -> dict:
+    point = {"t": bucket.isoformat(), "count": int(count or 0)}
+    if metric == "solve":
+        point["avg_ms"] = round(value_sum / count, 1) if count else None
+    return point
+
+
+def _dim_item(dim: str, count, value_sum, metric: str) -> dict:
+    item = {"name": dim, "count": int(count or 0)}
+    if metric == "solve":
+        item["avg_ms"] = round(value_sum / count, 1) if count else None
+    return item
+
+
+def timeseries(
+    db: Session,
+    metric: str,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    dim: str | None = None,
+    by_dim: bool = False,
+    limit: int = 10,
+) -> dict:
+    """
+    [start, end) 的时间序列，缺失的时间桶补 0。active_user 的 count 为当天活跃用户数。
+    by_dim=True 时按维度分别给出序列（取区间内合计最多的 limit 个维度），如「每个模型每天的解题数」。
+    """
+    buckets = bucket_range(start, end, granularity)
+    if metric == "active_user":
+        agg = (func.count(), func.sum(AnalyticsRollup.value_sum))
+        by_dim = False
+        dim = None
+    else:
+        agg = (func.sum(AnalyticsRollup.count), func.sum(AnalyticsRollup.value_sum))
+    series: dict[str | None, dict] = {}
+    if by_dim:
+        dims = [
+            d for (d, _) in _range_query(db, metric, granularity, start, end, AnalyticsRollup.dim, agg[0])
+            .group_by(AnalyticsRollup.dim)
+            .order_by(agg[0].desc())
+            .limit(limit)
+            .all()
+        ]
+        if dims:
+            rows = (
+                _range_query(db, metric, granularity, start, end, AnalyticsRollup.dim, AnalyticsRollup.bucket, *agg)
+                .filter(AnalyticsRollup.dim.in_(dims))
+                .group_by(AnalyticsRollup.dim, AnalyticsRollup.bucket)
+                .all()
+            )
+        else:
+            rows = []
+        for d in dims:
+            series[d] = {}
+        for d, bucket, count, value_sum in rows:
+            series[d][bucket] = (count, value_sum)
+    else:
+        query = _range_query(db, metric, granularity, start, end, AnalyticsRollup.bucket, *agg)
+        if dim is not None:
+            query = query.filter(AnalyticsRollup.dim == dim[:DIM_MAX_CHARS])
+        series[dim] = {bucket: (count, value_sum) for bucket, count, value_sum in query.group_by(AnalyticsRollup.bucket)}
+    return {
+        "metric": metric,
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": [
+            {
+                "dim": d,
+                "points": [_point(b, *values.get(b, (0, 0.0)), metric) for b in buckets],
+            }
+            for d, values in series.items()
+        ],
+    }
+
+
+def top(db: Session, metric: str, start: datetime, end: datetime, limit: int = 10) -> list[dict]:
+    """[start, end) 内按次数排序的前 limit 个维度（按天汇总行计算）。"""
+    total = func.sum(AnalyticsRollup.count)
+    rows = (
+        _range_query(db, metric, "day", start, end, AnalyticsRollup.dim, total, func.sum(AnalyticsRollup.value_sum))
+        .group_by(AnalyticsRollup.dim)
+        .order_by(total.desc(), AnalyticsRollup.dim)
+        .limit(limit)
+        .all()
+    )
+    return [_dim_item(d, count, value_sum, metric) for d, count, value_sum in rows]
+
+
+def active_users(db: Session, start: datetime, end: datetime) -> int:
+    """[start, end) 内的去重活跃用户数。"""
+    return (
+        _range_query(db, "active_user", "day", start, end, func.count(func.distinct(AnalyticsRollup.dim))).scalar()
+        or 0
+    )
+
+
+def summary(db: Session) -> dict:
+    """今日解题/失败/保存数与平均解题耗时，以及今日、近 7 天、近 30 天的活跃用户数。"""
+    today = floor_bucket(datetime.now(), "day")
+    tomorrow = today + timedelta(days=1)
+    rows = dict(
+        (metric, (count, value_sum))
+        for metric, count, value_sum in db.query(
+            AnalyticsRollup.metric, func.sum(AnalyticsRollup.count), func.sum(AnalyticsRollup.value_sum)
+        )
+        .filter(
+            AnalyticsRollup.granularity == "day",
+            AnalyticsRollup.bucket == today,
+            AnalyticsRollup.metric.in_(("solve", "solve_error", "record")),
+        )
+        .group_by(AnalyticsRollup.metric)
+    )
+    solves, solve_ms = rows.get("solve", (0, 0.0))
+    return {
+        "date": today.date().isoformat(),
+        "solves": int(solves or 0),
+        "solve_errors": int(rows.get("solve_error", (0, 0))[0] or 0),
+        "avg_solve_ms": round(solve_ms / solves, 1) if solves else None,
+        "records": int(rows.get("record", (0, 0))[0] or 0),
+        "active_users": {
+            "today": active_users(db, today, tomorrow),
+            "last_7_days": active_users(db, today - timedelta(days=6), tomorrow),
+            "last_30_days": active_users(db, today - timedelta(days=29), tomorrow),
+        },
+    }
+
+
+def _aggregate_day(db: Session, day_start: datetime) -> tuple[dict, dict]:
+    """从热表与归档表汇总一天内的记录类指标，返回 (汇总行计数, 活跃用户计数)。"""
+    day_end = day_start + timedelta(days=1)
+    counts: dict[tuple, int] = defaultdict(int)
+    users: dict[str, int] = defaultdict(int)
+
+    def add(created_at: datetime | None, user_id: str | None, tags: list | None) -> None:
+        if created_at is None:
+            return
+        hour = floor_bucket(created_at, "hour")
+        counts[("hour", "record", hour, "")] += 1
+        counts[("day", "record", day_start, "")] += 1
+        for tag in tags or []:
+            name = (tag.get("name") or "")[:DIM_MAX_CHARS]
+            counts[("day", "knowledge" if tag.get("type") == "knowledge" else "semantic", day_start, name)] += 1
+        if user_id:
+            users[user_id] += 1
+
+    hot = (
+        db.query(
+            SolutionRecord.created_at,
+            SolutionRecord.user_id,
+            SolutionRecord.tags,
+            SolutionRecord.knowledge_points,
+            SolutionRecord.semantic_contexts,
+        )
+        .filter(SolutionRecord.created_at >= day_start, SolutionRecord.created_at < day_end)
+        .yield_per(settings.ANALYTICS_CATCHUP_BATCH_SIZE)
+    )
+    for r in hot:
+        add(r.created_at, r.user_id, r.tags if r.tags is not None else build_tags(r.knowledge_points, r.semantic_contexts))
+    archived = (
+        db.query(ArchivedRecord)
+        .filter(ArchivedRecord.created_at >= day_start, ArchivedRecord.created_at < day_end)
+        .yield_per(settings.ANALYTICS_CATCHUP_BATCH_SIZE)
+    )
+    for row in archived:
+        add(row.created_at, row.user_id, unpack_archived(row).get("tags"))
+    return counts, users
+
+
+def catch_up_until() -> date:
+    """补算的截止日期（不含）：今天，减去一个写入周期以避开其他 worker 尚未写入的昨日增量。"""
+    return (datetime.now() - timedelta(seconds=2 * settings.ANALYTICS_FLUSH_SECONDS)).date()
+
+
+def catch_up(db: Session, start: date | None = None, end: date | None = None) -> dict:
+    """
+    按天重算 [start, end) 的记录类汇总（每天一个事务：先删后写），并补齐活跃用户行。
+    start 默认为最早一条记录的日期，end 默认且最晚为 catch_up_until()。
+    """
+    limit = catch_up_until()
+    end = min(end or limit, limit)
+    if start is None:
+        oldest = [
+            db.query(func.min(model.created_at)).scalar() for model in (SolutionRecord, ArchivedRecord)
+        ]
+        oldest = [d for d in oldest if d is not None]
+        start = min(oldest).date() if oldest else end
+    days = rows = 0
+    current = start
+    while current < end:
+        day_start = datetime.combine(current, datetime.min.time())
+        counts, users = _aggregate_day(db, day_start)
+        try:
+            db.query(AnalyticsRollup).filter(
+                AnalyticsRollup.metric.in_(RECORD_METRICS),
+                or_(
+                    and_(AnalyticsRollup.granularity == "day", AnalyticsRollup.bucket == day_start),
+                    and_(
+                        AnalyticsRollup.granularity == "hour",
+                        AnalyticsRollup.bucket >= day_start,
+                        AnalyticsRollup.bucket < day_start + timedelta(days=1),
+                    ),
+                ),
+            ).delete(synchronize_session=False)
+            if counts:
+                db.bulk_insert_mappings(
+                    AnalyticsRollup,
+                    [
+                        {"granularity": g, "metric": m, "bucket": b, "dim": d, "count": c, "value_sum": 0.0}
+                        for (g, m, b, d), c in counts.items()
+                    ],
+                )
+            _insert_missing(
+                db,
+                [
+                    {"granularity": "day", "metric": "active_user", "bucket": day_start, "dim": u, "count": c, "value_sum": 0.0}
+                    for u, c in users.items()
+                ],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.expunge_all()
+        days += 1
+        rows += len(counts) + len(users)
+        current += timedelta(days=1)
+    return {"start": start.isoformat(), "end": end.isoformat(), "days": days, "rows": rows}
+
+
+def stats() -> dict:
+    with _lock:
+        pending = len(_pending)
+    return {
+        "enabled": settings.ANALYTICS_ENABLED,
+        "pending_rows": pending,
+        "flushed_rows": _flushed,
+        "flush_failures": _flush_failures,
+        "last_flush_at": _last_flush_at,
+        "flush_seconds": settings.ANALYTICS_FLUSH_SECONDS,
+    }
@@ -0,0 +1,178 @@
+"""
+解题记录冷热分层：把超过 ARCHIVE_AFTER_DAYS 天且未被收藏的记录从 solution_records（热表）
+移入 solution_records_archive（冷表），使热表及其索引保持在近期数据的规模。
+
+- 列表查询只访问热表；详情、删除、导出与统计通过冷表主键透明地找到已归档记录；
+- 被收藏的记录不归档（favorites.record_id 外键指向热表）；收藏已归档记录时会先将其恢复到热表。
+"""
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, func, insert, text
+from sqlalchemy.orm import Session, undefer
+
+from config import settings
+from models.archived_record import ArchivedRecord
+from models.favorite import Favorite
+from models.record import SolutionRecord
+from services.solution_codec import pack_solution
+
+
+def _pack(record: SolutionRecord) -> bytes:
+    data = {
+        "question": record.question,
+        "answer": record.answer,
+        "solution": record.get_solution(),
+        "knowledge_points": record.knowledge_points or [],
+        "semantic_contexts": record.semantic_contexts or [],
+        "tags": record.get_tags(),
+    }
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def unpack_archived(row: ArchivedRecord) -> dict:
+    """把冷表行还原为与 SolutionRecord.to_dict() 相同结构的字典。"""
+    data = json.loads(zlib.decompress(row.payload).decode("utf-8"))
+    data.update({
+        "id": row.id,
+        "user_id": row.user_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    })
+    return data
+
+
+def get_archived(db: Session, record_id: str) -> ArchivedRecord | None:
+    return db.query(ArchivedRecord).filter(ArchivedRecord.id == record_id).first()
+
+
+def archive_old_records(
+    db: Session,
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> dict:
+    """
+    分批归档旧记录，每批一个短事务。返回 {"archived": 条数, "batches": 批数, "cutoff": 截止时间}。
+    删除热表行时再次校验「无收藏」，避免与并发收藏竞争导致收藏被外键级联删除。
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.now() - timedelta(days=days)
+    not_favorited = ~exists().where(Favorite.record_id == SolutionRecord.id)
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = [
+            r.id
+            for r in db.query(SolutionRecord.id)
+            .filter(SolutionRecord.created_at < cutoff, not_favorited)
+            .order_by(SolutionRecord.created_at)
+            .limit(size)
+            .all()
+        ]
+        if not ids:
+            break
+        try:
+            records = (
+                db.query(SolutionRecord)
+                .options(undefer(SolutionRecord.solution), undefer(SolutionRecord.solution_compressed))
+                .filter(SolutionRecord.id.in_(ids))
+                .all()
+            )
+            db.execute(
+                insert(ArchivedRecord),
+                [
+                    {"id": r.id, "user_id": r.user_id, "created_at": r.created_at, "payload": _pack(r)}
+                    for r in records
+                ],
+            )
+            db.query(SolutionRecord).filter(SolutionRecord.id.in_(ids), not_favorited).delete(
+                synchronize_session=False
+            )
+            # 期间被收藏而未删除的行仍留在热表，撤销其冷表副本
+            kept = [r.id for r in db.query(SolutionRecord.id).filter(SolutionRecord.id.in_(ids)).all()]
+            if kept:
+                db.query(ArchivedRecord).filter(ArchivedRecord.id.in_(kept)).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.expunge_all()
+        archived += len(ids) - len(kept)
+        batches += 1
+    return {"archived": archived, "batches": batches, "cutoff": cutoff.isoformat()}
+
+
+def restore_records(db: Session, record_ids) -> set:
+    """把已归档的记录恢复到热表（不提交，由调用方提交），返回恢复的记录 ID。"""
+    rows = db.query(ArchivedRecord).filter(ArchivedRecord.id.in_(set(record_ids))).all()
+    if not rows:
+        return set()
+    values = []
+    for row in rows:
+        data = unpack_archived(row)
+        solution, solution_compressed = pack_solution(data.get("solution"))
+        values.append({
+            "id": row.id,
+            "question": data.get("question") or "",
+            "answer": data.get("answer"),
+            "solution": solution,
+            "solution_compressed": solution_compressed,
+            "knowledge_points": data.get("knowledge_points") or [],
+            "semantic_contexts": data.get("semantic_contexts") or [],
+            "tags": data.get("tags"),
+            "created_at": row.created_at,
+            "user_id": row.user_id,
+        })
+    db.execute(insert(SolutionRecord), values)
+    db.query(ArchivedRecord).filter(ArchivedRecord.id.in_([r.id for r in rows])).delete(synchronize_session=False)
+    return {r.id for r in rows}
+
+
+def tier_stats(db: Session) -> dict:
+    """冷热两层的行数、时间范围，以及（MySQL 与 SQLite 下）数据与索引占用字节数。"""
+    tiers = {}
+    for name, model in (("hot", SolutionRecord), ("archive", ArchivedRecord)):
+        count, oldest, newest = db.query(
+            func.count(model.id), func.min(model.created_at), func.max(model.created_at)
+        ).one()
+        tiers[name] = {
+            "table": model.__tablename__,
+            "rows": count,
+            "oldest": oldest.isoformat() if isinstance(oldest, datetime) else oldest,
+            "newest": newest.isoformat() if isinstance(newest, datetime) else newest,
+            "data_bytes": None,
+            "index_bytes": None,
+        }
+    if db.get_bind().dialect.name == "mysql":
+        rows = db.execute(
+            text(
+                "SELECT TABLE_NAME, DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN (:hot, :archive)"
+            ),
+            {"hot": SolutionRecord.__tablename__, "archive": ArchivedRecord.__tablename__},
+        ).all()
+        for table_name, data_length, index_length in rows:
+            for tier in tiers.values():
+                if tier["table"] == table_name:
+                    tier["data_bytes"] = int(data_length or 0)
+                    tier["index_bytes"] = int(index_length or 0)
+    elif db.get_bind().dialect.name == "sqlite":
+        # dbstat 虚拟表按页统计占用空间（需 SQLITE_ENABLE_DBSTAT_VTAB，未启用时保持 None）
+        try:
+            rows = db.execute(
+                text(
+                    "SELECT m.tbl_name, m.type, SUM(s.pgsize) FROM dbstat AS s "
+                    "JOIN sqlite_master AS m ON m.name = s.name "
+                    "WHERE m.tbl_name IN (:hot, :archive) GROUP BY m.tbl_name, m.type"
+                ),
+                {"hot": SolutionRecord.__tablename__, "archive": ArchivedRecord.__tablename__},
+            ).all()
+        except Exception:
+            rows = []
+        for table_name, kind, size in rows:
+            for tier in tiers.values():
+                if tier["table"] == table_name:
+                    key = "data_bytes" if kind == "table" else "index_bytes"
+                    tier[key] = (tier[key] or 0) + int(size or 0)
+    return {"archive_after_days": settings.ARCHIVE_AFTER_DAYS, "tiers": tiers}
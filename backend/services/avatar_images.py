@@ -0,0 +1,225 @@
+"""
+头像多尺寸 WebP 变体：上传后在独立进程池中裁剪为正方形并转码为 AVATAR_VARIANT_SIZES 各尺寸的 WebP，
+文件名为「原文件名主干.尺寸.webp」，与原图放在同一目录；生成完成后在单独的写库线程中把各尺寸 URL 写入
+头像指向该文件的所有用户的 users.avatar_variants。设置头像的接口在提交后才调度生成，避免生成先于提交完成而漏写。
+
+依赖 Pillow（可选，pip install Pillow）；未安装时不生成变体，按尺寸取图时回退到原图。
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.user import User
+from services import user_cache
+from services.avatar_storage import avatar_dir, avatar_url, local_avatar_name
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖
+    Image = ImageOps = None
+
+_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+# 回写 avatar_variants 的线程：不在进程池的结果处理线程（future 回调）中访问数据库
+_writer: ThreadPoolExecutor | None = None
+_warned = False
+
+
+def enabled() -> bool:
+    global _warned
+    if Image is None and not _warned:
+        _warned = True
+        print("[avatar] 未安装 Pillow，不生成头像缩略图（pip install Pillow）")
+    return Image is not None and bool(settings.AVATAR_VARIANT_SIZES)
+
+
+def variant_name(name: str, size: int) -> str:
+    return f"{Path(name).stem}.{size}.webp"
+
+
+def is_variant(name: str) -> bool:
+    parts = name.split(".")
+    return len(parts) == 3 and parts[1].isdigit() and parts[2] == "webp"
+
+
+def variant_urls(url: str | None) -> dict[str, str] | None:
+    """各尺寸变体均已生成时返回 {尺寸: URL}，否则返回 None。"""
+    name = local_avatar_name(url)
+    if not name or not settings.AVATAR_VARIANT_SIZES:
+        return None
+    directory = avatar_dir()
+    variants = {}
+    for size in settings.AVATAR_VARIANT_SIZES:
+        vname = variant_name(name, size)
+        if not (directory / vname).exists():
+            return None
+        variants[str(size)] = avatar_url(vname)
+    return variants
+
+
+def resolve_variant(name: str, size: int | None) -> Path | None:
+    """按请求尺寸选文件：不小于 size 的最小变体，没有则取最大变体，变体未生成时回退原图。"""
+    directory = avatar_dir()
+    original = directory / name
+    if not original.is_file():
+        return None
+    if not size:
+        return original
+    sizes = sorted(settings.AVATAR_VARIANT_SIZES)
+    candidates = [s for s in sizes if s >= size] or sizes[-1:]
+    for s in candidates + sizes[::-1]:
+        path = directory / variant_name(name, s)
+        if path.is_file():
+            return path
+    return original
+
+
+# 在子进程中执行，需保持为模块级函数以便 pickle
+def _render_variants(src: str, sizes: list[int], quality: int) -> dict[int, str]:
+    src_path = Path(src)
+    names = {}
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)
+        im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+        for size in sizes:
+            name = variant_name(src_path.name, size)
+            dest = src_path.with_name(name)
+            if not dest.exists():
+                thumb = ImageOps.fit(im, (size, size), Image.LANCZOS)
+                # 同一文件可能被并发调度两次，临时文件按任务唯一命名
+                fd, tmp = tempfile.mkstemp(dir=src_path.parent, prefix=f".{name}.", suffix=".tmp")
+                os.close(fd)
+                try:
+                    thumb.save(tmp, "WEBP", quality=quality, method=4)
+                    os.chmod(tmp, 0o644)
+                    os.replace(tmp, dest)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.unlink(tmp)
+                    raise
+            names[size] = name
+    return names
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, settings.AVATAR_IMAGE_WORKERS))
+        return _pool
+
+
+def _submit(name: str) -> Future:
+    return _get_pool().submit(
+        _render_variants, str(avatar_dir() / name), list(settings.AVATAR_VARIANT_SIZES), settings.AVATAR_WEBP_QUALITY
+    )
+
+
+def _get_writer() -> ThreadPoolExecutor:
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="avatar-variants")
+        return _writer
+
+
+def _record_variants(db: Session, name: str, variants: dict[str, str]) -> int:
+    """把变体 URL 写入当前头像指向原图 name 的用户，返回更新的用户数。"""
+    ids = [r.id for r in db.query(User.id).filter(User.avatar_url == avatar_url(name)).all()]
+    if ids:
+        db.query(User).filter(User.id.in_(ids)).update({User.avatar_variants: variants}, synchronize_session=False)
+        db.commit()
+        for user_id in ids:
+            user_cache.invalidate(user_id)
+    return len(ids)
+
+
+def _write_variants(name: str, variants: dict[str, str]) -> None:
+    db = SessionLocal()
+    try:
+        _record_variants(db, name, variants)
+    except Exception as e:
+        db.rollback()
+        print(f"[avatar] 写入缩略图 URL 失败 {name}: {e}")
+    finally:
+        db.close()
+
+
+def _on_done(name: str, future: Future) -> None:
+    # 在进程池的结果处理线程中执行，只做转交，不在此访问数据库
+    try:
+        names = future.result()
+    except Exception as e:
+        print(f"[avatar] 生成缩略图失败 {name}: {e}")
+        return
+    try:
+        _get_writer().submit(_write_variants, name, {str(s): avatar_url(n) for s, n in names.items()})
+    except RuntimeError:
+        pass  # 关闭过程中
+
+
+def schedule(url: str | None) -> None:
+    """
+    在进程池中为本站头像生成变体（已生成或非本站 URL 时不做任何事），完成后回写头像指向该文件的用户的
+    users.avatar_variants。设置头像的接口须在提交后调用。
+    """
+    name = local_avatar_name(url)
+    if not name or not enabled() or variant_urls(url) is not None:
+        return
+    _submit(name).add_done_callback(lambda f: _on_done(name, f))
+
+
+def apply(user: User) -> None:
+    """设置头像后、提交前调用：变体已存在时直接写入，否则清空；随后由调用方在提交后调用 schedule 生成。"""
+    user.avatar_variants = variant_urls(user.avatar_url)
+
+
+def backfill(db: Session, batch_size: int = 100) -> dict:
+    """为头像目录中缺少变体的原图批量生成变体，并回填 avatar_variants 为空的用户。"""
+    if not enabled():
+        return {"generated": 0, "failed": 0, "users": 0}
+    directory = avatar_dir()
+    originals = [
+        p.name for p in directory.iterdir()
+        if p.is_file() and not p.name.startswith(".") and not is_variant(p.name)
+    ]
+    generated = failed = 0
+    for i in range(0, len(originals), batch_size):
+        batch = [n for n in originals[i:i + batch_size] if variant_urls(avatar_url(n)) is None]
+        for name, future in [(n, _submit(n)) for n in batch]:
+            try:
+                future.result()
+                generated += 1
+            except Exception as e:
+                failed += 1
+                print(f"[avatar] 生成缩略图失败 {name}: {e}")
+        print(f"[avatar] 已处理 {min(i + batch_size, len(originals))}/{len(originals)} 个原图")
+    users = 0
+    rows = (
+        db.query(User.avatar_url)
+        .filter(User.avatar_url.isnot(None), User.avatar_variants.is_(None))
+        .distinct()
+        .all()
+    )
+    for (url,) in rows:
+        variants = variant_urls(url)
+        if variants:
+            users += _record_variants(db, local_avatar_name(url), variants)
+    return {"generated": generated, "failed": failed, "users": users}
+
+
+def shutdown() -> None:
+    global _pool, _writer
+    with _lock:
+        pool, _pool = _pool, None
+        writer, _writer = _writer, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    if writer is not None:
+        writer.shutdown(wait=True)
@@ -0,0 +1,190 @@
+"""
+头像文件存储：分块写入临时文件、超出大小立即中止、按文件头（magic bytes）识别图片类型，
+校验通过后原子重命名为最终文件名。
+
+- 文件名为内容的 SHA-256（内容寻址），相同图片只存一份；引用关系以 users.avatar_url 为准；
+- gc_orphans() 删除超过宽限期且未被任何用户引用的文件（含其缩略图与残留临时文件），
+  应用运行期间每 AVATAR_GC_INTERVAL_SECONDS 秒执行一次，也可通过管理端接口或脚本触发；
+- 上传接口为同步接口（在线程池中执行），文件读写不会占用事件循环；
+  另外 main.py 中的中间件会按 Content-Length 在读取请求体之前拒绝超大的上传。
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.user import User
+
+CHUNK_SIZE = 64 * 1024
+
+# 文件头 -> 规范扩展名
+_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+
+
+class AvatarError(Exception):
+    """头像校验/保存失败，code 与 message 对应接口返回的 errCode / errMsg。"""
+
+    def __init__(self, message: str, code: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def detect_image_type(head: bytes) -> str | None:
+    """按文件头识别图片类型，返回扩展名；无法识别返回 None。"""
+    for signature, ext in _SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def avatar_dir() -> Path:
+    """头像保存目录（backend/uploads/avatars）"""
+    base = Path(__file__).resolve().parent.parent
+    d = base / settings.UPLOAD_DIR / "avatars"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def avatar_url(name: str) -> str:
+    # 返回相对路径，前端用 BASE_URL + url 得到完整 URL
+    return f"/api/{settings.UPLOAD_DIR}/avatars/{name}"
+
+
+def local_avatar_name(url: str | None) -> str | None:
+    """本站上传的头像 URL -> 头像目录下的文件名；外部 URL 返回 None。"""
+    prefix = avatar_url("")
+    if not url or not url.startswith(prefix):
+        return None
+    name = url[len(prefix):]
+    if not name or "/" in name or name.startswith("."):
+        return None
+    return name
+
+
+def size_limit_message() -> str:
+    return f"图片大小不能超过 {settings.AVATAR_MAX_BYTES // (1024*1024)}MB"
+
+
+def save_avatar(src: BinaryIO) -> str:
+    """
+    把上传内容分块写入头像目录下的临时文件并校验，成功后原子重命名为「内容哈希.扩展名」，返回可访问的 URL。
+    相同内容的文件已存在时直接复用（并刷新修改时间，使其重新获得 GC 宽限期）。
+    超过 AVATAR_MAX_BYTES 或文件头不是允许的图片类型时抛出 AvatarError，临时文件会被删除。
+    """
+    directory = avatar_dir()
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            head = src.read(CHUNK_SIZE)
+            ext = detect_image_type(head)
+            if ext is None or ext not in settings.AVATAR_ALLOWED_EXTENSIONS:
+                raise AvatarError(f"仅支持图片格式：{', '.join(sorted(settings.AVATAR_ALLOWED_EXTENSIONS))}")
+            size = 0
+            digest = hashlib.sha256()
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.AVATAR_MAX_BYTES:
+                    raise AvatarError(size_limit_message())
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = src.read(CHUNK_SIZE)
+        name = f"{digest.hexdigest()}{ext}"
+        final = directory / name
+        if final.exists():
+            tmp_path.unlink(missing_ok=True)
+            os.utime(final)
+        else:
+            # mkstemp 创建的文件权限为 0600，改为 0644 以便以其他用户运行的 Web 服务器 / CDN 同步读取
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, final)
+        return avatar_url(name)
+    except AvatarError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    except OSError as e:
+        tmp_path.unlink(missing_ok=True)
+        raise AvatarError(f"保存失败: {e}", code=500)
+
+
+def _referenced_stems(db: Session) -> set[str]:
+    """被 users.avatar_url 引用的头像文件名主干（缩略图「主干.尺寸.webp」随原图一起保留）。"""
+    stems = set()
+    for (url,) in db.query(User.avatar_url).filter(User.avatar_url.isnot(None)).distinct():
+        name = local_avatar_name(url)
+        if name:
+            stems.add(name.split(".", 1)[0])
+    return stems
+
+
+def gc_orphans(db: Session, grace_seconds: float | None = None, dry_run: bool = False) -> dict:
+    """
+    删除未被任何用户引用、且最后修改超过宽限期的头像文件（含缩略图与上传残留的临时文件）。
+    宽限期保护刚上传、尚未提交资料（PATCH /profile）的文件。返回扫描、删除的文件数与回收字节数。
+    """
+    grace = settings.AVATAR_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    referenced = _referenced_stems(db)
+    cutoff = time.time() - grace
+    scanned = removed = reclaimed = 0
+    with os.scandir(avatar_dir()) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            scanned += 1
+            name = entry.name
+            if not name.startswith(".") and name.split(".", 1)[0] in referenced:
+                continue
+            st = entry.stat()
+            if st.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+            reclaimed += st.st_size
+    return {
+        "scanned": scanned,
+        "removed": removed,
+        "reclaimed_bytes": reclaimed,
+        "referenced": len(referenced),
+        "dry_run": dry_run,
+    }
+
+
+def _run_gc() -> dict:
+    db = SessionLocal()
+    try:
+        return gc_orphans(db)
+    finally:
+        db.close()
+
+
+async def gc_loop() -> None:
+    """应用运行期间定期清理孤儿头像文件（在线程池中执行）。"""
+    while True:
+        await asyncio.sleep(settings.AVATAR_GC_INTERVAL_SECONDS)
+        try:
+            result = await run_in_threadpool(_run_gc)
+            if result["removed"]:
+                print(f"[avatar-gc] 删除 {result['removed']} 个文件，回收 {result['reclaimed_bytes']} 字节")
+        except Exception as e:
+            print(f"[avatar-gc] 清理失败: {e}")
@@ -0,0 +1,368 @@
+"""
+模型基准测试：管理员选择若干模型与一组题目（默认 DEFAULT_QUESTIONS），以有界并发逐题调用解题接口（与 /solve 相同的 prompt），
+记录首 token 时间（TTFT）、总耗时、token 用量、错误率与输出长度，报告写入 model_benchmarks 供横向对比。
+
+- 请求使用流式输出（stream=true）以测量 TTFT；上游不支持流式、直接返回 JSON 时 TTFT 记为总耗时；
+- token 用量取上游返回的 usage（流式时通过 stream_options.include_usage 请求），上游未返回时为空；
+- 任务在启动它的 worker 的事件循环中运行，每 PROGRESS_SAVE_SECONDS 秒把进度与心跳写回数据库；
+  心跳超过 BENCHMARK_STALE_SECONDS 未更新（进程已退出）的任务在查询时标记为 failed；状态写回只作用于未结束的任务，
+  已被标记为 failed 或已取消的任务不会被运行中的 worker 改回；
+- 可在本地用 scripts/mock_uniapi.py 模拟上游（把 UNIAPI_BASE_URL 指向它）进行测试。
+"""
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.model_benchmark import ModelBenchmark
+
+DEFAULT_QUESTIONS = [
+    "小明从家到学校，每分钟走 60 米，需要 15 分钟。如果每分钟走 75 米，需要多少分钟？",
+    "一件商品按成本价提高 25% 后标价，再打八折出售，售价为 200 元。这件商品的成本价是多少元？",
+    "甲、乙两车同时从相距 360 千米的两地相向而行，甲车每小时行 50 千米，乙车每小时行 40 千米，几小时后两车相遇？",
+    "一个直角三角形的两条直角边分别为 6 cm 和 8 cm，求斜边上的高。",
+    "袋中有 3 个红球和 2 个白球，从中任取 2 个，求恰好取到 1 个红球和 1 个白球的概率。",
+]
+# 进度写回数据库的间隔（秒）
+PROGRESS_SAVE_SECONDS = 2.0
+
+# 未结束的任务状态（cancelling 表示已请求取消，由运行该任务的 worker 停止）
+ACTIVE_STATUSES = ("pending", "running", "cancelling")
+
+# benchmark_id -> asyncio.Task（仅本进程启动的任务）
+_tasks: dict[str, asyncio.Task] = {}
+_shutting_down = False
+
+
+def _percentile(sorted_values: list[float], p: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def _mean(values: list[float]) -> float | None:
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def summarize(items: list[dict]) -> dict:
+    """单个模型的汇总：请求数、错误率、TTFT 与总耗时的 p50/p95/均值、token 用量与输出长度。"""
+    ok = [i for i in items if i["success"]]
+    latency = sorted(i["latency_ms"] for i in ok)
+    ttft = sorted(i["ttft_ms"] for i in ok if i["ttft_ms"] is not None)
+    prompt_tokens = [i["prompt_tokens"] for i in ok if i["prompt_tokens"] is not None]
+    completion_tokens = [i["completion_tokens"] for i in ok if i["completion_tokens"] is not None]
+    total_seconds = sum(i["latency_ms"] for i in ok if i["completion_tokens"] is not None) / 1000
+    return {
+        "requests": len(items),
+        "errors": len(items) - len(ok),
+        "error_rate": round((len(items) - len(ok)) / len(items), 4) if items else None,
+        "latency_ms": {"p50": _percentile(latency, 50), "p95": _percentile(latency, 95), "mean": _mean(latency)},
+        "ttft_ms": {"p50": _percentile(ttft, 50), "p95": _percentile(ttft, 95), "mean": _mean(ttft)},
+        "prompt_tokens": sum(prompt_tokens) if prompt_tokens else None,
+        "completion_tokens": sum(completion_tokens) if completion_tokens else None,
+        "completion_tokens_per_second": round(sum(completion_tokens) / total_seconds, 1) if completion_tokens and total_seconds else None,
+        "output_chars": {"mean": _mean([i["output_chars"] for i in ok]), "max": max((i["output_chars"] for i in ok), default=None)},
+    }
+
+
+async def run_one(client: httpx.AsyncClient, base_url: str, token: str, model: str, question: str) -> dict:
+    """调用一次解题接口（流式），返回 TTFT、总耗时、token 用量与输出长度；失败时 success=False 并附错误信息。"""
+    from routers.solve import CHAT_COMPLETIONS_PATH, SOLVE_SYSTEM, _build_enhanced_user_message
+
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "developer", "content": SOLVE_SYSTEM},
+            {"role": "user", "content": _build_enhanced_user_message(question, [], [])},
+        ],
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    headers = {"Authorization": f"Bearer {token.strip()}", "Content-Type": "application/json"}
+    result = {
+        "model": model,
+        "question": question,
+        "success": False,
+        "ttft_ms": None,
+        "latency_ms": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "output_chars": 0,
+        "error": None,
+    }
+    parts: list[str] = []
+    usage = None
+    start = time.perf_counter()
+    try:
+        async with client.stream("POST", f"{base_url.rstrip('/')}{CHAT_COMPLETIONS_PATH}", json=payload, headers=headers) as resp:
+            if resp.status_code >= 400:
+                body = (await resp.aread()).decode("utf-8", "replace")
+                raise RuntimeError(f"HTTP {resp.status_code}: {body[:200]}")
+            if "text/event-stream" in resp.headers.get("content-type", ""):
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    for choice in chunk.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            if result["ttft_ms"] is None:
+                                result["ttft_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                            parts.append(delta)
+            else:
+                # 上游忽略 stream 参数，直接返回完整 JSON
+                data = json.loads(await resp.aread())
+                usage = data.get("usage")
+                choices = data.get("choices") or []
+                if choices:
+                    parts.append((choices[0].get("message") or {}).get("content") or "")
+                result["ttft_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        content = "".join(parts)
+        if not content:
+            raise RuntimeError("大模型返回内容为空")
+        result.update(success=True, output_chars=len(content))
+    except httpx.TimeoutException:
+        result["error"] = "请求超时"
+    except Exception as e:
+        result["error"] = str(e)[:300]
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    if usage:
+        result["prompt_tokens"] = usage.get("prompt_tokens")
+        result["completion_tokens"] = usage.get("completion_tokens")
+    return result
+
+
+def build_report(models: list[str], items: list[dict], elapsed_seconds: float) -> dict:
+    by_model = {m: [i for i in items if i["model"] == m] for m in models}
+    return {
+        "elapsed_seconds": round(elapsed_seconds, 2),
+        "models": [{"model": m, **summarize(rows)} for m, rows in by_model.items()],
+        "items": items,
+    }
+
+
+async def execute(
+    models: list[str],
+    questions: list[str],
+    base_url: str,
+    token: str,
+    concurrency: int,
+    repeat: int = 1,
+    on_result=None,
+) -> dict:
+    """按有界并发执行全部 (模型, 题目, 重复) 请求，返回报告；on_result(已完成数) 用于汇报进度。"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    items: list[dict] = []
+    started = time.perf_counter()
+
+    async def one(model: str, question: str) -> None:
+        async with semaphore:
+            items.append(await run_one(client, base_url, token, model, question))
+        if on_result is not None:
+            on_result(len(items))
+
+    async with httpx.AsyncClient(
+        timeout=settings.BENCHMARK_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=max(1, concurrency)),
+    ) as client:
+        await asyncio.gather(*(one(m, q) for m in models for q in questions for _ in range(max(1, repeat))))
+    order = {m: i for i, m in enumerate(models)}
+    qorder = {q: i for i, q in enumerate(questions)}
+    items.sort(key=lambda i: (order[i["model"]], qorder[i["question"]]))
+    return build_report(models, items, time.perf_counter() - started)
+
+
+def _update(benchmark_id: str, **values) -> str | None:
+    """更新未结束的任务行并刷新心跳，返回当前状态（任务不存在时返回 None；任务已结束时不更新，返回其最终状态）。"""
+    db = SessionLocal()
+    try:
+        values["heartbeat_at"] = datetime.now()
+        db.query(ModelBenchmark).filter(
+            ModelBenchmark.id == benchmark_id, ModelBenchmark.status.in_(ACTIVE_STATUSES)
+        ).update(values, synchronize_session=False)
+        db.commit()
+        row = db.query(ModelBenchmark.status).filter(ModelBenchmark.id == benchmark_id).first()
+        return row.status if row else None
+    finally:
+        db.close()
+
+
+async def _run(benchmark_id: str, models: list[str], questions: list[str], concurrency: int, repeat: int) -> None:
+    from routers.solve import _get_uniapi_base_and_token
+
+    def load_config():
+        db = SessionLocal()
+        try:
+            return _get_uniapi_base_and_token(db)
+        finally:
+            db.close()
+
+    progress = {"completed": 0}
+    current = asyncio.current_task()
+
+    def on_result(completed: int) -> None:
+        progress["completed"] = completed
+
+    async def save_progress() -> None:
+        # 定期写回进度与心跳；其他 worker 把状态改为 cancelling、判定任务已中断（failed）或删除任务时在这里停止。
+        # 写库失败时记录并继续，避免心跳中断后任务被其他 worker 判定为已中断
+        while True:
+            await asyncio.sleep(PROGRESS_SAVE_SECONDS)
+            try:
+                status = await run_in_threadpool(_update, benchmark_id, completed=progress["completed"])
+            except Exception as e:
+                print(f"[benchmark] 任务 {benchmark_id} 写回进度失败: {e}")
+                continue
+            if status not in ("pending", "running"):
+                current.cancel()
+                return
+
+    try:
+        base_url, token = await run_in_threadpool(load_config)
+        if not base_url or not (token or "").strip():
+            raise RuntimeError("未配置 UniAPI 地址或 Token")
+        await run_in_threadpool(_update, benchmark_id, status="running", started_at=datetime.now())
+        saver = asyncio.create_task(save_progress())
+        try:
+            report = await execute(models, questions, base_url, token, concurrency, repeat, on_result)
+        finally:
+            saver.cancel()
+        await run_in_threadpool(
+            _update, benchmark_id,
+            status="done", completed=progress["completed"], report=report, finished_at=datetime.now(),
+        )
+    except asyncio.CancelledError:
+        values = {"status": "cancelled"} if not _shutting_down else {"status": "failed", "error": "服务关闭，任务中断"}
+        await run_in_threadpool(
+            _update, benchmark_id, completed=progress["completed"], finished_at=datetime.now(), **values
+        )
+        raise
+    except Exception as e:
+        print(f"[benchmark] 任务 {benchmark_id} 失败: {e}")
+        await run_in_threadpool(_update, benchmark_id, status="failed", error=str(e)[:500], finished_at=datetime.now())
+    finally:
+        _tasks.pop(benchmark_id, None)
+
+
+# 以下三个函数各自打开会话，供异步接口经 run_in_threadpool 调用，事件循环中只做 start() / cancel()
+def create(row: ModelBenchmark) -> ModelBenchmark:
+    """保存新任务并返回（已脱离会话，属性均已加载）。"""
+    db = SessionLocal()
+    try:
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        return row
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_status(benchmark_id: str) -> str | None:
+    db = SessionLocal()
+    try:
+        row = db.query(ModelBenchmark.status).filter(ModelBenchmark.id == benchmark_id).first()
+        return row.status if row else None
+    finally:
+        db.close()
+
+
+def request_cancel(benchmark_id: str) -> None:
+    """把未结束的任务标记为 cancelling，由运行它的 worker 在下次写回进度时停止。"""
+    db = SessionLocal()
+    try:
+        db.query(ModelBenchmark).filter(
+            ModelBenchmark.id == benchmark_id, ModelBenchmark.status.in_(ACTIVE_STATUSES)
+        ).update({"status": "cancelling"}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def delete(benchmark_id: str) -> int:
+    db = SessionLocal()
+    try:
+        n = db.query(ModelBenchmark).filter(ModelBenchmark.id == benchmark_id).delete(synchronize_session=False)
+        db.commit()
+        return n
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start(row: ModelBenchmark) -> None:
+    """在当前事件循环中启动已提交的基准测试任务。"""
+    _tasks[row.id] = asyncio.create_task(
+        _run(row.id, list(row.models), list(row.questions), row.concurrency, row.repeat)
+    )
+
+
+def cancel(benchmark_id: str) -> bool:
+    """取消本进程中运行的任务；任务在其他 worker 上时返回 False，由调用方把状态改为 cancelling。"""
+    task = _tasks.get(benchmark_id)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
+
+
+def running_count() -> int:
+    return sum(1 for t in _tasks.values() if not t.done())
+
+
+def expire_stale(db: Session) -> int:
+    """把心跳超过 BENCHMARK_STALE_SECONDS 未更新的未完成任务（所在进程已退出）标记为 failed，返回条数。"""
+    cutoff = datetime.now() - timedelta(seconds=settings.BENCHMARK_STALE_SECONDS)
+    query = db.query(ModelBenchmark).filter(
+        ModelBenchmark.status.in_(ACTIVE_STATUSES),
+        func.coalesce(ModelBenchmark.heartbeat_at, ModelBenchmark.created_at) < cutoff,
+    )
+    if _tasks:
+        query = query.filter(ModelBenchmark.id.notin_(list(_tasks)))
+    n = query.update(
+        {"status": "failed", "error": "任务中断（服务重启）", "finished_at": datetime.now()}, synchronize_session=False
+    )
+    if n:
+        db.commit()
+    return n
+
+
+async def shutdown() -> None:
+    global _shutting_down
+    _shutting_down = True
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def compare(rows: list[ModelBenchmark]) -> list[dict]:
+    """多个已完成任务的各模型汇总并排，便于横向对比（每行一个 任务 × 模型）。"""
+    table = []
+    for row in rows:
+        for summary in (row.report or {}).get("models", []):
+            table.append({
+                "benchmark_id": row.id,
+                "name": row.name,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "question_count": len(row.questions or []),
+                **summary,
+            })
+    return table
@@ -0,0 +1,157 @@
+"""
+数据库连接池：可配置的池大小与存活检测策略，以及 GET /api/admin/metrics 中的实时连接池指标。
+
+- DB_PRE_PING=always：每次取出连接都先 ping（SQLAlchemy pool_pre_ping，多一次往返）；
+- DB_PRE_PING=idle（默认）：只有在池中空闲超过 DB_PRE_PING_IDLE_SECONDS 秒的连接才 ping，繁忙时连接被频繁复用，
+  几乎不产生额外往返；ping 失败时丢弃该连接并由连接池重新获取（最多重试 3 次）；
+- DB_PRE_PING=off：不检测，只依赖 DB_POOL_RECYCLE 定期重建连接；
+- 指标：当前池内空闲/借出/溢出连接数、累计借出次数、获取连接的平均/最大等待时间、等待超时次数、ping 次数与失败次数；
+  同时给出 AnyIO 线程池大小，便于按线程数（同步接口的最大并发）设置池容量。
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from config import settings
+
+PRE_PING_MODES = ("always", "idle", "off")
+_thread_limit: int | None = None
+
+
+class TimedQueuePool(QueuePool):
+    """记录获取连接耗时与超时次数的 QueuePool（耗时包含排队等待、新建连接与存活检测）。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.connects = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += elapsed
+                if elapsed > self.max_wait_seconds:
+                    self.max_wait_seconds = elapsed
+
+
+def engine_options(url: str) -> dict:
+    """create_engine 的连接池参数。"""
+    options = {"pool_recycle": settings.DB_POOL_RECYCLE, "pool_pre_ping": settings.DB_PRE_PING == "always"}
+    if url.startswith("sqlite") and ":memory:" in url:
+        return options  # 内存库使用 SingletonThreadPool，不支持池大小参数
+    options.update({
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    })
+    return options
+
+
+def _ping(dbapi_connection) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+def install(engine) -> None:
+    """注册连接池事件：记录连接创建次数与归还时间，DB_PRE_PING=idle 时对空闲过久的连接做存活检测。"""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["checkin_at"] = time.monotonic()
+        pool = engine.pool
+        if isinstance(pool, TimedQueuePool):
+            with pool._stats_lock:
+                pool.connects += 1
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checkin_at"] = time.monotonic()
+
+    if settings.DB_PRE_PING != "idle":
+        return
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        idle = time.monotonic() - connection_record.info.get("checkin_at", 0.0)
+        if idle < settings.DB_PRE_PING_IDLE_SECONDS:
+            return
+        pool = engine.pool
+        counted = isinstance(pool, TimedQueuePool)
+        try:
+            _ping(dbapi_connection)
+        except Exception as e:
+            if counted:
+                with pool._stats_lock:
+                    pool.pings += 1
+                    pool.ping_failures += 1
+            # 让连接池丢弃该连接并重新获取
+            raise exc.DisconnectionError(f"空闲连接已失效: {e}") from e
+        if counted:
+            with pool._stats_lock:
+                pool.pings += 1
+
+
+def set_thread_limit(total_tokens: int) -> None:
+    """记录 AnyIO 默认线程池大小（同步接口与 run_in_threadpool 的最大并发），在事件循环中启动时调用。"""
+    global _thread_limit
+    _thread_limit = total_tokens
+
+
+def capacity() -> int:
+    return settings.DB_POOL_SIZE + max(0, settings.DB_MAX_OVERFLOW)
+
+
+def stats(pool) -> dict:
+    data = {
+        "pool_class": type(pool).__name__,
+        "pre_ping": settings.DB_PRE_PING,
+        "pre_ping_idle_seconds": settings.DB_PRE_PING_IDLE_SECONDS if settings.DB_PRE_PING == "idle" else None,
+        "recycle_seconds": settings.DB_POOL_RECYCLE,
+        "threadpool_tokens": _thread_limit,
+    }
+    if not isinstance(pool, QueuePool):
+        return data
+    data.update({
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "capacity": capacity(),
+        "timeout_seconds": settings.DB_POOL_TIMEOUT,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # QueuePool.overflow() 在未用满 pool_size 时为负数（尚未创建的连接数）
+        "overflow": max(0, pool.overflow()),
+    })
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            checkouts, wait_seconds = pool.checkouts, pool.wait_seconds
+            data.update({
+                "checkouts": checkouts,
+                "timeouts": pool.timeouts,
+                "avg_wait_ms": round(wait_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+                "connects": pool.connects,
+                "pings": pool.pings,
+                "ping_failures": pool.ping_failures,
+            })
+    return data
@@ -0,0 +1,72 @@
+"""
+ETag 与条件 GET（If-None-Match）支持。
+
+- 版本型 ETag：make_etag(...) 由记录 ID、版本号等少量字段计算，命中时无需加载整行或序列化响应体；
+- 内容型 ETag：etag_json_response 对序列化后的响应体取哈希，命中时返回 304 省去传输。
+"""
+import hashlib
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+# 响应因用户而异：仅允许浏览器私有缓存，且每次使用前都要携带 If-None-Match 向服务端确认
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """由若干字段计算强 ETag（带双引号）。"""
+    raw = "\x1f".join("" if p is None else str(p) for p in parts)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（GET 使用弱比较：忽略 W/ 前缀；支持逗号分隔的多个值与 *）。"""
+    return if_none_match(request.headers.get("if-none-match"), etag)
+
+
+def if_none_match(header: str | None, etag: str) -> bool:
+    """按 If-None-Match 头的原始值判断是否命中，见 etag_matches。"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _cache_headers(etag: str, cache_control: str) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag, cache_control))
+
+
+def etag_bytes_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str = PRIVATE_REVALIDATE,
+) -> Response:
+    """已序列化的 JSON 响应体 + 给定 ETag：命中返回 304，否则返回 200。"""
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return Response(content=body, media_type="application/json", headers=_cache_headers(etag, cache_control))
+
+
+def etag_json_response(
+    request: Request,
+    model: BaseModel,
+    etag: str | None = None,
+    cache_control: str = PRIVATE_REVALIDATE,
+) -> Response:
+    """序列化 pydantic 响应并附带 ETag；未给定 etag 时按响应体内容计算。"""
+    body = model.model_dump_json().encode("utf-8")
+    if etag is None:
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    return etag_bytes_response(request, body, etag, cache_control)
@@ -0,0 +1,316 @@
+"""
+模型健康探测：MODEL_PROBE_INTERVAL_SECONDS > 0 时（默认关闭，每次探测都是计费的上游调用）后台定期并发探测
+所有启用的解题模型以及知识点、语义情境识别模型，结果写入 model_probe_results（保留一天），供管理端查看
+近 1 小时、近 1 天的 p50 / p95 延迟与可用率。
+
+- 多 worker 部署时只有一个 worker 探测：各 worker 每轮尝试在 system_settings 的 MODEL_PROBE_LEADER 行上
+  获取租约（持有者每轮续期，租约过期后由其他 worker 接手），因此每个模型每轮只被调用一次，各 worker 看到同一份历史；
+- 一轮探测内所有模型共用一个 httpx.AsyncClient（复用连接），并发数上限 MODEL_PROBE_CONCURRENCY；
+- 探测请求与 /admin/test/* 相同（最小 prompt），单次超时 MODEL_PROBE_TIMEOUT_SECONDS；
+- 管理端手动触发的测试（/admin/test/*、/admin/models/probe）只记入本进程的环形缓冲区，在健康视图中单独列出。
+"""
+import asyncio
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.model_probe_result import ModelProbeResult
+from models.solve_model import SolveModel
+from models.system_setting import SystemSetting
+
+# 解题模型的探测 prompt（与 /admin/test/solve 相同）；知识点/语义模型使用各自的系统 prompt
+SOLVE_PROBE_SYSTEM = "You are a helpful assistant. Reply only with the number 2."
+WINDOWS = {"1h": 3600, "24h": 86400}
+LEADER_KEY = "MODEL_PROBE_LEADER"
+# 手动测试结果在本进程内每个模型保留的条数
+MANUAL_HISTORY_SIZE = 50
+
+_lock = threading.Lock()
+# 手动测试：“类型:模型ID” -> deque[(时间戳, 延迟毫秒, 是否成功, 错误信息)]
+_manual: dict[str, deque] = {}
+_worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_is_leader = False
+_rounds = 0
+_last_round_at: float | None = None
+_last_round_ms: float | None = None
+
+
+def record(kind: str, model: str, latency_ms: float | None, ok: bool, error: str | None = None) -> None:
+    """记录一次手动测试结果（仅本进程）。"""
+    key = f"{kind}:{model}"
+    with _lock:
+        buf = _manual.get(key)
+        if buf is None:
+            buf = _manual[key] = deque(maxlen=MANUAL_HISTORY_SIZE)
+        buf.append((time.time(), latency_ms, ok, error))
+
+
+def _lease_seconds() -> float:
+    # 持有者每轮续期；错过两轮（进程退出或卡住）后由其他 worker 接手
+    return settings.MODEL_PROBE_INTERVAL_SECONDS * 2 + settings.MODEL_PROBE_TIMEOUT_SECONDS
+
+
+def _parse_lease(value: str | None) -> tuple[str | None, float]:
+    holder, _, expires = (value or "").rpartition(" ")
+    try:
+        return holder or None, float(expires)
+    except ValueError:
+        return None, 0.0
+
+
+def _claim_leader() -> bool:
+    """获取或续期探测租约（system_settings 中 MODEL_PROBE_LEADER = "worker_id 过期时间戳"），返回本进程是否为探测者。"""
+    now = time.time()
+    value = f"{_worker_id} {now + _lease_seconds():.0f}"
+    db = SessionLocal()
+    try:
+        row = db.query(SystemSetting).filter(SystemSetting.key == LEADER_KEY).with_for_update().first()
+        if row is None:
+            db.add(SystemSetting(key=LEADER_KEY, value=value))
+        else:
+            holder, expires = _parse_lease(row.value)
+            if holder != _worker_id and expires > now:
+                db.rollback()
+                return False
+            # 条件更新：与读取时的值相同才写入，避免两个 worker 同时接手过期租约
+            n = (
+                db.query(SystemSetting)
+                .filter(SystemSetting.key == LEADER_KEY, SystemSetting.value == row.value)
+                .update({"value": value}, synchronize_session=False)
+            )
+            if n != 1:
+                db.rollback()
+                return False
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def _release_leader() -> None:
+    db = SessionLocal()
+    try:
+        db.query(SystemSetting).filter(
+            SystemSetting.key == LEADER_KEY, SystemSetting.value.like(f"{_worker_id} %")
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _save_results(results: list[dict], probed_at: datetime) -> None:
+    """写入本轮结果并清理一天前的记录。"""
+    db = SessionLocal()
+    try:
+        db.add_all([
+            ModelProbeResult(
+                kind=r["kind"], model=r["model"], probed_at=probed_at,
+                latency_ms=r["durationMs"], success=r["success"], error=r["error"],
+            )
+            for r in results
+        ])
+        db.query(ModelProbeResult).filter(
+            ModelProbeResult.probed_at < probed_at - timedelta(seconds=WINDOWS["24h"])
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _targets() -> list[dict]:
+    """当前需要探测的模型：启用的解题模型 + 知识点 / 语义情境识别模型（各自的 Base URL 与 Token）。"""
+    # 延迟导入：UniAPI 配置的读取逻辑在 routers.solve 中，避免服务模块在导入时依赖路由
+    from routers import solve as solve_router
+
+    db = SessionLocal()
+    try:
+        base_url, token = solve_router._get_uniapi_base_and_token(db)
+        base_url_k, token_k = solve_router._get_uniapi_base_and_token_knowledge(db)
+        base_url_s, token_s = solve_router._get_uniapi_base_and_token_semantic(db)
+        model_k, model_s = solve_router._get_model_knowledge_and_semantic(db)
+        rows = (
+            db.query(SolveModel.model_id)
+            .filter(SolveModel.enabled == True)
+            .order_by(SolveModel.sort_order, SolveModel.id)
+            .all()
+        )
+    finally:
+        db.close()
+    solve_models = [r.model_id.strip() for r in rows if r.model_id and r.model_id.strip()]
+    if not solve_models:
+        solve_models = [o["id"] for o in solve_router._get_solve_model_options_from_env()]
+    targets = [
+        {"kind": "solve", "model": m, "base_url": base_url, "token": token, "system": SOLVE_PROBE_SYSTEM}
+        for m in solve_models
+    ]
+    targets.append({"kind": "knowledge", "model": model_k, "base_url": base_url_k, "token": token_k, "system": solve_router.KNOWLEDGE_SYSTEM})
+    targets.append({"kind": "semantic", "model": model_s, "base_url": base_url_s, "token": token_s, "system": solve_router.SEMANTIC_SYSTEM})
+    return [t for t in targets if t["model"] and t["base_url"] and (t["token"] or "").strip()]
+
+
+async def _probe(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, target: dict, manual: bool) -> dict:
+    from routers.solve import _call_uniapi
+
+    messages = [
+        {"role": "developer", "content": target["system"]},
+        {"role": "user", "content": "1+1=?"},
+    ]
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            await _call_uniapi(client, target["model"], messages, target["base_url"], target["token"])
+            ok, error = True, None
+        except httpx.TimeoutException:
+            ok, error = False, "请求超时"
+        except Exception as e:
+            ok, error = False, str(e)[:200]
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+    if manual:
+        record(target["kind"], target["model"], latency_ms, ok, error)
+    return {"kind": target["kind"], "model": target["model"], "success": ok, "durationMs": latency_ms, "error": error}
+
+
+async def probe_all(manual: bool = True) -> list[dict]:
+    """并发探测全部模型一轮，返回本轮各模型结果；manual=True（管理端手动触发）时结果只记入本进程。"""
+    global _rounds, _last_round_at, _last_round_ms
+    targets = await run_in_threadpool(_targets)
+    if not targets:
+        return []
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, settings.MODEL_PROBE_CONCURRENCY))
+    async with httpx.AsyncClient(timeout=settings.MODEL_PROBE_TIMEOUT_SECONDS) as client:
+        results = await asyncio.gather(*(_probe(client, semaphore, t, manual) for t in targets))
+    if not manual:
+        await run_in_threadpool(_save_results, list(results), datetime.now())
+        _rounds += 1
+        _last_round_at = time.time()
+        _last_round_ms = round((time.perf_counter() - started) * 1000, 1)
+    return list(results)
+
+
+async def probe_loop() -> None:
+    """应用运行期间定期探测全部模型；每轮先获取探测租约，只有持有租约的 worker 实际探测。"""
+    global _is_leader
+    try:
+        while True:
+            await asyncio.sleep(settings.MODEL_PROBE_INTERVAL_SECONDS)
+            try:
+                _is_leader = await run_in_threadpool(_claim_leader)
+                if _is_leader:
+                    await probe_all(manual=False)
+            except Exception as e:
+                print(f"[probe] 模型探测失败: {e}")
+    finally:
+        if _is_leader:
+            _is_leader = False
+            # 关闭时交还租约，其他 worker 下一轮即可接手
+            try:
+                _release_leader()
+            except Exception as e:
+                print(f"[probe] 释放探测租约失败: {e}")
+
+
+def _percentile(sorted_values: list[float], p: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _window_stats(samples: list[tuple], since: float) -> dict:
+    window = [s for s in samples if s[0] >= since]
+    latencies = sorted(s[1] for s in window if s[2] and s[1] is not None)
+    ok = sum(1 for s in window if s[2])
+    return {
+        "probes": len(window),
+        "success": ok,
+        "availability": round(ok / len(window), 4) if window else None,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+    }
+
+
+def _sample(row) -> tuple:
+    return (row.probed_at.timestamp(), row.latency_ms, bool(row.success), row.error)
+
+
+def _item(sample: tuple | None) -> dict | None:
+    if sample is None:
+        return None
+    return {"at": sample[0], "success": sample[2], "durationMs": sample[1], "error": sample[3]}
+
+
+def _leader(db: Session) -> dict:
+    row = db.query(SystemSetting.value).filter(SystemSetting.key == LEADER_KEY).first()
+    holder, expires = _parse_lease(row.value if row else None)
+    if holder is None or expires <= time.time():
+        return {"worker": None, "expires_at": None, "self": False}
+    return {"worker": holder, "expires_at": expires, "self": holder == _worker_id}
+
+
+def health(db: Session) -> dict:
+    """
+    各模型近 1 小时 / 近 1 天的定期探测次数、可用率与 p50/p95 延迟及最近一次结果（所有 worker 一致），
+    以及本进程最近一次手动测试结果。
+    """
+    now = time.time()
+    rows = (
+        db.query(ModelProbeResult)
+        .filter(ModelProbeResult.probed_at >= datetime.now() - timedelta(seconds=WINDOWS["24h"]))
+        .order_by(ModelProbeResult.probed_at)
+        .all()
+    )
+    samples: dict[str, list[tuple]] = {}
+    for row in rows:
+        samples.setdefault(f"{row.kind}:{row.model}", []).append(_sample(row))
+    with _lock:
+        manual = {key: buf[-1] for key, buf in _manual.items() if buf}
+    models = []
+    for key in sorted(set(samples) | set(manual)):
+        kind, model = key.split(":", 1)
+        periodic = samples.get(key, [])
+        models.append({
+            "kind": kind,
+            "model": model,
+            "windows": {name: _window_stats(periodic, now - seconds) for name, seconds in WINDOWS.items()},
+            "last": _item(periodic[-1] if periodic else None),
+            "last_manual": _item(manual.get(key)),
+        })
+    return {
+        "interval_seconds": settings.MODEL_PROBE_INTERVAL_SECONDS,
+        "leader": _leader(db),
+        "rounds": _rounds,
+        "last_round_at": _last_round_at,
+        "last_round_ms": _last_round_ms,
+        "models": models,
+    }
+
+
+def history(db: Session, kind: str, model: str, limit: int = 300) -> list[dict]:
+    """单个模型最近 limit 次定期探测明细（按时间升序），供前端画延迟曲线。"""
+    rows = (
+        db.query(ModelProbeResult)
+        .filter(ModelProbeResult.kind == kind, ModelProbeResult.model == model)
+        .order_by(ModelProbeResult.probed_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {"at": s[0], "durationMs": s[1], "success": s[2], "error": s[3]}
+        for s in (_sample(r) for r in reversed(rows))
+    ]
@@ -0,0 +1,128 @@
+"""
+bcrypt 哈希与校验：在独立的进程池中计算，不占用请求线程池与事件循环。
+
+- 进程数 PASSWORD_HASH_WORKERS，另外最多 PASSWORD_HASH_MAX_PENDING 个任务排队；
+  超出时立即返回 503 + Retry-After，而不是让请求在线程池里堆积；
+- 异步接口（登录、注册）使用 *_async 版本；同步接口（管理端）使用同步版本，等待期间不消耗 CPU，
+  超过 PASSWORD_HASH_TIMEOUT_SECONDS 未完成时同样返回 503。
+"""
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+from fastapi import HTTPException
+
+from config import settings
+
+_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+# 计算中 + 排队的任务名额；进程池重建时不替换，已提交任务的回调始终释放同一个信号量
+_capacity = max(1, settings.PASSWORD_HASH_WORKERS) + max(0, settings.PASSWORD_HASH_MAX_PENDING)
+_slots = threading.BoundedSemaphore(_capacity)
+_rejected = 0
+
+
+def _to_bcrypt_input(password: str) -> bytes:
+    """保证传入 bcrypt 的字节长度不超过 72，避免 ValueError。"""
+    raw = password.encode("utf-8")
+    if len(raw) > 72:
+        return hashlib.sha256(raw).hexdigest().encode("ascii")  # 64 字节
+    return raw
+
+
+# 以下两个函数在子进程中执行，需保持为模块级函数以便 pickle
+def _hashpw(data: bytes) -> str:
+    return bcrypt.hashpw(data, bcrypt.gensalt()).decode("ascii")
+
+
+def _checkpw(data: bytes, hashed: str) -> bool:
+    return bcrypt.checkpw(data, hashed.encode("ascii"))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, settings.PASSWORD_HASH_WORKERS))
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="服务繁忙，请稍后重试",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _submit(fn, *args) -> Future:
+    global _rejected
+    pool = _get_pool()
+    if not _slots.acquire(blocking=False):
+        _rejected += 1
+        raise _busy()
+    try:
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不可再用，重建一次
+            _reset_pool(pool)
+            future = _get_pool().submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _wait(future: Future):
+    try:
+        return future.result(timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        future.cancel()  # 仍在排队时撤销，立即归还名额
+        raise _busy()
+
+
+def hash_password(password: str) -> str:
+    return _wait(_submit(_hashpw, _to_bcrypt_input(password)))
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _wait(_submit(_checkpw, _to_bcrypt_input(plain), hashed))
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(_hashpw, _to_bcrypt_input(password)))
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await asyncio.wrap_future(_submit(_checkpw, _to_bcrypt_input(plain), hashed))
+
+
+def stats() -> dict:
+    """进程数、当前占用（计算中 + 排队）与累计拒绝次数。"""
+    return {
+        "workers": max(1, settings.PASSWORD_HASH_WORKERS),
+        "capacity": _capacity,
+        "in_use": _capacity - _slots._value,
+        "rejected": _rejected,
+    }
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,194 @@
+"""
+只读副本路由：配置 DB_REPLICA_URLS 后，读多写少的 GET 接口（通过 database.get_read_db 取得会话）分流到 MySQL 只读副本。
+
+- 选择策略 DB_REPLICA_STRATEGY：round_robin 轮询健康副本；least_latency 选健康检查延迟（指数平滑）最低的副本；
+- 健康检查：每 DB_REPLICA_CHECK_SECONDS 秒对每个副本执行 SELECT 1，失败即摘除；DB_REPLICA_MAX_LAG_SECONDS > 0 时
+  同时读取复制延迟（SHOW REPLICA STATUS，需 REPLICATION CLIENT 权限），超过阈值或复制中断时摘除；
+  请求中遇到连接断开也立即摘除，下次检查成功后恢复；没有健康副本时回退主库；
+- 写后读一致（read-your-writes）：同一客户端（按认证 token，匿名按 IP）的写请求成功后 DB_READ_STICKY_SECONDS 秒内，
+  其读请求仍走主库。本进程内按客户端记录，并在响应中设置短期 Cookie，多 worker 部署时其他进程也能识别。
+"""
+import asyncio
+import hashlib
+import itertools
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, text
+
+from config import settings
+from services import db_pool
+
+STICKY_COOKIE = "mathpro_rw"
+# 写后粘滞记录上限，超过时清理已过期的条目
+_STICKY_MAX_ENTRIES = 10000
+
+_lock = threading.Lock()
+_replicas: list["Replica"] | None = None
+_round_robin = itertools.count()
+_sticky: dict[str, float] = {}
+_counters = {"replica": 0, "primary_sticky": 0, "primary_fallback": 0}
+
+
+class Replica:
+    def __init__(self, url: str):
+        options = db_pool.engine_options(url)
+        if url.startswith("mysql"):
+            options["connect_args"] = {"connect_timeout": max(1, int(settings.DB_REPLICA_CHECK_TIMEOUT))}
+        self.engine = create_engine(url, echo=False, **options)
+        db_pool.install(self.engine)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = False
+        self.latency_ms: float | None = None
+        self.lag_seconds: float | None = None
+        self.last_error: str | None = None
+        self.checked_at: float | None = None
+        self.failures = 0
+
+        @event.listens_for(self.engine, "handle_error")
+        def on_error(context):
+            # 请求中连接断开：立即摘除，等待下一次健康检查恢复
+            if context.is_disconnect:
+                self.mark_down(str(context.original_exception)[:200])
+
+    def mark_down(self, error: str) -> None:
+        self.healthy = False
+        self.failures += 1
+        self.last_error = error
+
+    def check(self) -> None:
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                latency = (time.perf_counter() - start) * 1000
+                lag = _replication_lag(conn) if settings.DB_REPLICA_MAX_LAG_SECONDS > 0 else None
+        except Exception as e:
+            self.mark_down(str(e)[:200])
+            return
+        finally:
+            self.checked_at = time.time()
+        self.latency_ms = latency if self.latency_ms is None else round(0.7 * self.latency_ms + 0.3 * latency, 3)
+        self.lag_seconds = lag
+        if lag is not None and (lag < 0 or lag > settings.DB_REPLICA_MAX_LAG_SECONDS):
+            self.mark_down("复制已中断" if lag < 0 else f"复制延迟 {lag:.0f} 秒")
+            return
+        self.healthy = True
+        self.last_error = None
+
+
+def _replication_lag(conn) -> float | None:
+    """复制延迟秒数；复制线程未运行时返回 -1，无权限或非副本时返回 None（不据此摘除）。"""
+    if conn.dialect.name != "mysql":
+        return None
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"), ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            row = conn.execute(text(statement)).mappings().first()
+        except Exception:
+            continue
+        if row is None:
+            return None
+        value = row.get(column)
+        return -1.0 if value is None else float(value)
+    return None
+
+
+def replicas() -> list[Replica]:
+    global _replicas
+    if _replicas is None:
+        with _lock:
+            if _replicas is None:
+                _replicas = [Replica(url) for url in settings.DB_REPLICA_URLS]
+    return _replicas
+
+
+def enabled() -> bool:
+    return bool(settings.DB_REPLICA_URLS)
+
+
+def choose():
+    """按策略选择一个健康副本的 engine；未配置或没有健康副本时返回 None（使用主库）。"""
+    if not enabled():
+        return None
+    healthy = [r for r in replicas() if r.healthy]
+    if not healthy:
+        _counters["primary_fallback"] += 1
+        return None
+    if settings.DB_REPLICA_STRATEGY == "least_latency":
+        replica = min(healthy, key=lambda r: r.latency_ms if r.latency_ms is not None else float("inf"))
+    else:
+        replica = healthy[next(_round_robin) % len(healthy)]
+    _counters["replica"] += 1
+    return replica.engine
+
+
+def count_sticky_read() -> None:
+    _counters["primary_sticky"] += 1
+
+
+def check_all() -> None:
+    for replica in replicas():
+        replica.check()
+
+
+async def check_loop() -> None:
+    """应用运行期间定期检查各副本的健康状态与复制延迟。"""
+    while True:
+        try:
+            await run_in_threadpool(check_all)
+        except Exception as e:
+            print(f"[replica] 健康检查失败: {e}")
+        await asyncio.sleep(settings.DB_REPLICA_CHECK_SECONDS)
+
+
+def client_key(headers, client_host: str | None) -> str:
+    """写后粘滞的客户端标识：有认证 token（用户或管理员）时取其哈希，否则取客户端 IP。"""
+    token = headers.get("authorization") or headers.get("x-admin-token")
+    if token:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+    return f"ip:{client_host or ''}"
+
+
+def mark_write(key: str) -> None:
+    now = time.monotonic()
+    with _lock:
+        if len(_sticky) >= _STICKY_MAX_ENTRIES:
+            for k in [k for k, until in _sticky.items() if until <= now]:
+                del _sticky[k]
+        _sticky[key] = now + settings.DB_READ_STICKY_SECONDS
+
+
+def is_sticky(key: str) -> bool:
+    until = _sticky.get(key)
+    return until is not None and until > time.monotonic()
+
+
+def dispose() -> None:
+    if _replicas:
+        for replica in _replicas:
+            replica.engine.dispose()
+
+
+def stats() -> dict:
+    if not enabled():
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "strategy": settings.DB_REPLICA_STRATEGY,
+        "sticky_seconds": settings.DB_READ_STICKY_SECONDS,
+        "reads": dict(_counters),
+        "replicas": [
+            {
+                "name": r.name,
+                "healthy": r.healthy,
+                "latency_ms": r.latency_ms,
+                "lag_seconds": r.lag_seconds,
+                "failures": r.failures,
+                "last_error": r.last_error,
+                "checked_at": r.checked_at,
+                "pool": db_pool.stats(r.engine.pool),
+            }
+            for r in replicas()
+        ],
+    }
@@ -0,0 +1,456 @@
+"""
+离线分析快照：把解题记录（含冷表）、展平的标签、收藏与用户在同一个一致性读视图中导出为本地列式文件，
+供数据分析直接读取文件，不再对线上主库跑临时 SQL。
+
+目录结构（SNAPSHOT_DIR/<快照ID>/）：
+
+    records/date=YYYY-MM-DD/{hot,archive}.parquet   解题记录，按创建日期分区（archive 为冷表中的记录）
+    record_tags/date=YYYY-MM-DD/{hot,archive}.parquet  展平的标签：每个 (记录, 标签) 一行
+    favorites/part.parquet                          收藏（全量）
+    users/part.parquet                              用户（全量，不含密码哈希）
+    manifest.json                                   模式、时间窗口、各表行数与文件列表
+
+- 格式：parquet / arrow（Arrow IPC 文件）需要可选依赖 pyarrow（zstd 压缩）；未安装时只能使用 ndjson（gzip 压缩的 NDJSON）；
+- 一致性：MySQL 上在 REPEATABLE READ 下 START TRANSACTION WITH CONSISTENT SNAPSHOT，各表读取同一时刻的数据；
+- 内存：按 (created_at, id) 顺序用服务端游标（yield_per）每次读取 SNAPSHOT_CHUNK_ROWS 行，凑满一批即写出一个行组，
+  内存占用与数据量无关；
+- 增量：incremental 时只导出上一个快照水位之后创建的记录与标签（记录保存后不可变），收藏与用户体量小且可变，每次全量导出；
+  水位为开始时间减去 WATERMARK_LAG_SECONDS，避免遗漏开始时尚未提交的写入；删除只能通过全量快照体现；
+- 先写入临时目录，写完 manifest.json 后再重命名为正式目录，未完成的快照不会被分析方或下一次增量读到。
+"""
+import gzip
+import json
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.archived_record import ArchivedRecord
+from models.favorite import Favorite
+from models.record import SolutionRecord, build_tags
+from models.user import User
+from services.archive import unpack_archived
+from services.solution_codec import unpack_solution
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # 可选依赖
+    pyarrow = None
+
+FORMATS = ("parquet", "arrow", "ndjson")
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "ndjson": ".ndjson.gz"}
+WATERMARK_LAG_SECONDS = 60
+
+# 各表列定义：(列名, 类型)，类型为 string / timestamp / bool / list
+TABLES = {
+    "records": [
+        ("id", "string"),
+        ("user_id", "string"),
+        ("created_at", "timestamp"),
+        ("question", "string"),
+        ("answer", "string"),
+        ("solution", "string"),
+        ("knowledge_points", "list"),
+        ("semantic_contexts", "list"),
+        ("archived", "bool"),
+    ],
+    "record_tags": [
+        ("record_id", "string"),
+        ("user_id", "string"),
+        ("created_at", "timestamp"),
+        ("name", "string"),
+        ("type", "string"),
+    ],
+    "favorites": [
+        ("id", "string"),
+        ("record_id", "string"),
+        ("user_id", "string"),
+        ("created_at", "timestamp"),
+    ],
+    "users": [
+        ("id", "string"),
+        ("username", "string"),
+        ("nickname", "string"),
+        ("disabled", "bool"),
+        ("created_at", "timestamp"),
+    ],
+}
+
+_lock = threading.Lock()
+_running: dict | None = None
+
+
+class SnapshotError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def available_formats() -> list[str]:
+    return list(FORMATS) if pyarrow is not None else ["ndjson"]
+
+
+def default_format() -> str:
+    fmt = settings.SNAPSHOT_FORMAT
+    return fmt if fmt in available_formats() else "ndjson"
+
+
+def snapshot_dir() -> Path:
+    d = Path(settings.SNAPSHOT_DIR)
+    if not d.is_absolute():
+        d = Path(__file__).resolve().parent.parent / d
+    return d
+
+
+def _arrow_schema(columns: list[tuple[str, str]]):
+    types = {
+        "string": pyarrow.string(),
+        "timestamp": pyarrow.timestamp("us"),
+        "bool": pyarrow.bool_(),
+        "list": pyarrow.list_(pyarrow.string()),
+    }
+    return pyarrow.schema([(name, types[kind]) for name, kind in columns])
+
+
+class _FileWriter:
+    """单个输出文件：rows 按批写入，parquet 每批一个行组。"""
+
+    def __init__(self, path: Path, fmt: str, columns: list[tuple[str, str]]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        if fmt == "ndjson":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            return
+        self._schema = _arrow_schema(columns)
+        if fmt == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(str(path), self._schema, compression="zstd")
+        else:
+            options = pyarrow.ipc.IpcWriteOptions(compression="zstd")
+            self._writer = pyarrow.ipc.new_file(str(path), self._schema, options=options)
+
+    def write(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        if self.fmt == "ndjson":
+            for row in rows:
+                self._file.write(json.dumps(row, ensure_ascii=False, default=_json_default))
+                self._file.write("\n")
+        else:
+            self._writer.write_batch(pyarrow.RecordBatch.from_pylist(rows, schema=self._schema))
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        if self.fmt == "ndjson":
+            self._file.close()
+        else:
+            self._writer.close()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+class _TableWriter:
+    """
+    把一张表的行写入（可按日期分区的）文件。行须按分区键有序到达：分区变化时关闭当前文件，
+    缓冲满 SNAPSHOT_CHUNK_ROWS 行时写出一批。
+    """
+
+    def __init__(self, root: Path, table: str, fmt: str, name: str, partitioned: bool):
+        self.root = root
+        self.table = table
+        self.fmt = fmt
+        self.name = name
+        self.partitioned = partitioned
+        self.columns = TABLES[table]
+        self.files: list[dict] = []
+        self._current: _FileWriter | None = None
+        self._partition: str | None = None
+        self._buffer: list[dict] = []
+
+    def _open(self, partition: str | None) -> None:
+        self._close()
+        rel = Path(self.table)
+        if partition is not None:
+            rel = rel / f"date={partition}"
+        self._current = _FileWriter(self.root / rel / f"{self.name}{EXTENSIONS[self.fmt]}", self.fmt, self.columns)
+        self._partition = partition
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._current.write(self._buffer)
+            self._buffer = []
+
+    def _close(self) -> None:
+        if self._current is None:
+            return
+        self._flush()
+        self._current.close()
+        self.files.append({
+            "path": self._current.path.relative_to(self.root).as_posix(),
+            "rows": self._current.rows,
+            "bytes": self._current.path.stat().st_size,
+        })
+        self._current = None
+
+    def add(self, row: dict) -> None:
+        partition = None
+        if self.partitioned:
+            created_at = row.get("created_at")
+            partition = created_at.date().isoformat() if created_at else "unknown"
+        if self._current is None or partition != self._partition:
+            self._open(partition)
+        self._buffer.append(row)
+        if len(self._buffer) >= settings.SNAPSHOT_CHUNK_ROWS:
+            self._flush()
+
+    def close(self) -> int:
+        """关闭最后一个文件，返回本写入器写出的行数。"""
+        if self._current is None and not self.files and not self.partitioned:
+            # 空表也写出一个只有表头的文件，便于下游按固定路径读取
+            self._open(None)
+        self._close()
+        return sum(f["rows"] for f in self.files)
+
+
+def _consistent_session() -> Session:
+    """打开一个读一致性会话：MySQL 上所有查询共享同一个 InnoDB 读视图，SQLite 上共享同一个读事务（WAL 快照）。"""
+    db = SessionLocal()
+    if db.bind.dialect.name == "mysql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        db.execute(text("START TRANSACTION WITH CONSISTENT SNAPSHOT"))
+    elif db.bind.dialect.name == "sqlite":
+        # pysqlite 默认不为 SELECT 开启事务，显式 BEGIN 后各查询读取同一快照
+        db.connection().exec_driver_sql("BEGIN")
+    return db
+
+
+def _window(query, column, since: datetime | None, until: datetime):
+    """增量快照取 [since, until)；全量快照取 until 之前的全部行（含缺少创建时间的历史行）。"""
+    if since is not None:
+        return query.filter(column >= since, column < until)
+    return query.filter(or_(column < until, column.is_(None)))
+
+
+def _tag_rows(record_id: str, user_id: str | None, created_at: datetime | None, tags: list) -> list[dict]:
+    return [
+        {"record_id": record_id, "user_id": user_id, "created_at": created_at, "name": t.get("name"), "type": t.get("type")}
+        for t in tags or []
+        if isinstance(t, dict)
+    ]
+
+
+def _record_row(record_id, user_id, created_at, question, answer, solution, tags, archived: bool) -> dict:
+    return {
+        "id": record_id,
+        "user_id": user_id,
+        "created_at": created_at,
+        "question": question,
+        "answer": answer,
+        "solution": solution,
+        "knowledge_points": [t["name"] for t in tags if isinstance(t, dict) and t.get("type") == "knowledge"],
+        "semantic_contexts": [t["name"] for t in tags if isinstance(t, dict) and t.get("type") == "semantic"],
+        "archived": archived,
+    }
+
+
+def _export_records(db: Session, root: Path, fmt: str, since: datetime | None, until: datetime, progress: dict) -> dict:
+    chunk = settings.SNAPSHOT_CHUNK_ROWS
+    result = {"records": [], "record_tags": []}
+
+    hot = _window(
+        db.query(
+            SolutionRecord.id, SolutionRecord.user_id, SolutionRecord.created_at, SolutionRecord.question,
+            SolutionRecord.answer, SolutionRecord.solution, SolutionRecord.solution_compressed,
+            SolutionRecord.knowledge_points, SolutionRecord.semantic_contexts, SolutionRecord.tags,
+        ),
+        SolutionRecord.created_at, since, until,
+    ).order_by(SolutionRecord.created_at, SolutionRecord.id)
+    records = _TableWriter(root, "records", fmt, "hot", partitioned=True)
+    tags_writer = _TableWriter(root, "record_tags", fmt, "hot", partitioned=True)
+    for r in hot.yield_per(chunk):
+        tags = r.tags if r.tags is not None else build_tags(r.knowledge_points, r.semantic_contexts)
+        records.add(_record_row(
+            r.id, r.user_id, r.created_at, r.question, r.answer,
+            unpack_solution(r.solution, r.solution_compressed), tags, False,
+        ))
+        for row in _tag_rows(r.id, r.user_id, r.created_at, tags):
+            tags_writer.add(row)
+        progress["records"] += 1
+    records.close()
+    tags_writer.close()
+    result["records"] += records.files
+    result["record_tags"] += tags_writer.files
+
+    cold = _window(db.query(ArchivedRecord), ArchivedRecord.created_at, since, until).order_by(
+        ArchivedRecord.created_at, ArchivedRecord.id
+    )
+    records = _TableWriter(root, "records", fmt, "archive", partitioned=True)
+    tags_writer = _TableWriter(root, "record_tags", fmt, "archive", partitioned=True)
+    for row in cold.yield_per(chunk):
+        data = unpack_archived(row)
+        tags = data.get("tags") or []
+        records.add(_record_row(
+            row.id, row.user_id, row.created_at, data.get("question"), data.get("answer"),
+            data.get("solution"), tags, True,
+        ))
+        for tag_row in _tag_rows(row.id, row.user_id, row.created_at, tags):
+            tags_writer.add(tag_row)
+        progress["records"] += 1
+    records.close()
+    tags_writer.close()
+    result["records"] += records.files
+    result["record_tags"] += tags_writer.files
+    return result
+
+
+def _export_full(db: Session, root: Path, fmt: str, table: str, query, to_row) -> list[dict]:
+    writer = _TableWriter(root, table, fmt, "part", partitioned=False)
+    for r in query.yield_per(settings.SNAPSHOT_CHUNK_ROWS):
+        writer.add(to_row(r))
+    writer.close()
+    return writer.files
+
+
+def list_snapshots() -> list[dict]:
+    """已完成的快照（读取各目录的 manifest.json），按 ID（即开始时间）倒序。"""
+    base = snapshot_dir()
+    if not base.is_dir():
+        return []
+    items = []
+    for manifest in base.glob("*/manifest.json"):
+        if manifest.parent.name.startswith("."):
+            continue
+        try:
+            items.append(json.loads(manifest.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    items.sort(key=lambda m: m["id"], reverse=True)
+    return items
+
+
+def get_snapshot(snapshot_id: str) -> dict | None:
+    if not snapshot_id or "/" in snapshot_id or "\\" in snapshot_id or snapshot_id.startswith("."):
+        return None
+    path = snapshot_dir() / snapshot_id / "manifest.json"
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def delete_snapshot(snapshot_id: str) -> bool:
+    if get_snapshot(snapshot_id) is None:
+        return False
+    shutil.rmtree(snapshot_dir() / snapshot_id)
+    return True
+
+
+def running() -> dict | None:
+    """本进程正在运行的快照任务进度。"""
+    return dict(_running) if _running else None
+
+
+def reserve(fmt: str | None = None, incremental: bool = False) -> dict:
+    """
+    校验参数并占用本进程唯一的快照名额，返回任务信息；之后调用 run(job)（可在后台线程中）。
+    同一时间只允许一个快照任务，格式不可用时抛出 SnapshotError。
+    """
+    global _running
+    fmt = fmt or default_format()
+    if fmt not in available_formats():
+        raise SnapshotError(400, f"格式 {fmt} 需要安装 pyarrow（可用：{', '.join(available_formats())}）")
+    base = None
+    if incremental:
+        previous = list_snapshots()
+        if not previous:
+            raise SnapshotError(400, "没有可作为增量基准的快照，请先做一次全量快照")
+        base = previous[0]
+    started = datetime.now()
+    job = {
+        "id": started.strftime("%Y%m%dT%H%M%S") + ("-incr" if incremental else "-full"),
+        "format": fmt,
+        "mode": "incremental" if incremental else "full",
+        "base": base["id"] if base else None,
+        "since": base["until"] if base else None,
+        "until": (started - timedelta(seconds=WATERMARK_LAG_SECONDS)).isoformat(),
+        "started_at": started.isoformat(),
+        "status": "running",
+        "progress": {"records": 0},
+    }
+    with _lock:
+        if _running is not None:
+            raise SnapshotError(429, "已有快照任务在运行，请稍后再试")
+        if (snapshot_dir() / job["id"]).exists():
+            raise SnapshotError(429, "快照创建过于频繁，请稍后再试")
+        _running = job
+    return job
+
+
+def run(job: dict) -> dict:
+    """执行 reserve() 返回的快照任务，返回 manifest；失败时清理临时目录并抛出异常。"""
+    global _running
+    base = snapshot_dir()
+    tmp = base / f".{job['id']}.tmp"
+    started = time.perf_counter()
+    since = datetime.fromisoformat(job["since"]) if job["since"] else None
+    until = datetime.fromisoformat(job["until"])
+    try:
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        db = _consistent_session()
+        try:
+            files = _export_records(db, tmp, job["format"], since, until, job["progress"])
+            files["favorites"] = _export_full(
+                db, tmp, job["format"], "favorites",
+                db.query(Favorite.id, Favorite.record_id, Favorite.user_id, Favorite.created_at).order_by(Favorite.id),
+                lambda r: {"id": r.id, "record_id": r.record_id, "user_id": r.user_id, "created_at": r.created_at},
+            )
+            files["users"] = _export_full(
+                db, tmp, job["format"], "users",
+                db.query(User.id, User.username, User.nickname, User.disabled, User.created_at).order_by(User.id),
+                lambda r: {
+                    "id": r.id, "username": r.username, "nickname": r.nickname,
+                    "disabled": bool(r.disabled), "created_at": r.created_at,
+                },
+            )
+        finally:
+            db.rollback()
+            db.close()
+        manifest = {key: job[key] for key in ("id", "format", "mode", "base", "since", "until", "started_at")}
+        manifest.update({
+            "finished_at": datetime.now().isoformat(),
+            "elapsed_seconds": round(time.perf_counter() - started, 2),
+            "partition_by": {"records": "date", "record_tags": "date"},
+            "schema": {table: dict(columns) for table, columns in TABLES.items()},
+            "tables": {
+                table: {
+                    "rows": sum(f["rows"] for f in table_files),
+                    "bytes": sum(f["bytes"] for f in table_files),
+                    "files": table_files,
+                }
+                for table, table_files in files.items()
+            },
+        })
+        (tmp / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.rename(base / job["id"])
+        return manifest
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    finally:
+        with _lock:
+            _running = None
@@ -0,0 +1,106 @@
+"""
+解题过程（solution）压缩存储编解码。
+
+SOLUTION_COMPRESSION=zlib|zstd 时，保存记录会把较长的 solution 压缩后写入 solution_compressed（BLOB），
+solution 列置空；详情接口读取时透明解压。压缩数据格式：
+
+    1 字节编码标识 + [4 字节字典 ID，仅 zstd 字典模式] + 压缩内容
+
+zstd 为可选依赖（pip install zstandard），可用历史数据训练共享字典（见 scripts/compress_solutions.py --train），
+字典文件保存在 SOLUTION_ZSTD_DICT_DIR/<id>.dict，旧字典需保留以便解压历史数据。
+"""
+import struct
+import threading
+import zlib
+from pathlib import Path
+
+from config import settings
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_ZSTD_DICT = 3
+
+_dict_lock = threading.Lock()
+_dicts: dict = {}
+
+
+def _dict_dir() -> Path:
+    d = Path(settings.SOLUTION_ZSTD_DICT_DIR)
+    if not d.is_absolute():
+        d = Path(__file__).resolve().parent.parent / d
+    return d
+
+
+def _load_dict(dict_id: int):
+    """按 ID 加载（并缓存）zstd 字典。"""
+    with _dict_lock:
+        if dict_id not in _dicts:
+            path = _dict_dir() / f"{dict_id}.dict"
+            _dicts[dict_id] = zstandard.ZstdCompressionDict(path.read_bytes())
+        return _dicts[dict_id]
+
+
+def compress_solution(text: str) -> bytes | None:
+    """按当前配置压缩；未开启压缩、内容过短或压缩后不更小时返回 None（保持明文存储）。"""
+    codec = (settings.SOLUTION_COMPRESSION or "none").lower()
+    if codec == "none" or not text:
+        return None
+    raw = text.encode("utf-8")
+    if len(raw) < settings.SOLUTION_COMPRESSION_MIN_BYTES:
+        return None
+    if codec == "zstd" and zstandard is not None:
+        dict_id = settings.SOLUTION_ZSTD_DICT_ID
+        if dict_id:
+            cctx = zstandard.ZstdCompressor(level=settings.SOLUTION_ZSTD_LEVEL, dict_data=_load_dict(dict_id))
+            blob = bytes([CODEC_ZSTD_DICT]) + struct.pack(">I", dict_id) + cctx.compress(raw)
+        else:
+            cctx = zstandard.ZstdCompressor(level=settings.SOLUTION_ZSTD_LEVEL)
+            blob = bytes([CODEC_ZSTD]) + cctx.compress(raw)
+    else:
+        # 未安装 zstandard 时回退到标准库 zlib
+        blob = bytes([CODEC_ZLIB]) + zlib.compress(raw, 9)
+    return blob if len(blob) < len(raw) else None
+
+
+def decompress_solution(blob: bytes) -> str:
+    codec = blob[0]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(blob[1:]).decode("utf-8")
+    if zstandard is None:
+        raise RuntimeError("该记录使用 zstd 压缩，请安装 zstandard")
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(blob[1:]).decode("utf-8")
+    if codec == CODEC_ZSTD_DICT:
+        (dict_id,) = struct.unpack(">I", blob[1:5])
+        return zstandard.ZstdDecompressor(dict_data=_load_dict(dict_id)).decompress(blob[5:]).decode("utf-8")
+    raise ValueError(f"未知的 solution 压缩格式: {codec}")
+
+
+def pack_solution(text: str | None) -> tuple[str | None, bytes | None]:
+    """写入路径使用：返回 (solution, solution_compressed)，二者至多一个非空。"""
+    blob = compress_solution(text) if text else None
+    return (None, blob) if blob is not None else (text, None)
+
+
+def unpack_solution(text: str | None, blob: bytes | None) -> str | None:
+    """读取路径使用：优先解压 solution_compressed，否则返回明文 solution。"""
+    if blob is not None:
+        return decompress_solution(blob)
+    return text
+
+
+def train_dictionary(samples: list[str], size: int = 112640) -> int:
+    """用样本训练 zstd 字典并写入字典目录，返回字典 ID（即 zstd 字典自带的 dict_id）。"""
+    if zstandard is None:
+        raise RuntimeError("训练字典需要安装 zstandard")
+    trained = zstandard.train_dictionary(size, [s.encode("utf-8") for s in samples])
+    dict_id = trained.dict_id()
+    d = _dict_dir()
+    d.mkdir(parents=True, exist_ok=True)
+    (d / f"{dict_id}.dict").write_bytes(trained.as_bytes())
+    return dict_id
@@ -0,0 +1,84 @@
+"""
+/solve/models 响应缓存：进程内保存预序列化的响应体与 ETag，稳态读路径不查询数据库。
+
+管理员增删改解题模型后调用 invalidate()：清空本进程缓存，并在 system_settings 中写入新的版本号；
+多 worker 部署时，其他进程每 SOLVE_MODELS_VERSION_CHECK_SECONDS 秒最多读取一次该版本号，发现变化即重建。
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.solve_model import SolveModel
+from models.system_setting import SystemSetting
+
+VERSION_KEY = "SOLVE_MODELS_VERSION"
+
+_lock = threading.Lock()
+_body: bytes | None = None
+_etag: str | None = None
+_version: str | None = None
+_checked_at = 0.0
+
+
+def _read_version(db: Session) -> str:
+    row = db.query(SystemSetting.value).filter(SystemSetting.key == VERSION_KEY).first()
+    return (row.value if row else None) or ""
+
+
+def _build(db: Session) -> tuple[bytes, str]:
+    # 延迟导入：routers.solve 依赖本模块
+    from routers.solve import _get_solve_model_options_from_env
+
+    rows = (
+        db.query(SolveModel.model_id, SolveModel.display_name)
+        .filter(SolveModel.enabled == True)
+        .order_by(SolveModel.sort_order, SolveModel.id)
+        .all()
+    )
+    if rows:
+        data = [{"id": r.model_id, "name": r.display_name} for r in rows]
+    else:
+        data = _get_solve_model_options_from_env()
+    body = json.dumps({"errCode": 0, "errMsg": "success", "data": data}, ensure_ascii=False).encode("utf-8")
+    # 内容哈希：各 worker 对相同内容给出相同 ETag
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def get_solve_models(db: Session) -> tuple[bytes, str]:
+    """返回 (响应体, ETag)。距上次校验不足检查间隔时直接返回缓存，不访问数据库。"""
+    global _body, _etag, _version, _checked_at
+    now = time.monotonic()
+    if _body is not None and now - _checked_at < settings.SOLVE_MODELS_VERSION_CHECK_SECONDS:
+        return _body, _etag
+    with _lock:
+        if _body is not None and now - _checked_at < settings.SOLVE_MODELS_VERSION_CHECK_SECONDS:
+            return _body, _etag
+        version = _read_version(db)
+        if _body is None or version != _version:
+            _body, _etag = _build(db)
+            _version = version
+        _checked_at = time.monotonic()
+        return _body, _etag
+
+
+def invalidate(db: Session) -> None:
+    """解题模型变更后调用：写入新版本号（通知其他 worker）并清空本进程缓存。"""
+    global _body, _etag
+    try:
+        row = db.query(SystemSetting).filter(SystemSetting.key == VERSION_KEY).first()
+        if row:
+            row.value = uuid.uuid4().hex
+        else:
+            db.add(SystemSetting(key=VERSION_KEY, value=uuid.uuid4().hex))
+        db.commit()
+    except Exception:
+        db.rollback()
+    finally:
+        with _lock:
+            _body = None
+            _etag = None
@@ -0,0 +1,59 @@
+"""
+嵌入式 SQLite 后端（DB_BACKEND=sqlite）：单机部署或本地基准测试时无需 MySQL 服务。
+
+- 每个连接设置 WAL 日志（读写互不阻塞）、synchronous、busy_timeout（写锁等待）、外键约束、页缓存与内存映射；
+- 表结构由 ORM 模型生成（create_schema，启动时执行，已存在的表不变），外键的 ON DELETE 动作、唯一约束与索引与 init_db.sql 一致；
+- func.now() 在 SQLite 中编译为本地时间（与 MySQL 的 NOW() 一致，CURRENT_TIMESTAMP 为 UTC），列默认值与查询均如此；
+- 统计汇总的 upsert、冷热分层的空间统计等方言相关逻辑在各自模块中按 dialect.name 处理。
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
+
+from config import settings
+
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return "datetime('now', 'localtime')"
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def engine_options(url: str) -> dict:
+    """SQLite 连接参数：允许连接池跨线程使用连接，busy 等待交给 PRAGMA busy_timeout。"""
+    path = url.split("///", 1)[1] if "///" in url else ""
+    if path and path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return {"connect_args": {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+
+
+def install(engine) -> None:
+    """为每个新连接设置 PRAGMA。"""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_MB) * 1024}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_MB) * 1024 * 1024}")
+        finally:
+            cursor.close()
+
+
+def create_schema(engine) -> None:
+    """按 ORM 模型创建缺少的表与索引。"""
+    import models  # noqa: F401  注册全部模型
+    from models.system_setting import SystemSetting  # noqa: F401  未在 models 包中导出
+    from database import Base
+
+    Base.metadata.create_all(engine)
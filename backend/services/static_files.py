@@ -0,0 +1,193 @@
+"""
+上传文件（头像等）的静态服务：长期缓存头、强 ETag、Range 请求，以及可选的小文件内存快速路径。
+
+- 上传文件名唯一（内容哈希或带随机后缀），内容不会变化：Cache-Control: public, max-age=一年, immutable；
+- 强 ETag：内容哈希命名的文件直接用哈希，其他文件用 mtime + size；If-None-Match 命中返回 304；
+- Range: bytes=start-end（单区间，支持 If-Range），返回 206；不可满足返回 416；
+- UPLOADS_FAST_PATH 开启时，不超过 UPLOADS_FAST_PATH_MAX_BYTES 的文件在首次读取后缓存在进程内存中，
+  后续请求不再访问磁盘、一次发送完整响应体（总量不超过 UPLOADS_FAST_PATH_CACHE_BYTES）。
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from config import settings
+from services.etag import if_none_match
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_HASH_STEM_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_cache_lock = threading.Lock()
+# (路径, mtime_ns, size) -> 文件内容
+_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_cache_bytes = 0
+
+
+def file_etag(path: str, stat_result: os.stat_result) -> str:
+    name = os.path.basename(path)
+    stem = name.split(".", 1)[0]
+    if _HASH_STEM_RE.match(stem):
+        # 内容哈希命名：ETag 与文件内容一一对应，多实例部署时也一致
+        return f'"{name}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None | bool:
+    """解析单区间 Range，返回 (start, end)（含 end）；无法识别返回 None（按完整响应处理），不可满足返回 False。"""
+    m = _RANGE_RE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+    else:
+        # bytes=-N：最后 N 个字节
+        start = max(0, size - int(m.group(2)))
+        end = size - 1
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+def _cache_get(key: tuple) -> bytes | None:
+    with _cache_lock:
+        body = _cache.get(key)
+        if body is not None:
+            _cache.move_to_end(key)
+        return body
+
+
+def _cache_put(key: tuple, body: bytes) -> None:
+    global _cache_bytes
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = body
+        _cache_bytes += len(body)
+        while _cache_bytes > settings.UPLOADS_FAST_PATH_CACHE_BYTES and _cache:
+            _, old = _cache.popitem(last=False)
+            _cache_bytes -= len(old)
+
+
+class FileSliceResponse(Response):
+    """从磁盘异步读取文件的 [start, start + length) 部分；cache_key 非空时把读到的完整内容放入内存缓存。"""
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        length: int,
+        status_code: int,
+        headers: dict,
+        media_type: str,
+        method: str,
+        cache_key: tuple | None = None,
+    ):
+        self.path = path
+        self.start = start
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.send_body = method.upper() != "HEAD"
+        self.cache_key = cache_key
+        self.body = b""
+        self.init_headers({**headers, "content-length": str(length)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        collected = [] if self.cache_key is not None else None
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                if collected is not None:
+                    collected.append(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # 文件在发送过程中被截断
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif collected is not None:
+            _cache_put(self.cache_key, b"".join(collected))
+
+
+def upload_file_response(
+    path: str,
+    stat_result: os.stat_result,
+    request_headers: Headers,
+    method: str = "GET",
+    cache_control: str = IMMUTABLE,
+) -> Response:
+    """构造带缓存头的文件响应：304 / 206 / 416 / 200（小文件可走内存快速路径）。"""
+    etag = file_etag(path, stat_result)
+    size = stat_result.st_size
+    headers = {
+        "etag": etag,
+        "cache-control": cache_control,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+    }
+    if if_none_match(request_headers.get("if-none-match"), etag):
+        return NotModifiedResponse(Headers(headers))
+    media_type = guess_type(path)[0] or "application/octet-stream"
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        parsed = _parse_range(range_header, size)
+        if parsed is False:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if parsed is not None:
+            start, end = parsed
+            return FileSliceResponse(
+                path, start, end - start + 1, 206,
+                {**headers, "content-range": f"bytes {start}-{end}/{size}"},
+                media_type, method,
+            )
+
+    cache_key = None
+    if settings.UPLOADS_FAST_PATH and size <= settings.UPLOADS_FAST_PATH_MAX_BYTES:
+        cache_key = (path, stat_result.st_mtime_ns, size)
+        body = _cache_get(cache_key)
+        if body is not None:
+            response = Response(content=body if method.upper() != "HEAD" else b"", headers=headers, media_type=media_type)
+            response.headers["content-length"] = str(size)
+            return response
+    return FileSliceResponse(path, 0, size, 200, headers, media_type, method, cache_key=cache_key)
+
+
+class UploadStaticFiles(StaticFiles):
+    """替换 StaticFiles 的文件响应：长期缓存、强 ETag、Range 与小文件快速路径。"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return upload_file_response(str(full_path), stat_result, Headers(scope=scope), scope["method"])
+
+
+def fast_path_stats() -> dict:
+    return {
+        "enabled": settings.UPLOADS_FAST_PATH,
+        "files": len(_cache),
+        "bytes": _cache_bytes,
+        "capacity_bytes": settings.UPLOADS_FAST_PATH_CACHE_BYTES,
+    }
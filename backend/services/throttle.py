@@ -0,0 +1,119 @@
+"""
+登录/注册准入控制：按客户端 IP 与用户名的令牌桶限流，以及密码校验的全局并发上限。
+
+超出限制时立即返回 429 + Retry-After，不进入 bcrypt 计算；令牌桶保存在进程内，
+每 THROTTLE_SWEEP_SECONDS 秒清理一次空闲超过 THROTTLE_IDLE_SECONDS 秒的桶。
+"""
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, Request
+
+from config import settings
+
+
+class TokenBucket:
+    """容量 capacity，每秒补充 rate 个令牌。"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """取一个令牌；成功返回 0，否则返回需等待的秒数。"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float(settings.THROTTLE_IDLE_SECONDS)
+
+
+class BucketStore:
+    def __init__(self, capacity: int, per_minute: float):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+
+    def take(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept >= settings.THROTTLE_SWEEP_SECONDS:
+                self._sweep(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.capacity, self.rate)
+            return bucket.take(now)
+
+    def _sweep(self, now: float) -> None:
+        idle = settings.THROTTLE_IDLE_SECONDS
+        for key in [k for k, b in self._buckets.items() if now - b.updated > idle]:
+            del self._buckets[key]
+        self._swept = now
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_by_ip = BucketStore(settings.LOGIN_BURST_PER_IP, settings.LOGIN_RATE_PER_IP_PER_MINUTE)
+_by_username = BucketStore(settings.LOGIN_BURST_PER_USERNAME, settings.LOGIN_RATE_PER_USERNAME_PER_MINUTE)
+_in_flight = 0
+_rejected = {"ip": 0, "username": 0, "concurrency": 0}
+
+
+def _too_many(retry_after: float, reason: str) -> HTTPException:
+    _rejected[reason] += 1
+    return HTTPException(
+        status_code=429,
+        detail="请求过于频繁，请稍后重试",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_ip(request: Request) -> str:
+    if settings.THROTTLE_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def check_login(request: Request, username: str) -> None:
+    """按 IP 与用户名各取一个令牌，任一不足时抛出 429。"""
+    wait = _by_ip.take(client_ip(request))
+    if wait > 0:
+        raise _too_many(wait, "ip")
+    wait = _by_username.take((username or "").strip().lower())
+    if wait > 0:
+        raise _too_many(wait, "username")
+
+
+@asynccontextmanager
+async def password_slot():
+    """密码哈希/校验的全局并发上限（仅在事件循环中使用，无需加锁）；已满时立即抛出 429。"""
+    global _in_flight
+    if _in_flight >= settings.LOGIN_MAX_CONCURRENT:
+        raise _too_many(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS, "concurrency")
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+
+
+def stats() -> dict:
+    return {
+        "ip_buckets": len(_by_ip),
+        "username_buckets": len(_by_username),
+        "in_flight": _in_flight,
+        "max_concurrent": settings.LOGIN_MAX_CONCURRENT,
+        "rejected": dict(_rejected),
+    }
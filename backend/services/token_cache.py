@@ -0,0 +1,185 @@
+"""
+已验证 JWT 缓存：按 token 的 SHA-256 缓存验签结果（用户 ID），同一 token 的后续请求跳过 jwt.decode。
+
+- LRU，最多 TOKEN_CACHE_SIZE 条；条目在 token 的 exp 到期后失效；
+- 撤销：管理员重置密码时写入 users.password_changed_at 并调用 revoke_user(user_id, before=重置时间)，
+  签发时间（iat）早于该时间的 token 无论是否命中缓存都被拒绝（没有 iat 的旧 token 同样拒绝）；
+  本进程立即生效，其他 worker 每 TOKEN_REVOCATION_REFRESH_SECONDS 秒从数据库刷新截止时间（refresh_loop）；
+  删除用户时只清除缓存条目，拒绝由停用名单（services/user_deletion.py）负责；
+- stats()：命中率与按验签平均耗时估算的节省时间，见 GET /api/admin/metrics。
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from config import settings
+
+_lock = threading.Lock()
+# key -> (user_id, exp 时间戳, iat 时间戳)
+_entries: "OrderedDict[str, tuple[str, float, float]]" = OrderedDict()
+_by_user: dict[str, set[str]] = {}
+# user_id -> 截止时间戳：iat 早于该时间的 token 已撤销
+_revoked_before: dict[str, float] = {}
+_revoked = 0
+_hits = 0
+_misses = 0
+_decode_seconds = 0.0  # 未命中时验签累计耗时
+_hit_seconds = 0.0  # 命中时查缓存累计耗时
+
+
+def _key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _drop(key: str) -> None:
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        keys = _by_user.get(entry[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _by_user[entry[0]]
+
+
+def _is_revoked(user_id: str, iat: float) -> bool:
+    cutoff = _revoked_before.get(user_id)
+    return cutoff is not None and iat < cutoff
+
+
+def _get(key: str) -> tuple[str, float] | None:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            _drop(key)
+            return None
+        _entries.move_to_end(key)
+        return entry[0], entry[2]
+
+
+def _put(key: str, user_id: str, exp: float, iat: float) -> None:
+    with _lock:
+        _drop(key)
+        _entries[key] = (user_id, exp, iat)
+        _by_user.setdefault(user_id, set()).add(key)
+        while len(_entries) > settings.TOKEN_CACHE_SIZE:
+            _drop(next(iter(_entries)))
+
+
+def verify(token: str, decode: Callable[[str], dict]) -> str | None:
+    """
+    返回 token 对应的用户 ID；未命中时调用 decode 验签，失败（过期、签名错误等）返回 None 且不缓存。
+    已撤销（签发早于该用户的截止时间）的 token 返回 None。
+    """
+    global _hits, _misses, _decode_seconds, _hit_seconds, _revoked
+    start = time.perf_counter()
+    if settings.TOKEN_CACHE_SIZE > 0:
+        key = _key(token)
+        cached = _get(key)
+        if cached is not None:
+            _hits += 1
+            _hit_seconds += time.perf_counter() - start
+            user_id, iat = cached
+            if _is_revoked(user_id, iat):
+                _revoked += 1
+                with _lock:
+                    _drop(key)
+                return None
+            return user_id
+    try:
+        payload = decode(token)
+    except Exception:
+        payload = None
+    _misses += 1
+    _decode_seconds += time.perf_counter() - start
+    if not payload:
+        return None
+    user_id, exp, iat = payload.get("sub"), payload.get("exp"), float(payload.get("iat") or 0)
+    if user_id and _is_revoked(user_id, iat):
+        _revoked += 1
+        return None
+    if user_id and exp and settings.TOKEN_CACHE_SIZE > 0:
+        _put(key, user_id, float(exp), iat)
+    return user_id
+
+
+def revoke_user(user_id: str, before: float | None = None) -> int:
+    """
+    清除该用户的全部缓存条目，返回清除条数；传入 before（时间戳）时，该用户签发早于 before 的 token 此后一律拒绝。
+    """
+    with _lock:
+        if before is not None:
+            _revoked_before[user_id] = max(before, _revoked_before.get(user_id, 0.0))
+        keys = list(_by_user.get(user_id, ()))
+        for key in keys:
+            _drop(key)
+        return len(keys)
+
+
+def refresh_revocations(db) -> None:
+    """从 users.password_changed_at 重新加载撤销截止时间（只需 token 有效期内修改过密码的用户）。"""
+    global _revoked_before
+    from models.user import User
+
+    since = datetime.now() - timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
+    rows = db.query(User.id, User.password_changed_at).filter(User.password_changed_at >= since).all()
+    loaded = {r.id: r.password_changed_at.timestamp() for r in rows}
+    with _lock:
+        # 保留本进程刚写入、数据库读取时尚未可见的截止时间
+        for user_id, cutoff in _revoked_before.items():
+            if cutoff > loaded.get(user_id, 0.0) and cutoff >= since.timestamp():
+                loaded[user_id] = cutoff
+        _revoked_before = loaded
+
+
+def _refresh() -> None:
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        refresh_revocations(db)
+    finally:
+        db.close()
+
+
+async def refresh_loop() -> None:
+    """应用运行期间定期刷新撤销截止时间，使其他 worker 上的密码重置在本进程生效。"""
+    while True:
+        try:
+            await run_in_threadpool(_refresh)
+        except Exception as e:
+            print(f"[token_cache] 刷新撤销名单失败: {e}")
+        await asyncio.sleep(settings.TOKEN_REVOCATION_REFRESH_SECONDS)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+        _by_user.clear()
+
+
+def stats() -> dict:
+    total = _hits + _misses
+    avg_decode_ms = _decode_seconds / _misses * 1000 if _misses else 0.0
+    avg_hit_ms = _hit_seconds / _hits * 1000 if _hits else 0.0
+    return {
+        "size": len(_entries),
+        "capacity": settings.TOKEN_CACHE_SIZE,
+        "hits": _hits,
+        "misses": _misses,
+        "hit_rate": round(_hits / total, 4) if total else 0.0,
+        "revoked_users": len(_revoked_before),
+        "revoked_rejections": _revoked,
+        "avg_decode_ms": round(avg_decode_ms, 4),
+        "avg_hit_ms": round(avg_hit_ms, 4),
+        # 命中请求按「平均验签耗时 - 平均命中耗时」估算节省的认证时间
+        "saved_ms_per_request": round((avg_decode_ms - avg_hit_ms) * _hits / total, 4) if total else 0.0,
+        "saved_ms_total": round(max(0.0, avg_decode_ms - avg_hit_ms) * _hits, 2),
+    }
@@ -0,0 +1,97 @@
+"""
+用户资料缓存：按用户 ID 缓存 id / username / nickname / avatar_url / avatar_variants，供 /auth/profile 与列表接口解析显示名。
+
+- 写穿：修改资料、头像的接口在提交后调用 put()，删除用户后调用 invalidate()；
+- 多 worker 部署时其他进程的缓存最长在 USER_CACHE_TTL_SECONDS 秒后过期重读；
+- get_profiles() 批量查询：未命中的 ID 用一次 IN 查询补齐，列表接口无需再连接 users 表。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.user import User
+
+_lock = threading.Lock()
+# user_id -> (资料字典, 过期时间戳)
+_entries: "OrderedDict[str, tuple[dict, float]]" = OrderedDict()
+
+
+def _profile(row) -> dict:
+    return {
+        "id": row.id,
+        "username": row.username,
+        "nickname": row.nickname,
+        "avatar_url": row.avatar_url,
+        "avatar_variants": row.avatar_variants,
+    }
+
+
+def _store(profiles: Iterable[dict]) -> None:
+    if settings.USER_CACHE_SIZE <= 0:
+        return
+    expires = time.monotonic() + settings.USER_CACHE_TTL_SECONDS
+    with _lock:
+        for profile in profiles:
+            _entries[profile["id"]] = (profile, expires)
+            _entries.move_to_end(profile["id"])
+        while len(_entries) > settings.USER_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def _lookup(user_ids: Iterable[str]) -> dict[str, dict]:
+    now = time.monotonic()
+    found = {}
+    with _lock:
+        for user_id in user_ids:
+            entry = _entries.get(user_id)
+            if entry is None:
+                continue
+            if entry[1] <= now:
+                del _entries[user_id]
+                continue
+            _entries.move_to_end(user_id)
+            found[user_id] = entry[0]
+    return found
+
+
+def get_profiles(db: Session, user_ids: Iterable[str | None]) -> dict[str, dict]:
+    """批量获取用户资料，返回 {user_id: 资料}；不存在的用户不出现在结果中。"""
+    wanted = {i for i in user_ids if i}
+    if not wanted:
+        return {}
+    found = _lookup(wanted)
+    missing = wanted - found.keys()
+    if missing:
+        rows = (
+            db.query(User.id, User.username, User.nickname, User.avatar_url, User.avatar_variants)
+            .filter(User.id.in_(missing))
+            .all()
+        )
+        loaded = [_profile(r) for r in rows]
+        _store(loaded)
+        found.update((p["id"], p) for p in loaded)
+    return found
+
+
+def get_profile(db: Session, user_id: str) -> dict | None:
+    return get_profiles(db, [user_id]).get(user_id)
+
+
+def put(user: User) -> dict:
+    """写穿：资料修改提交后用最新的 User 更新缓存，返回资料字典。"""
+    profile = _profile(user)
+    _store([profile])
+    return profile
+
+
+def invalidate(user_id: str) -> None:
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def stats() -> dict:
+    return {"size": len(_entries), "capacity": settings.USER_CACHE_SIZE, "ttl_seconds": settings.USER_CACHE_TTL_SECONDS}
@@ -0,0 +1,261 @@
+"""
+后台删除用户：管理员删除用户时只在一个短事务里把账号标记为停用（users.disabled）并写入 user_deletions 任务，
+随后由后台任务按 USER_DELETE_BATCH_SIZE 分批删除收藏、把解题记录与归档记录的 user_id 置空，最后删除用户行。
+
+- 每批一个短事务，进度计数与本批变更一起提交，批次间暂停 USER_DELETE_BATCH_PAUSE_MS 毫秒，不会长时间锁住
+  solution_records / favorites；关联行清理完后再删用户行，外键的 ON DELETE 动作不再涉及大量行；
+- 停用立即生效：登录被拒绝，已签发的 token 在本进程立即失效（is_disabled），其他 worker 在
+  USER_DELETE_POLL_SECONDS 秒内刷新停用名单后失效；
+- 每个 worker 每 USER_DELETE_POLL_SECONDS 秒检查一次待处理任务：新建（pending）、失败待重试（pending + error）
+  或心跳超过 USER_DELETE_STALE_SECONDS 未更新（所在进程已退出）的任务通过条件 UPDATE 认领后继续，
+  因此服务重启后会从断点自动恢复，多个 worker 不会重复处理同一任务。
+"""
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.archived_record import ArchivedRecord
+from models.favorite import Favorite
+from models.record import SolutionRecord
+from models.user import User
+from models.user_deletion import UserDeletion
+from services import token_cache, user_cache
+
+_tasks: dict[str, asyncio.Task] = {}
+_lock = threading.Lock()
+_disabled: set[str] = set()
+_shutting_down = False
+_batches = 0
+_rows = 0
+
+
+def is_disabled(user_id: str) -> bool:
+    """用户是否已停用（删除中或已删除），认证时调用，只查进程内名单。"""
+    return user_id in _disabled
+
+
+def refresh_disabled(db: Session) -> None:
+    """重新加载停用名单：未完成的任务，以及完成时间在 token 有效期内的任务（其 token 可能仍未过期）。"""
+    global _disabled
+    cutoff = datetime.now() - timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
+    rows = (
+        db.query(UserDeletion.user_id)
+        .filter(or_(UserDeletion.status != "done", UserDeletion.finished_at >= cutoff))
+        .all()
+    )
+    with _lock:
+        _disabled = {r.user_id for r in rows} | set(_tasks)
+
+
+def request(db: Session, user: User) -> UserDeletion:
+    """停用用户并创建删除任务（已存在时直接返回），立即撤销其 token 与资料缓存。调用方负责随后在事件循环中 start()。"""
+    row = db.query(UserDeletion).filter(UserDeletion.user_id == user.id).first()
+    if row is None:
+        row = UserDeletion(user_id=user.id, username=user.username)
+        db.add(row)
+    user.disabled = True
+    db.commit()
+    db.refresh(row)
+    with _lock:
+        _disabled.add(user.id)
+    token_cache.revoke_user(user.id)
+    user_cache.invalidate(user.id)
+    return row
+
+
+def request_by_id(user_id: str) -> dict | None:
+    """在独立会话中执行 request()，供异步接口经 run_in_threadpool 调用；用户不存在时返回 None。"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        return request(db, user).to_dict()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _claim(user_id: str) -> bool:
+    """认领任务：仅当任务待处理或心跳已过期时置为 running，返回是否认领成功。"""
+    now = datetime.now()
+    stale = now - timedelta(seconds=settings.USER_DELETE_STALE_SECONDS)
+    db = SessionLocal()
+    try:
+        row = db.query(UserDeletion.started_at).filter(UserDeletion.user_id == user_id).first()
+        if row is None:
+            return False
+        n = (
+            db.query(UserDeletion)
+            .filter(
+                UserDeletion.user_id == user_id,
+                or_(
+                    UserDeletion.status == "pending",
+                    (UserDeletion.status == "running") & (UserDeletion.heartbeat_at < stale),
+                ),
+            )
+            .update(
+                {"status": "running", "heartbeat_at": now, "started_at": row.started_at or now},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return n == 1
+    finally:
+        db.close()
+
+
+def _update(user_id: str, **values) -> None:
+    db = SessionLocal()
+    try:
+        db.query(UserDeletion).filter(UserDeletion.user_id == user_id).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _progress(db: Session, user_id: str, column, n: int) -> None:
+    db.query(UserDeletion).filter(UserDeletion.user_id == user_id).update(
+        {column: column + n, "heartbeat_at": datetime.now()}, synchronize_session=False
+    )
+
+
+def run_batch(user_id: str) -> bool:
+    """处理一批，返回任务是否已全部完成。顺序：收藏 → 解题记录 → 归档记录 → 用户行。"""
+    global _batches, _rows
+    size = max(1, settings.USER_DELETE_BATCH_SIZE)
+    db = SessionLocal()
+    try:
+        ids = [r.id for r in db.query(Favorite.id).filter(Favorite.user_id == user_id).limit(size).all()]
+        if ids:
+            db.query(Favorite).filter(Favorite.id.in_(ids)).delete(synchronize_session=False)
+            _progress(db, user_id, UserDeletion.favorites_done, len(ids))
+        else:
+            ids = [r.id for r in db.query(SolutionRecord.id).filter(SolutionRecord.user_id == user_id).limit(size).all()]
+            if ids:
+                db.query(SolutionRecord).filter(SolutionRecord.id.in_(ids)).update(
+                    {SolutionRecord.user_id: None}, synchronize_session=False
+                )
+                _progress(db, user_id, UserDeletion.records_done, len(ids))
+            else:
+                ids = [r.id for r in db.query(ArchivedRecord.id).filter(ArchivedRecord.user_id == user_id).limit(size).all()]
+                if ids:
+                    db.query(ArchivedRecord).filter(ArchivedRecord.id.in_(ids)).update(
+                        {ArchivedRecord.user_id: None}, synchronize_session=False
+                    )
+                    _progress(db, user_id, UserDeletion.archived_done, len(ids))
+        if ids:
+            db.commit()
+            _batches += 1
+            _rows += len(ids)
+            return False
+        db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+        db.query(UserDeletion).filter(UserDeletion.user_id == user_id).update(
+            {"status": "done", "error": None, "finished_at": datetime.now(), "heartbeat_at": datetime.now()},
+            synchronize_session=False,
+        )
+        db.commit()
+        _batches += 1
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    user_cache.invalidate(user_id)
+    return True
+
+
+async def _run(user_id: str) -> None:
+    try:
+        if not await run_in_threadpool(_claim, user_id):
+            return
+        while not await run_in_threadpool(run_batch, user_id):
+            await asyncio.sleep(settings.USER_DELETE_BATCH_PAUSE_MS / 1000)
+    except asyncio.CancelledError:
+        if _shutting_down:
+            # 交还任务，重启后（或其他 worker）立即继续，无需等待心跳过期
+            await run_in_threadpool(_update, user_id, status="pending")
+        raise
+    except Exception as e:
+        # 保持 pending 并记录原因，下一次检查时重试
+        print(f"[user_deletion] 用户 {user_id} 删除失败: {e}")
+        await run_in_threadpool(_update, user_id, status="pending", error=str(e)[:500])
+    finally:
+        _tasks.pop(user_id, None)
+
+
+def start(user_id: str) -> None:
+    """在当前事件循环中启动（或继续）删除任务；本进程已在处理时忽略。"""
+    task = _tasks.get(user_id)
+    if task is not None and not task.done():
+        return
+    _tasks[user_id] = asyncio.create_task(_run(user_id))
+
+
+def _poll() -> list[str]:
+    """刷新停用名单并返回可认领的任务。"""
+    stale = datetime.now() - timedelta(seconds=settings.USER_DELETE_STALE_SECONDS)
+    db = SessionLocal()
+    try:
+        refresh_disabled(db)
+        rows = (
+            db.query(UserDeletion.user_id)
+            .filter(
+                or_(
+                    UserDeletion.status == "pending",
+                    (UserDeletion.status == "running") & (UserDeletion.heartbeat_at < stale),
+                )
+            )
+            .order_by(UserDeletion.created_at)
+            .all()
+        )
+        return [r.user_id for r in rows]
+    finally:
+        db.close()
+
+
+async def resume_loop() -> None:
+    """应用运行期间定期接手待处理的删除任务（含服务重启前中断的任务）。"""
+    while True:
+        try:
+            for user_id in await run_in_threadpool(_poll):
+                start(user_id)
+        except Exception as e:
+            print(f"[user_deletion] 检查删除任务失败: {e}")
+        await asyncio.sleep(settings.USER_DELETE_POLL_SECONDS)
+
+
+def remaining(db: Session, user_id: str) -> dict:
+    """尚未处理的关联行数（按 user_id 计数）。"""
+    return {
+        "favorites": db.query(Favorite).filter(Favorite.user_id == user_id).count(),
+        "records": db.query(SolutionRecord).filter(SolutionRecord.user_id == user_id).count(),
+        "archived": db.query(ArchivedRecord).filter(ArchivedRecord.user_id == user_id).count(),
+    }
+
+
+async def shutdown() -> None:
+    global _shutting_down
+    _shutting_down = True
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def stats() -> dict:
+    return {
+        "running": sum(1 for t in _tasks.values() if not t.done()),
+        "disabled_users": len(_disabled),
+        "batches": _batches,
+        "rows": _rows,
+    }